@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_config_load.py - Время загрузки конфигурации в зависимости от числа ресурсов
+
+Сравнивает прежнюю загрузку (json.load + jsonschema.validate со сборкой валидатора
+при каждом вызове) с ConfigLoader: кэшированный валидатор, fastjsonschema и orjson,
+если они установлены.
+
+Запуск из корня проекта:
+    python benchmarks/bench_config_load.py
+"""
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# pylint: disable=wrong-import-position
+from jsonschema import validate
+from monitor import schema
+from monitor.config import DEFAULT_SCHEMA_PATH, ConfigLoader
+
+SIZES = (100, 1000, 10000, 50000)
+REPEAT = 3
+
+
+def make_config(count: int) -> dict:
+    """Создает конфигурацию с count ресурсами."""
+    return {
+        "log_level": "INFO",
+        "telegram_users": [{"telegram_id": 1, "name": "Admin", "role": "Admin"}],
+        "resources": [
+            {
+                "name": f"service-{i}",
+                "url": f"https://service-{i}.example.com/health",
+                "method": "GET",
+                "port": 443,
+                "error_code": 500,
+                "success_code": 200,
+                "check_interval": 60,
+                "retry_interval": 5,
+                "max_attempts": 3,
+                "tags": ["prod", f"team-{i % 20}"],
+            }
+            for i in range(count)
+        ],
+    }
+
+
+def load_legacy(config_path: Path):
+    """Прежняя загрузка: разбор схемы и сборка валидатора при каждом вызове."""
+    with config_path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    with DEFAULT_SCHEMA_PATH.open("r", encoding="utf-8") as s:
+        schema_data = json.load(s)
+    validate(instance=data, schema=schema_data)
+
+
+def best_time(func, *args) -> float:
+    """Возвращает лучшее время из REPEAT запусков (секунды)."""
+    times = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main():
+    """Выводит таблицу времени загрузки."""
+    print(f"orjson: {'да' if schema.orjson is not None else 'нет'}, "
+          f"fastjsonschema: {'да' if schema.fastjsonschema is not None else 'нет'}")
+    print(f"{'ресурсов':>9} {'размер, КБ':>11} {'прежняя, мс':>12} {'ConfigLoader, мс':>17}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in SIZES:
+            config_path = Path(tmp) / f"config-{count}.json"
+            config_path.write_text(json.dumps(make_config(count)), encoding="utf-8")
+            legacy = best_time(load_legacy, config_path)
+            loader = ConfigLoader()
+            current = best_time(loader.load_config, config_path)
+            size = config_path.stat().st_size / 1024
+            print(f"{count:>9} {size:>11.0f} {legacy * 1000:>12.1f} {current * 1000:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_incident_memory.py - Память 100 000 инцидентов: прежнее представление
+(__dict__, строки ISO 8601, полный текст ответа) против Incident со __slots__
+
+Текст ответа каждого инцидента — отдельная строка длиной TEXT_CHARS
+(по умолчанию max_text_chars извлекает до 2000 символов).
+
+Запуск из корня проекта:
+    python benchmarks/bench_incident_memory.py
+"""
+
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# pylint: disable=wrong-import-position
+from monitor.incident import Incident
+
+COUNT = 100000
+TEXT_CHARS = 2000
+
+
+class LegacyIncident:  # pylint: disable=too-few-public-methods
+    """Прежнее представление инцидента."""
+
+    def __init__(self, resource_name, code, response=None, timing=None):
+        self.resource_name = resource_name
+        self.code = code
+        self.response = response
+        self.timing = timing
+        self.start_time = datetime.now(timezone.utc).isoformat()
+        self.end_time = None
+
+
+def make_response(number: int) -> str:
+    """Создает текст ответа (страницу ошибки) с уникальным началом."""
+    return f"{number} Bad Gateway " + "x" * (TEXT_CHARS - 20)
+
+
+def measure(cls) -> tuple:
+    """Возвращает объем памяти (МБ) и время создания (секунды) COUNT инцидентов."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    incidents = [cls(f"service-{number}", 502, make_response(number)) for number in range(COUNT)]
+    elapsed = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del incidents
+    return size / 2 ** 20, elapsed
+
+
+def sort_time(incidents, key) -> float:
+    """Возвращает время сортировки инцидентов по началу (секунды)."""
+    started = time.perf_counter()
+    sorted(incidents, key=key)
+    return time.perf_counter() - started
+
+
+def main():
+    """Выводит объем памяти и время сортировки для обоих представлений."""
+    print(f"{COUNT} инцидентов, ответ {TEXT_CHARS} символов")
+    print(f"{'представление':>14} {'МБ':>8} {'создание, с':>12} {'сортировка, мс':>15}")
+    legacy = [LegacyIncident(f"s{n}", 502) for n in range(COUNT)]
+    current = [Incident(f"s{n}", 502) for n in range(COUNT)]
+    # Прежнее представление: длительность и сортировка требуют разбора строк ISO
+    legacy_sort = sort_time(legacy, lambda i: datetime.fromisoformat(i.start_time))
+    current_sort = sort_time(current, lambda i: i.started)
+    for title, cls, sort_elapsed in (("прежнее", LegacyIncident, legacy_sort), \
+                                     ("__slots__", Incident, current_sort)):
+        size, elapsed = measure(cls)
+        print(f"{title:>14} {size:>8.1f} {elapsed:>12.2f} {sort_elapsed * 1000:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_probe_history.py - Память истории проверок: массивы ProbeHistory
+против списка словарей
+
+Заполняет историю ENDPOINTS точек по SAMPLES проверок и пересчитывает объем
+на 10 000 точек. Время заполнения измеряется под tracemalloc и годится
+только для сравнения вариантов между собой.
+
+Запуск из корня проекта:
+    python benchmarks/bench_probe_history.py
+"""
+
+import sys
+import time
+import tracemalloc
+from collections import deque
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# pylint: disable=wrong-import-position
+from monitor.probe_history import ProbeHistory
+
+ENDPOINTS = 1000
+SAMPLES = 1000
+TARGET_ENDPOINTS = 10000
+
+
+def fill_arrays() -> list:
+    """Заполняет историю в ProbeHistory."""
+    histories = [ProbeHistory(SAMPLES) for _ in range(ENDPOINTS)]
+    started = time.time()
+    for history in histories:
+        for number in range(SAMPLES):
+            history.append(started + number * 60, 200, True, 0.123 + number % 7 / 100)
+    return histories
+
+
+def fill_dicts() -> list:
+    """Заполняет историю списками словарей (deque с maxlen)."""
+    histories = [deque(maxlen=SAMPLES) for _ in range(ENDPOINTS)]
+    started = time.time()
+    for history in histories:
+        for number in range(SAMPLES):
+            history.append({"time": started + number * 60, "code": 200, "ok": True, \
+                            "latency": 0.123 + number % 7 / 100})
+    return histories
+
+
+def measure(fill) -> tuple:
+    """Возвращает объем памяти (МБ) и время заполнения (секунды)."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    histories = fill()
+    elapsed = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del histories
+    return size / 2 ** 20, elapsed
+
+
+def main():
+    """Выводит объем памяти и время заполнения для обоих вариантов."""
+    scale = TARGET_ENDPOINTS / ENDPOINTS
+    print(f"{ENDPOINTS} точек × {SAMPLES} проверок, пересчет на {TARGET_ENDPOINTS} точек")
+    print(f"{'вариант':>14} {'МБ':>8} {f'МБ на {TARGET_ENDPOINTS}':>12} {'время, с':>9}")
+    for title, fill in (("ProbeHistory", fill_arrays), ("словари", fill_dicts)):
+        size, elapsed = measure(fill)
+        print(f"{title:>14} {size:>8.1f} {size * scale:>12.0f} {elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_probe_store.py - Время запроса доступности за месяц:
+свертки ProbeStore против подсчета по всем проверкам
+
+Записывает ENDPOINTS точек с проверкой раз в INTERVAL секунд за DAYS суток
+(проверки не удаляются) и сравнивает ProbeStore.availability с агрегатом по probes_raw.
+
+Запуск из корня проекта:
+    python benchmarks/bench_probe_store.py
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# pylint: disable=wrong-import-position
+from monitor.probe_store import ProbeStore
+
+ENDPOINTS = 20
+DAYS = 30
+INTERVAL = 60
+BATCH = 10000
+REPEAT = 5
+
+
+def best_time(func, *args) -> float:
+    """Возвращает лучшее время из REPEAT запусков (секунды)."""
+    times = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main():
+    """Выводит время записи и запросов."""
+    until = time.time() // 3600 * 3600
+    since = until - DAYS * 86400
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ProbeStore(str(Path(tmp) / "probes.sqlite"))
+        started = time.perf_counter()
+        batch = []
+        for number in range(ENDPOINTS):
+            for second in range(int(since), int(until), INTERVAL):
+                ok = second % 997 != 0
+                batch.append((f"service-{number}", second + 0.5, 200 if ok else 500, ok, 0.12))
+                if len(batch) == BATCH:
+                    store.write_batch(batch)
+                    batch = []
+        if batch:
+            store.write_batch(batch)
+        written = ENDPOINTS * DAYS * 86400 // INTERVAL
+        print(f"записано {written} проверок за {time.perf_counter() - started:.1f} с")
+
+        # pylint: disable=protected-access
+        raw_query = ("SELECT count(*), sum(ok) FROM probes_raw WHERE endpoint = "
+                     "(SELECT id FROM endpoints WHERE name = ?) AND ts >= ? AND ts < ?")
+
+        def from_raw(name, start, end):
+            """Считает доступность по всем проверкам периода."""
+            return store._reader.execute(raw_query, (name, start, end)).fetchone()
+
+        for title, start, end in (("месяц", since, until), \
+                                  ("месяц, края не по часам", since + 1234.5, until - 77.25)):
+            rollup = best_time(store.availability, "service-7", start, end)
+            raw = best_time(from_raw, "service-7", start, end)
+            print(f"{title:>24}: свертки {rollup * 1000:.2f} мс, "
+                  f"все проверки {raw * 1000:.2f} мс")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
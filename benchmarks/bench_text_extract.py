@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_text_extract.py - Сравнение экстракторов текста из ответа
+
+Запуск из корня проекта:
+    python benchmarks/bench_text_extract.py
+"""
+
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# pylint: disable=wrong-import-position
+from monitor.text_extract import (
+    DEFAULT_MAX_TEXT_CHARS, extract_html_bs4, extract_html_fast, extract_json, extract_plain
+)
+
+ERROR_PAGE = (
+    "<html><head><title>502 Bad Gateway</title></head><body>"
+    "<center><h1>502 Bad Gateway</h1></center><hr><center>nginx</center></body></html>"
+)
+
+BIG_PAGE = (
+    "<!DOCTYPE html><html><head><title>Портал</title>"
+    "<style>" + "td { padding: 1px; }" * 500 + "</style>"
+    "<script>" + "var a = 1;" * 2000 + "</script></head><body>"
+    + "<div class='row'><a href='/x'>Ссылка</a><span>Описание элемента списка</span></div>" * 20000
+    + "</body></html>"
+)
+
+JSON_BODY = json.dumps({"status": "error", "items": [{"id": i, "state": "down"} \
+                                                      for i in range(5000)]})
+
+PLAIN_BODY = "Service Unavailable\n" * 5000
+
+CASES = [
+    ("html: страница ошибки nginx", ERROR_PAGE, [("fast", extract_html_fast), \
+                                                 ("bs4", extract_html_bs4)]),
+    (f"html: {len(BIG_PAGE) // 1024} КБ", BIG_PAGE, [("fast", extract_html_fast), \
+                                                       ("bs4", extract_html_bs4)]),
+    (f"json: {len(JSON_BODY) // 1024} КБ", JSON_BODY, [("json", extract_json)]),
+    (f"plain: {len(PLAIN_BODY) // 1024} КБ", PLAIN_BODY, [("text", extract_plain)]),
+]
+
+
+def bench(func, body, repeat=5):
+    """Возвращает лучшее время одного вызова в миллисекундах."""
+    timer = timeit.Timer(lambda: func(body, DEFAULT_MAX_TEXT_CHARS))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1000
+
+
+def main():
+    """Выводит таблицу времени извлечения текста."""
+    print(f"{'Тело ответа':<32}{'экстрактор':<12}{'мс/вызов':>10}")
+    for title, body, extractors in CASES:
+        for name, func in extractors:
+            print(f"{title:<32}{name:<12}{bench(func, body):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,7 @@
 import json
 import os
 from pathlib import Path
-from jsonschema import validate
+from monitor.config import ConfigLoader
 
 def check_files():
     """Проверяет наличие необходимых файлов"""
@@ -32,15 +32,9 @@ def check_files():
         return True
 
 def validate_config():
-    """Проверяет валидность config.json"""
+    """Проверяет валидность config.json (тем же загрузчиком, что и монитор)"""
     try:
-        with open("config.json", "r", encoding="utf-8") as f:
-            config = json.load(f)
-        
-        with open("monitor/config_schema.json", "r", encoding="utf-8") as f:
-            schema = json.load(f)
-        
-        validate(instance=config, schema=schema)
+        ConfigLoader().load_config()
         print("✅ config.json валиден")
         return True
     except Exception as e:
@@ -7,7 +7,15 @@ from monitor.logger import setup_logger
 from monitor.incident_manager import IncidentManager
 from monitor.telegram_notifier import TelegramNotifier
 from monitor.httpendpoint import HttpEndpoint
-from monitor.monitor_thread import MonitorThread
+from monitor.http_pool import get_session_pool
+from monitor.metrics import MetricsServer, get_metrics, \
+    DEFAULT_METRICS_HOST, DEFAULT_METRICS_PORT
+from monitor.probe_runner import ProbeSet
+from monitor.probe_store import start_probe_store
+from monitor.reload import ConfigReloader
+from monitor.sharding import ShardCoordinator
+from monitor.cluster import ClusterNode, LeaseStore, \
+    DEFAULT_LEASE_TTL, DEFAULT_REPLICAS, DEFAULT_STORE_PATH
 
 def main():
     """
@@ -17,6 +25,8 @@ def main():
     threads = []
     notifier = None
     logger = None
+    incidents = None
+    probe_store = None
 
     try:
         os.makedirs("logs", exist_ok=True)
@@ -27,35 +37,111 @@ def main():
         logger.info("Запуск монитора...")
 
         # Срздаем экземпляр IncidentManager для управления инцидентами
-        incidents = IncidentManager()
+        incidents = IncidentManager(**config_loader.get_journal(), logger=logger)
         # Создаем экземпляр TelegramNotifier для отправки уведомлений в Telegram
         if "--test" not in sys.argv:
             notifier = TelegramNotifier(
                 token=config_loader.get_telegram_token(),
                 users=config_loader.get_users(),
                 incidents=incidents,
-                logger=logger
+                logger=logger,
+                notifications=config_loader.get_notifications()
         )
         # Установить уведомитель в менеджер инцидентов
         # Это позволяет менеджеру инцидентов отправлять уведомления через указанный уведомитель
         incidents.set_notifier(notifier)
 
-        # Получить список ресурсов из конфигурации и запустить потоки мониторинга
-        endpoints = []
+        # Страница /metrics для Prometheus (если задана в конфигурации)
+        metrics = config_loader.get_metrics()
+        if metrics is not None:
+            incidents.register_metrics(get_metrics())
+            if notifier:
+                notifier.dispatcher.register_metrics(get_metrics())
+            server = MetricsServer(get_metrics(), metrics.get("host", DEFAULT_METRICS_HOST), \
+                                   metrics.get("port", DEFAULT_METRICS_PORT), logger, \
+                                   incidents.get_all_endpoints)
+            server.start()
+            threads.append(server)
+
+        # Настроить общий пул HTTP-соединений
+        get_session_pool().configure(**config_loader.get_http_pool())
+
+        # Хранилище результатов проверок (если задано в конфигурации);
+        # процессы опроса открывают его сами, здесь оно нужно для запросов бота
+        store_settings = config_loader.get_probe_store()
+        if store_settings is not None:
+            probe_store = start_probe_store(store_settings, logger)
+            if metrics is not None:
+                probe_store.register_metrics(get_metrics())
+
+        # Получить список ресурсов из конфигурации
         resources = config_loader.get_resources()
-        for resource_config in resources:
-            if "--test" in sys.argv:
-                resource_config["check_interval"] = 1
-                resource_config["retry_interval"] = 1
-            # Создать экземпляр HttpEndpoint и MonitorThread для каждого ресурса
-            endpoint = HttpEndpoint(resource_config)
-            endpoints.append(endpoint)
-            thread = MonitorThread(endpoint, resource_config, logger, incidents)
-            thread.start()
-            threads.append(thread)
+        test_overrides = {"check_interval": 1, "retry_interval": 1} \
+            if "--test" in sys.argv else {}
+        resources = [{**resource_config, **test_overrides} for resource_config in resources]
+
+        # Запустить опрос: в одном процессе или в нескольких процессах опроса
+        shards = config_loader.get_shards()
+        cluster = config_loader.get_cluster()
+        if cluster is not None:
+            # Несколько узлов делят точки по консистентному хэшу через общее хранилище
+            store = LeaseStore(cluster.get("store", DEFAULT_STORE_PATH), \
+                               cluster.get("node_id"), \
+                               cluster.get("lease_ttl", DEFAULT_LEASE_TTL))
+            incidents.set_claims(store)
+            # Точки, которые опрашивает другой узел, показываются без истории проверок
+            placeholders = {resource_config["name"]: HttpEndpoint(resource_config) \
+                            for resource_config in resources}
+
+            # Опрос точек узла переживает перераспределение: точки, оставшиеся у узла,
+            # сохраняют состояние, а открытые при запуске инциденты ждут восстановления
+            probes = ProbeSet(logger, incidents, config_loader.get_engine(), \
+                              config_loader.get_max_concurrency(), \
+                              config_loader.get_probe_jitter(), \
+                              active=incidents.get_active_map())
+
+            def apply_owned(owned):
+                """Приводит опрос к точкам узла и показывает их вместо заглушек."""
+                probes.apply(owned)
+                current = dict(placeholders)
+                current.update((endpoint.get_name(), endpoint) for endpoint in probes.endpoints())
+                incidents.set_endpoints(list(current.values()))
+
+            node = ClusterNode(store, resources, apply_owned, incidents, logger, \
+                               cluster.get("replicas", DEFAULT_REPLICAS))
+            incidents.set_endpoints(list(placeholders.values()))
+            node.start()
+            threads.append(node)
+            threads.append(probes)
+            # Точки устанавливает узел при каждом перераспределении
+            endpoints = None
+        elif shards > 1:
+            coordinator = ShardCoordinator(resources, shards, incidents, logger, \
+                                           config_loader.get_engine(), \
+                                           config_loader.get_max_concurrency(), \
+                                           config_loader.get_probe_jitter(), \
+                                           config_loader.get_http_pool(), \
+                                           log_level=config_loader.get_log_level(), \
+                                           probe_store=store_settings)
+            coordinator.start()
+            threads.append(coordinator)
+            endpoints = coordinator.endpoints()
+        else:
+            probes = ProbeSet(logger, incidents, config_loader.get_engine(), \
+                              config_loader.get_max_concurrency(), \
+                              config_loader.get_probe_jitter())
+            probes.apply(resources)
+            threads.append(probes)
+            endpoints = probes.endpoints()
+            # Перечитывание ресурсов по SIGHUP и командой /reload
+            reloader = ConfigReloader(probes, incidents, logger, test_overrides)
+            reloader.install_signal_handler()
+            if notifier:
+                notifier.set_reloader(reloader.reload)
 
         # Установить все точки мониторинга в менеджер инцидентов
-        incidents.set_endpoints(endpoints)
+        if endpoints is not None:
+            incidents.set_endpoints(endpoints)
 
         # Запустить уведомитель, если не в тестовом режиме
         # Если в тестовом режиме, пропустить запуск уведомителя
@@ -73,7 +159,15 @@ def main():
         for thread in threads:
             thread.join()
 
+        # Запись оставшихся проверок в хранилище
+        if probe_store:
+            probe_store.stop()
+
+        if incidents:
+            incidents.close()
+
         if logger:
+            logger.info("Статистика пула соединений: %s", get_session_pool().stats.totals())
             logger.info("Монитор завершил работу.")
 
 if __name__ == "__main__":
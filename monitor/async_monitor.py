@@ -0,0 +1,240 @@
+"""monitor/async_monitor.py - Асинхронный движок мониторинга точек"""
+
+import asyncio
+import threading
+import logging
+from typing import Dict, Optional, Set, Tuple
+import httpx
+from monitor.incident_manager import IncidentManager
+from monitor.metrics import get_metrics
+from monitor.probe_timing import last_timing
+from monitor.probe_rate import ProbeCounter, get_probe_rates
+from monitor.probe_state import AdaptiveInterval
+
+class AsyncMonitor(threading.Thread):
+    """
+    Движок мониторинга на asyncio.
+    Все точки опрашиваются корутинами в одном цикле событий (в отдельном потоке),
+    число одновременно выполняемых проверок ограничено семафором.
+    Логика подтверждения сбоя и восстановления совпадает с MonitorThread.
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None, \
+                 incidents: Optional[IncidentManager] = None, \
+                 max_concurrency: int = 100):
+        super().__init__(daemon=True, name="AsyncMonitor")
+        self.logger = logger or logging.getLogger(__name__)
+        self.incidents = incidents
+        self.max_concurrency = max_concurrency
+        # Точки по имени: (точка, конфигурация, адаптивный интервал)
+        self._targets: Dict[str, Tuple[object, dict, AdaptiveInterval]] = {}
+        self._counters: Dict[str, ProbeCounter] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # Точки, опрос которых начинается с открытым инцидентом
+        self._restored: Set[str] = set()
+
+        self._stop_requested = threading.Event()
+        self._stop_event: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._lag = get_metrics().histogram("ct_probe_lag_seconds", \
+                                            "Опоздание начала проверки относительно плана", \
+                                            engine="asyncio")
+
+    def add(self, endpoint, resource_config: dict, in_incident: bool = False):
+        """
+        Добавляет точку мониторинга (до или после запуска движка).
+
+        :param endpoint: точка мониторинга
+        :param resource_config: конфигурация ресурса (интервалы и число попыток)
+        :param in_incident: инцидент точки уже открыт (опрос ждет восстановления)
+        """
+        name = endpoint.get_name()
+        if in_incident:
+            self._restored.add(name)
+        self._targets[name] = (endpoint, resource_config, AdaptiveInterval(resource_config))
+        self._counters[name] = get_probe_rates().counter(name, resource_config['retry_interval'])
+        self._call_in_loop(self._start_task, name)
+
+    def remove(self, name: str):
+        """Исключает точку из мониторинга и отменяет ее опрос."""
+        if self._targets.pop(name, None) is not None:
+            self._call_in_loop(self._cancel_task, name)
+
+    def update(self, endpoint, resource_config: dict):
+        """
+        Применяет новую конфигурацию точки без перезапуска ее опроса:
+        состояние инцидента сохраняется, новые параметры действуют со следующей проверки.
+        """
+        name = endpoint.get_name()
+        if name not in self._targets:
+            self.add(endpoint, resource_config)
+            return
+        self._targets[name] = (endpoint, resource_config, AdaptiveInterval(resource_config))
+        self._counters[name].retry_interval = resource_config['retry_interval']
+
+    def stop(self):
+        """Останавливает движок мониторинга."""
+        self._stop_requested.set()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+
+    def run(self):
+        """Запускает цикл событий и опрос всех точек."""
+        self.logger.info("Асинхронный движок запущен: %d точек, параллельно до %d", \
+                         len(self._targets), self.max_concurrency)
+        try:
+            asyncio.run(self._main())
+        except Exception as e:
+            self.logger.error("Ошибка в асинхронном движке: %s", e)
+        finally:
+            self.logger.info("Асинхронный движок завершён")
+
+    async def _main(self):
+        """Создает задачи опроса и ждет сигнала остановки."""
+        self._stop_event = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._loop = asyncio.get_running_loop()
+        if self._stop_requested.is_set():
+            self._stop_event.set()
+
+        limits = httpx.Limits(max_connections=self.max_concurrency, \
+                              max_keepalive_connections=self.max_concurrency)
+        async with httpx.AsyncClient(limits=limits, follow_redirects=True) as client:
+            self._client = client
+            for name in list(self._targets):
+                self._start_task(name)
+            await self._stop_event.wait()
+            tasks = list(self._tasks.values())
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _call_in_loop(self, callback, name: str):
+        """Выполняет callback(name) в цикле событий, если движок уже запущен."""
+        if self._loop is not None and self._client is not None:
+            try:
+                self._loop.call_soon_threadsafe(callback, name)
+            except RuntimeError:
+                pass  # цикл событий уже закрыт
+
+    def _start_task(self, name: str):
+        """Запускает опрос точки, если он еще не запущен."""
+        task = self._tasks.get(name)
+        if name in self._targets and (task is None or task.done()):
+            self._tasks[name] = asyncio.create_task(self._watch(name))
+
+    def _cancel_task(self, name: str):
+        """Отменяет опрос точки."""
+        task = self._tasks.pop(name, None)
+        if task is not None:
+            task.cancel()
+
+    async def _watch(self, name: str):
+        """
+        Основной цикл опроса одной точки (аналог MonitorThread.run).
+        Точка и ее настройки перечитываются на каждой итерации, чтобы
+        изменения конфигурации применялись без перезапуска опроса.
+        """
+        in_incident = name in self._restored
+        self._restored.discard(name)
+
+        self.logger.debug("Опрос %s запущен", name)
+        try:
+            while not self._stop_event.is_set() and name in self._targets:
+                endpoint, resource_config, interval = self._targets[name]
+                retry_interval = resource_config['retry_interval']
+                max_attempts = resource_config['max_attempts']
+                status, code, resp = await self._probe(endpoint)
+
+                if not in_incident and not status:
+                    self.logger.warning("%s — ошибка %s, %s. Начинаем повторные попытки...", \
+                                        name, code, resp)
+                    if await self._check_stability(endpoint, False, max_attempts, retry_interval):
+                        self.logger.warning("%s — подтвержденный сбой. Открываем инцидент.", \
+                                            name)
+                        in_incident = True
+                        if self.incidents:
+                            await asyncio.to_thread(self.incidents.register_incident, \
+                                                    name, code, resp, last_timing(endpoint))
+
+                elif in_incident and status:
+                    self.logger.info("%s — получен ответ %s, %s. Проверка восстановления...", \
+                                     name, code, resp)
+                    if await self._check_stability(endpoint, True, max_attempts, retry_interval):
+                        self.logger.warning("%s — инцидент закрыт. Устойчивое восстановление.", \
+                                            name)
+                        in_incident = False
+                        if self.incidents:
+                            await asyncio.to_thread(self.incidents.resolve_incident, name)
+
+                else:
+                    self.logger.debug("%s — стабильное состояние: код %s", name, code)
+
+                if not in_incident and status:
+                    await self._sleep(interval.stable())
+                else:
+                    await self._sleep(interval.suspect())
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.logger.error("%s — ошибка в опросе: %s", name, e)
+        finally:
+            self.logger.debug("Опрос %s завершён", name)
+
+    async def _check_stability(self, endpoint, expected: bool, \
+                               max_attempts: int, retry_interval: float) -> bool:
+        """
+        Проверяет устойчивость состояния (аналог MonitorThread._check_stability).
+
+        :param endpoint: точка мониторинга
+        :param expected: ожидаемое состояние (True для восстановления, False для ошибки)
+        :param max_attempts: число подряд идущих подтверждений
+        :param retry_interval: пауза между попытками
+        :return: True, если устойчивость подтверждена
+        """
+        name = endpoint.get_name()
+        success_count = 0
+        for attempt in range(max_attempts):
+            if self._stop_event.is_set():
+                return False
+
+            status, code, _ = await self._probe(endpoint)
+            self.logger.debug("%s — попытка %d: код %s, ожидаем %s", \
+                              name, attempt + 1, code, expected)
+
+            if status == expected:
+                success_count += 1
+            else:
+                success_count = 0
+
+            if success_count >= max_attempts:
+                self.logger.debug("%s — устойчивое состояние достигнуто (%s)", name, expected)
+                return True
+
+            await self._sleep(retry_interval)
+
+        self.logger.debug("%s — устойчивое состояние НЕ достигнуто (%s)", name, expected)
+        return False
+
+    async def _probe(self, endpoint) -> Tuple[bool, int, str]:
+        """
+        Выполняет одну проверку точки с учетом ограничения параллельности.
+        Точки без асинхронной проверки опрашиваются в пуле потоков.
+        """
+        self._counters[endpoint.get_name()].record()
+        async with self._semaphore:
+            check_async = getattr(endpoint, "check_status_async", None)
+            if check_async is not None:
+                return await check_async(self._client)
+            return await asyncio.to_thread(endpoint.check_status)
+
+    async def _sleep(self, seconds: float):
+        """Пауза с досрочным выходом при остановке движка."""
+        planned = self._loop.time() + seconds
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            # Опоздание пробуждения: цикл событий занят другими корутинами
+            self._lag.observe(max(self._loop.time() - planned, 0.0))
@@ -0,0 +1,105 @@
+"""monitor/body_store.py - Хранилище тел ответов по хэшу содержимого"""
+
+import hashlib
+import os
+import re
+import tempfile
+import zlib
+from typing import Iterable, Optional
+
+# Срок хранения тела после последнего сохранения (сутки)
+DEFAULT_BODY_DAYS = 30
+# Как часто удаляются устаревшие тела (секунды)
+PURGE_INTERVAL = 3600
+# Хэш тела ответа: blake2b, 16 байт в шестнадцатеричном виде
+_KEY = re.compile(r"[0-9a-f]{32}")
+
+
+def body_key(text: str) -> str:
+    """Возвращает ключ (хэш содержимого) тела ответа."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class BodyStore:
+    """
+    Хранилище тел ответов с адресацией по содержимому.
+
+    Тело сжимается zlib и записывается в файл <каталог>/<2 символа ключа>/<ключ>.z
+    один раз: одинаковые страницы ошибок разных ресурсов хранятся в одной копии,
+    а записи журнала ссылаются на тело по ключу. Файл пишется во временный файл
+    и переименовывается, поэтому читатель не видит недописанное тело.
+    Время изменения файла обновляется при каждом сохранении того же тела,
+    поэтому purge удаляет только тела, на которые давно не ссылались новые инциденты.
+    """
+
+    def __init__(self, directory: str, level: int = 6):
+        """
+        :param directory: каталог хранилища
+        :param level: уровень сжатия zlib (1-9)
+        """
+        self.directory = directory
+        self.level = level
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        """Возвращает путь к файлу тела."""
+        return os.path.join(self.directory, key[:2], key + ".z")
+
+    def put(self, text: str) -> str:
+        """
+        Сохраняет тело ответа, если такого еще нет.
+
+        :return: ключ тела
+        """
+        key = body_key(text)
+        path = self._path(key)
+        if os.path.exists(path):
+            os.utime(path)
+            return key
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(zlib.compress(text.encode("utf-8"), self.level))
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return key
+
+    def purge(self, older_than: float, keep: Iterable[str] = ()) -> int:
+        """
+        Удаляет тела (и недописанные временные файлы), не изменявшиеся с older_than.
+
+        :param older_than: граница в секундах эпохи
+        :param keep: ключи тел, которые нужно сохранить (тела активных инцидентов)
+        :return: число удаленных файлов
+        """
+        keep = set(keep)
+        removed = 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                if os.path.splitext(name)[0] in keep:
+                    continue
+                try:
+                    if os.path.getmtime(path) < older_than:
+                        os.unlink(path)
+                        removed += 1
+                except OSError:
+                    continue
+        return removed
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Возвращает тело ответа по ключу.
+
+        :return: текст или None, если тела нет или файл поврежден
+        """
+        if not _KEY.fullmatch(key or ""):
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                return zlib.decompress(f.read()).decode("utf-8")
+        except (OSError, zlib.error, UnicodeDecodeError):
+            return None
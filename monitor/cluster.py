@@ -0,0 +1,225 @@
+"""monitor/cluster.py - Совместный опрос одного набора точек несколькими узлами"""
+
+import bisect
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, List, Optional, Set
+from monitor.sharding import stable_hash
+
+# Время жизни аренды узла без продления (секунды)
+DEFAULT_LEASE_TTL = 15.0
+# Число виртуальных точек узла на кольце
+DEFAULT_REPLICAS = 64
+# Файл общего хранилища аренды по умолчанию
+DEFAULT_STORE_PATH = "logs/cluster.sqlite"
+
+
+def default_node_id() -> str:
+    """Возвращает идентификатор узла по умолчанию: имя хоста и PID."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class HashRing:
+    """
+    Консистентное хэширование: каждый узел занимает replicas точек на кольце,
+    точка мониторинга принадлежит первому узлу по часовой стрелке от хэша ее имени.
+    При уходе узла переезжают только его точки, остальные остаются на месте.
+    """
+
+    def __init__(self, nodes: Iterable[str], replicas: int = DEFAULT_REPLICAS):
+        """
+        :param nodes: идентификаторы живых узлов
+        :param replicas: число виртуальных точек на узел
+        """
+        points = sorted((stable_hash(f"{node}#{i}"), node) \
+                        for node in set(nodes) for i in range(replicas))
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def owner(self, name: str) -> Optional[str]:
+        """Возвращает узел, отвечающий за точку (None, если узлов нет)."""
+        if not self._nodes:
+            return None
+        index = bisect.bisect(self._hashes, stable_hash(name)) % len(self._hashes)
+        return self._nodes[index]
+
+
+class LeaseStore:
+    """
+    Общее хранилище узлов и инцидентов в файле SQLite (локальная замена
+    сервису координации). Узел продлевает аренду вызовом heartbeat(); узел, не
+    продливший аренду за ttl секунд, считается выбывшим. Таблица incidents
+    фиксирует, какой узел открыл инцидент, чтобы о нем уведомили один раз.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, node_id: Optional[str] = None, \
+                 ttl: float = DEFAULT_LEASE_TTL):
+        """
+        :param path: путь к файлу SQLite, общему для всех узлов
+        :param node_id: идентификатор этого узла
+        :param ttl: время жизни аренды (секунды)
+        """
+        self.path = path
+        self.node_id = node_id or default_node_id()
+        self.ttl = ttl
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, isolation_level=None, \
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS nodes "
+                           "(node_id TEXT PRIMARY KEY, expires REAL NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS incidents "
+                           "(resource_name TEXT PRIMARY KEY, node_id TEXT NOT NULL, "
+                           "opened REAL NOT NULL)")
+
+    @contextmanager
+    def _transaction(self):
+        """Выполняет операции в одной транзакции с блокировкой записи."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def heartbeat(self):
+        """Продлевает аренду этого узла."""
+        with self._transaction() as conn:
+            conn.execute("INSERT INTO nodes (node_id, expires) VALUES (?, ?) "
+                         "ON CONFLICT(node_id) DO UPDATE SET expires = excluded.expires", \
+                         (self.node_id, time.time() + self.ttl))
+
+    def live_nodes(self) -> List[str]:
+        """Возвращает узлы с действующей арендой и удаляет просроченные."""
+        with self._transaction() as conn:
+            now = time.time()
+            conn.execute("DELETE FROM nodes WHERE expires <= ?", (now,))
+            rows = conn.execute("SELECT node_id FROM nodes ORDER BY node_id").fetchall()
+        return [row[0] for row in rows]
+
+    def leave(self):
+        """Снимает аренду этого узла (при штатной остановке)."""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM nodes WHERE node_id = ?", (self.node_id,))
+
+    def claim_incident(self, resource_name: str) -> bool:
+        """
+        Закрепляет открытие инцидента за этим узлом.
+
+        :return: True, если инцидент открыт впервые (нужно уведомить);
+                 False, если его уже открыл другой узел (инцидент перенимается)
+        """
+        with self._transaction() as conn:
+            row = conn.execute("SELECT node_id FROM incidents WHERE resource_name = ?", \
+                               (resource_name,)).fetchone()
+            if row is None:
+                conn.execute("INSERT INTO incidents (resource_name, node_id, opened) "
+                             "VALUES (?, ?, ?)", (resource_name, self.node_id, time.time()))
+                return True
+            conn.execute("UPDATE incidents SET node_id = ? WHERE resource_name = ?", \
+                         (self.node_id, resource_name))
+            return False
+
+    def release_incident(self, resource_name: str) -> bool:
+        """
+        Снимает отметку об открытом инциденте.
+
+        :return: True, если отметка была (нужно уведомить о восстановлении)
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute("DELETE FROM incidents WHERE resource_name = ?", \
+                                  (resource_name,))
+            return cursor.rowcount == 1
+
+    def close(self):
+        """Закрывает соединение с хранилищем."""
+        with self._lock:
+            self._conn.close()
+
+
+class ClusterNode(threading.Thread):
+    """
+    Узел кластера мониторинга.
+    Периодически продлевает аренду в LeaseStore, строит кольцо из живых узлов
+    и опрашивает только свои точки. При изменении состава узлов опрос приводится
+    к новому набору точек: запускаются и останавливаются только точки, сменившие
+    владельца, а остальные продолжают опрос с прежним состоянием (в том числе
+    с открытым инцидентом). Инциденты по ушедшим точкам передаются новому
+    владельцу (закрываются локально без уведомления).
+    """
+
+    def __init__(self, store: LeaseStore, resources: List[dict], \
+                 apply: Callable[[List[dict]], object], \
+                 incidents=None, logger: Optional[logging.Logger] = None, \
+                 replicas: int = DEFAULT_REPLICAS):
+        """
+        :param store: хранилище аренды
+        :param resources: конфигурации всех ресурсов (общие для всех узлов)
+        :param apply: функция, приводящая опрос к набору ресурсов узла (ProbeSet.apply);
+                      опрос останавливает его владелец
+        :param incidents: менеджер инцидентов этого узла
+        :param logger: логгер
+        :param replicas: число виртуальных точек узла на кольце
+        """
+        super().__init__(daemon=True, name="ClusterNode")
+        self.store = store
+        self.resources = resources
+        self.apply = apply
+        self.incidents = incidents
+        self.logger = logger or logging.getLogger(__name__)
+        self.replicas = replicas
+        self.owned: Set[str] = set()
+        self._nodes: List[str] = []
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        """Останавливает узел."""
+        self._stop_event.set()
+
+    def run(self):
+        """Цикл продления аренды и перераспределения точек."""
+        self.logger.info("Узел кластера %s запущен", self.store.node_id)
+        interval = self.store.ttl / 3
+        try:
+            while True:
+                try:
+                    self.store.heartbeat()
+                    nodes = self.store.live_nodes()
+                    if nodes != self._nodes:
+                        self._rebalance(nodes)
+                except sqlite3.Error as e:
+                    self.logger.error("Ошибка хранилища кластера: %s", e)
+                if self._stop_event.wait(interval):
+                    break
+        finally:
+            try:
+                self.store.leave()
+            except sqlite3.Error as e:
+                self.logger.error("Ошибка снятия аренды узла: %s", e)
+            self.logger.info("Узел кластера %s завершён", self.store.node_id)
+
+    def _rebalance(self, nodes: List[str]):
+        """Пересчитывает свои точки и приводит к ним опрос, если набор изменился."""
+        self._nodes = nodes
+        ring = HashRing(nodes, self.replicas)
+        mine = [r for r in self.resources if ring.owner(r["name"]) == self.store.node_id]
+        owned = {r["name"] for r in mine}
+        self.logger.info("Узлы кластера: %s; точек у узла %s: %d", \
+                         nodes, self.store.node_id, len(owned))
+        if owned == self.owned:
+            return
+        self.apply(mine)
+        if self.incidents:
+            for name in self.owned - owned:
+                self.incidents.handoff_incident(name)
+        self.owned = owned
@@ -3,16 +3,20 @@
 import json
 from pathlib import Path
 from typing import Any, Dict, Optional
-from jsonschema import validate, ValidationError
+from jsonschema import SchemaError, ValidationError
+from monitor.resource_includes import IncludeError, load_resources
+from monitor.schema import parse_json, validate_data
 
 # Значения по умолчанию для путей к конфигурационным файлам
 DEFAULT_CONFIG_PATH = Path("config.json")
 DEFAULT_SECRETS_PATH = Path(".secrets.json")
 DEFAULT_SCHEMA_PATH = Path("monitor/config_schema.json")
 
+
 class ConfigError(Exception):
     """Исключение, выбрасываемое при ошибке загрузки или валидации конфигурации."""
 
+
 class ConfigLoader:
     """
     Класс для загрузки и валидации конфигурационных файлов проекта:
@@ -36,9 +40,35 @@ class ConfigLoader:
         :param secrets_path: путь к .secrets.json
         :param schema_path: путь к схеме config_schema.json (опционально)
         """
-        self.config = self._load_json(config_path, schema_path=schema_path)
+        self.load_config(config_path, schema_path)
         self.secrets = self._load_json(secrets_path)
 
+    def load_config(self, config_path: Path = DEFAULT_CONFIG_PATH, \
+                    schema_path: Optional[Path] = DEFAULT_SCHEMA_PATH):
+        """
+        Загружает и валидирует только основную конфигурацию (без секретов).
+        Ресурсы из файлов resource_includes добавляются после ресурсов config.json.
+
+        :param config_path: путь к config.json
+        :param schema_path: путь к схеме config_schema.json (опционально)
+        :raises ConfigError: если конфигурация некорректна или имена ресурсов повторяются
+        """
+        config = self._load_json(config_path, schema_path=schema_path)
+        includes = config.get("resource_includes")
+        if includes:
+            try:
+                included = load_resources(includes, Path(config_path).parent, schema_path)
+            except IncludeError as e:
+                raise ConfigError(str(e)) from e
+            config["resources"] = config.get("resources", []) + included
+
+        names = set()
+        for resource_config in config.get("resources", []):
+            if resource_config["name"] in names:
+                raise ConfigError(f"Повторяющееся имя ресурса: {resource_config['name']}")
+            names.add(resource_config["name"])
+        self.config = config
+
     def _load_json(self, path: Path, schema_path: Path = None) -> Dict[str, Any]:
         """
         Загружает JSON-файл и валидирует его при наличии схемы.
@@ -52,17 +82,14 @@ class ConfigLoader:
             raise ConfigError(f"Файл не найден: {path}")
 
         try:
-            with path.open("r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = parse_json(path.read_bytes())
         except json.JSONDecodeError as e:
             raise ConfigError(f"Ошибка парсинга JSON в {path}: {e}") from e
 
         if schema_path:
             try:
-                with schema_path.open("r", encoding="utf-8") as s:
-                    schema = json.load(s)
-                validate(instance=data, schema=schema)
-            except (json.JSONDecodeError, ValidationError) as e:
+                validate_data(data, schema_path)
+            except (json.JSONDecodeError, ValidationError, SchemaError) as e:
                 raise ConfigError(f"Ошибка валидации {path} по схеме {schema_path}: {e}") from e
 
         return data
@@ -76,7 +103,7 @@ class ConfigLoader:
         return self.secrets.get("telegram_token", "")
 
     def get_resources(self) -> list:
-        """Возвращает список точек мониторинга."""
+        """Возвращает список точек мониторинга (включая ресурсы из resource_includes)."""
         return self.config.get("resources", [])
 
     def get_users(self) -> list:
@@ -86,3 +113,62 @@ class ConfigLoader:
     def get_log_level(self) -> str:
         """Возвращает уровень логирования (по умолчанию INFO)."""
         return self.config.get("log_level", "INFO")
+
+    def get_engine(self) -> str:
+        """Возвращает режим опроса: threads (по умолчанию), asyncio или scheduler."""
+        return self.config.get("engine", "threads")
+
+    def get_max_concurrency(self) -> int:
+        """
+        Возвращает предел одновременных проверок (по умолчанию 100):
+        семафор asyncio-движка или число исполнителей планировщика.
+        """
+        return self.config.get("max_concurrency", 100)
+
+    def get_probe_jitter(self) -> float:
+        """Возвращает долю случайного разброса интервалов планировщика (по умолчанию 0.1)."""
+        return self.config.get("probe_jitter", 0.1)
+
+    def get_shards(self) -> int:
+        """Возвращает число процессов опроса (1 — опрос в основном процессе)."""
+        return self.config.get("shards", 1)
+
+    def get_cluster(self) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает настройки кластера (node_id, store, lease_ttl, replicas)
+        или None, если узел работает один.
+        """
+        return self.config.get("cluster")
+
+    def get_journal(self) -> Dict[str, Any]:
+        """
+        Возвращает настройки журнала инцидентов (max_segment_bytes, snapshot_every,
+        writer, fsync, fsync_interval, batch_size, bodies, body_days). По умолчанию запись
+        фоновая, а тела ответов хранятся в logs/bodies.
+        """
+        return {"writer": "background", "bodies": "logs/bodies", **self.config.get("journal", {})}
+
+    def get_http_pool(self) -> Dict[str, int]:
+        """Возвращает настройки пула HTTP-соединений (pool_connections, pool_maxsize)."""
+        return self.config.get("http_pool", {})
+
+    def get_metrics(self) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает настройки страницы /metrics (host, port)
+        или None, если страница метрик отключена.
+        """
+        return self.config.get("metrics")
+
+    def get_probe_store(self) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает настройки хранилища проверок (path, raw_days, minute_days,
+        hour_days, batch_size, queue_size) или None, если история проверок не сохраняется.
+        """
+        return self.config.get("probe_store")
+
+    def get_notifications(self) -> Dict[str, Any]:
+        """
+        Возвращает настройки диспетчера уведомлений (queue_size, digest_window,
+        global_rate, chat_rate, chat_burst, max_retries).
+        """
+        return self.config.get("notifications", {})
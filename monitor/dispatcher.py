@@ -0,0 +1,351 @@
+"""monitor/dispatcher.py - Диспетчер уведомлений с ограничением частоты и сводками"""
+
+import asyncio
+import logging
+import threading
+import time
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+from telegram.error import RetryAfter, TelegramError
+from monitor.metrics import COUNTER, Histogram, MetricsRegistry
+from monitor.status_report import TELEGRAM_MESSAGE_LIMIT
+
+# Ограничения Telegram: около 30 сообщений в секунду на бота и 1 в секунду на чат
+DEFAULT_GLOBAL_RATE = 25.0
+DEFAULT_CHAT_RATE = 1.0
+# Допустимая пачка сообщений в один чат без ожидания
+DEFAULT_CHAT_BURST = 3
+# Окно объединения событий в сводку (секунды)
+DEFAULT_DIGEST_WINDOW = 2.0
+# Максимальное число событий, ожидающих рассылки
+DEFAULT_QUEUE_SIZE = 1000
+# Число повторов отправки после RetryAfter
+DEFAULT_MAX_RETRIES = 3
+
+
+def digest_pages(texts: List[str], limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[str]:
+    """
+    Разбивает сводку событий на сообщения не длиннее limit символов.
+    В отличие от отчета /status число сообщений не ограничено: в сводку
+    попадает каждое событие, а отправка идет с учетом ограничений частоты.
+
+    :param texts: тексты событий
+    :param limit: максимальная длина сообщения
+    :return: список текстов сообщений
+    """
+    reserve = 20  # место под отметку страницы «(N/M)»
+    budget = limit - reserve
+    header = f"📣 Сводка событий: {len(texts)}"
+    pages: List[List[str]] = [[header, ""]]
+    size = len(header) + 1
+    for text in texts:
+        text = text[:budget]
+        if size + len(text) + 1 > budget:
+            pages.append([])
+            size = 0
+        pages[-1].append(text)
+        size += len(text) + 1
+
+    if len(pages) == 1:
+        return ["\n".join(pages[0])]
+    return [f"({number}/{len(pages)})\n" + "\n".join(page) \
+            for number, page in enumerate(pages, start=1)]
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты «ведро токенов»: rate токенов в секунду, не более capacity.
+    reserve() списывает токен сразу (баланс может уйти в минус) и возвращает,
+    сколько ждать до его появления, поэтому ожидающие отправители встают в очередь,
+    а не опережают друг друга.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        :param rate: скорость пополнения (токенов в секунду)
+        :param capacity: максимальное число накопленных токенов
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """
+        Резервирует один токен.
+
+        :return: время ожидания в секундах (0 — токен доступен сразу)
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class Notification:
+    """
+    Событие для рассылки: вид, текст, получатели и время создания
+    (для измерения задержки от регистрации события до доставки).
+    """
+
+    def __init__(self, kind: str, text: str, recipients: Optional[Set[int]] = None):
+        """
+        :param kind: вид события (incident, recovery, info)
+        :param text: текст уведомления
+        :param recipients: ID чатов получателей (None — все пользователи)
+        """
+        self.kind = kind
+        self.text = text
+        self.recipients = recipients
+        self.created = time.monotonic()
+
+
+class NotificationDispatcher:
+    """
+    Рассылка уведомлений в цикле событий бота.
+
+    События помещаются в ограниченную очередь (при переполнении новые события
+    отбрасываются с записью в лог). Первое событие после паузы рассылается сразу,
+    а события, пришедшие во время рассылки или в течение digest_window после нее,
+    объединяются: каждый пользователь получает одно сообщение — само событие
+    или сводку по всем событиям окна. Отправка разным
+    пользователям идет параллельно с ограничением частоты на чат и на бота;
+    при RetryAfter отправка приостанавливается на указанное Telegram время.
+
+    Из других потоков события передаются через submit_threadsafe: событие
+    попадает в цикл событий без задержки через call_soon_threadsafe. События,
+    переданные до запуска цикла (инциденты, подтвержденные при старте опроса),
+    накапливаются и ставятся в очередь при start().
+    Задержка от создания события до доставки пользователю копится в гистограмме latency.
+    """
+
+    def __init__(self, send: Callable[[int, str], Awaitable], \
+                 recipients: Callable[[], List[int]], \
+                 logger: Optional[logging.Logger] = None, \
+                 queue_size: int = DEFAULT_QUEUE_SIZE, \
+                 digest_window: float = DEFAULT_DIGEST_WINDOW, \
+                 global_rate: float = DEFAULT_GLOBAL_RATE, \
+                 chat_rate: float = DEFAULT_CHAT_RATE, \
+                 chat_burst: int = DEFAULT_CHAT_BURST, \
+                 max_retries: int = DEFAULT_MAX_RETRIES):
+        """
+        :param send: корутина отправки сообщения send(chat_id, text)
+        :param recipients: функция, возвращающая ID всех получателей
+        :param logger: логгер
+        :param queue_size: максимальное число событий в очереди
+        :param digest_window: окно объединения событий в сводку (0 — без объединения)
+        :param global_rate: сообщений в секунду на бота
+        :param chat_rate: сообщений в секунду на один чат
+        :param chat_burst: сообщений в один чат без ожидания
+        :param max_retries: число повторов после RetryAfter
+        """
+        self.send = send
+        self.recipients = recipients
+        self.logger = logger or logging.getLogger(__name__)
+        self.queue_size = queue_size
+        self.digest_window = digest_window
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+
+        self.dropped = 0
+        self.sent = 0
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chats: Dict[int, TokenBucket] = {}
+        self._paused_until = 0.0
+        self.latency = Histogram()
+        self._queue: Optional[asyncio.Queue] = None
+        # События, собираемые в сводку (рассылаются и при остановке)
+        self._batch: List[Notification] = []
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # События из других потоков, переданные до запуска цикла событий
+        self._pending: List[Notification] = []
+        self._pending_lock = threading.Lock()
+
+    async def start(self):
+        """
+        Создает очередь, переносит в нее события, переданные до запуска,
+        и запускает обработчик в текущем цикле событий.
+        """
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._pending_lock:
+            self._loop = asyncio.get_running_loop()
+            pending, self._pending = self._pending, []
+        for notification in pending:
+            self.submit(notification)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Останавливает обработчик и рассылает события, оставшиеся в очереди."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        batch, self._batch = self._drain(self._batch), []
+        if batch:
+            await self._deliver(batch)
+
+    def submit(self, notification: Notification) -> bool:
+        """
+        Ставит событие в очередь. Вызывается из цикла событий бота.
+
+        :return: False, если очередь переполнена или диспетчер не запущен
+        """
+        if self._queue is None:
+            self.logger.warning("Диспетчер уведомлений не запущен — событие пропущено")
+            return False
+        try:
+            self._queue.put_nowait(notification)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            self.logger.warning("Очередь уведомлений переполнена — событие пропущено (%d)", \
+                                self.dropped)
+            return False
+
+    def submit_threadsafe(self, notification: Notification) -> bool:
+        """
+        Передает событие в цикл событий диспетчера из любого потока.
+        До запуска цикла событие откладывается до start().
+
+        :return: False, если событие отброшено (цикл событий закрыт
+                 или отложенных событий больше queue_size)
+        """
+        with self._pending_lock:
+            loop = self._loop
+            if loop is None:
+                if len(self._pending) >= self.queue_size:
+                    self.dropped += 1
+                    self.logger.warning("Очередь уведомлений переполнена — событие пропущено "
+                                        "(%d)", self.dropped)
+                    return False
+                self._pending.append(notification)
+                return True
+        if loop.is_closed():
+            self.logger.warning("Цикл событий уведомлений закрыт — событие пропущено")
+            return False
+        try:
+            loop.call_soon_threadsafe(self.submit, notification)
+            return True
+        except RuntimeError:
+            self.logger.warning("Цикл событий уведомлений закрыт — событие пропущено")
+            return False
+
+    def depth(self) -> int:
+        """Возвращает число событий, ожидающих рассылки."""
+        queued = self._queue.qsize() if self._queue is not None else 0
+        return queued + len(self._pending)
+
+    def register_metrics(self, registry: MetricsRegistry):
+        """Публикует глубину очереди, задержку доставки и счетчики сообщений."""
+        registry.register_callback("ct_notification_queue_depth", \
+                                   "Число событий, ожидающих рассылки", self.depth)
+        registry.register_histogram("ct_notification_latency_seconds", \
+                                    "Задержка от события до отправки уведомления", self.latency)
+        registry.register_callback("ct_notifications_sent_total", "Число отправленных сообщений", \
+                                   lambda: self.sent, COUNTER)
+        registry.register_callback("ct_notifications_dropped_total", \
+                                   "Число событий, отброшенных при переполнении очереди", \
+                                   lambda: self.dropped, COUNTER)
+
+    async def send_to(self, chat_id: int, text: str) -> bool:
+        """
+        Отправляет сообщение в чат с учетом ограничений частоты и RetryAfter.
+
+        :return: True, если сообщение отправлено
+        """
+        for _ in range(self.max_retries + 1):
+            await self._throttle(chat_id)
+            try:
+                await self.send(chat_id, text)
+                self.sent += 1
+                return True
+            except RetryAfter as e:
+                delay = e.retry_after
+                if isinstance(delay, timedelta):
+                    delay = delay.total_seconds()
+                self.logger.warning("Ограничение Telegram: пауза %s с", delay)
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            except TelegramError as e:
+                self.logger.warning("Ошибка при отправке уведомления в %s: %s", chat_id, e)
+                return False
+        self.logger.warning("Уведомление в %s не отправлено после %d повторов", \
+                            chat_id, self.max_retries)
+        return False
+
+    async def broadcast(self, text: str, recipients: Optional[Set[int]] = None):
+        """Параллельно отправляет одно сообщение всем получателям."""
+        chats = self.recipients() if recipients is None else recipients
+        await asyncio.gather(*(self.send_to(chat_id, text) for chat_id in chats))
+
+    async def _run(self):
+        """
+        Цикл обработки: событие, пришедшее после паузы, рассылается сразу;
+        события, пришедшие во время рассылки или в течение digest_window после нее,
+        собираются до конца окна и рассылаются сводкой.
+        """
+        loop = asyncio.get_running_loop()
+        quiet_after = 0.0
+        while True:
+            self._batch.append(await self._queue.get())
+            while True:
+                remaining = quiet_after - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    self._batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            batch, self._batch = self._drain(self._batch), []
+            try:
+                await self._deliver(batch)
+            except Exception as e:
+                self.logger.error("Ошибка рассылки уведомлений: %s", e)
+            quiet_after = loop.time() + self.digest_window
+
+    def _drain(self, batch: List[Notification]) -> List[Notification]:
+        """Добавляет к пачке все события, уже лежащие в очереди."""
+        while self._queue is not None and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _deliver(self, batch: List[Notification]):
+        """Рассылает пачку событий: каждому пользователю — его события одним сообщением."""
+        everyone = self.recipients()
+        per_chat: Dict[int, List[Notification]] = {}
+        for notification in batch:
+            chats = everyone if notification.recipients is None else notification.recipients
+            for chat_id in chats:
+                per_chat.setdefault(chat_id, []).append(notification)
+
+        await asyncio.gather(*(self._send_digest(chat_id, notifications) \
+                               for chat_id, notifications in per_chat.items()))
+
+    async def _send_digest(self, chat_id: int, notifications: List[Notification]):
+        """Отправляет пользователю одно событие или сводку по нескольким."""
+        texts = [notification.text for notification in notifications]
+        pages = texts if len(texts) == 1 else digest_pages(texts)
+        delivered = True
+        for page in pages:
+            delivered = await self.send_to(chat_id, page) and delivered
+        if delivered:
+            now = time.monotonic()
+            for notification in notifications:
+                self.latency.observe(now - notification.created)
+
+    async def _throttle(self, chat_id: int):
+        """Ждет паузы после RetryAfter и токенов чата и бота."""
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        delay = max(bucket.reserve(), self._global.reserve())
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -1,12 +1,14 @@
 """monitor/endpoint.py - Абстрактная точка мониторинга"""
 
 from abc import ABC, abstractmethod
-from typing import Tuple
+from typing import List, Tuple
 
 class Endpoint(ABC):
     """
     Абстрактный базовый класс для точки мониторинга.
     Все реализации должны предоставлять методы для проверки состояния и получения имени.
+    Реализация может добавить асинхронную проверку check_status_async(client);
+    без нее движок asyncio выполняет check_status в пуле потоков.
     """
 
     @abstractmethod
@@ -21,3 +23,9 @@ class Endpoint(ABC):
         """
         Возвращает уникальное имя точки мониторинга.
         """
+
+    def get_tags(self) -> List[str]:
+        """
+        Возвращает теги точки мониторинга (для группировки и фильтрации).
+        """
+        return []
@@ -0,0 +1,222 @@
+"""monitor/http_pool.py - Общий пул HTTP-соединений с keep-alive"""
+
+import socket
+import threading
+import time
+from collections import Counter
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError
+from monitor.probe_timing import current
+
+# Значения по умолчанию для размеров пула
+DEFAULT_POOL_CONNECTIONS = 100
+DEFAULT_POOL_MAXSIZE = 10
+
+
+class PoolStats:
+    """
+    Счетчики использования пула по хостам: число HTTP-запросов и новых соединений.
+    Разница между ними — запросы, выполненные по уже открытому соединению.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: Counter = Counter()
+        self._connections: Counter = Counter()
+
+    def on_request(self, host: str):
+        """Учитывает HTTP-запрос к хосту."""
+        with self._lock:
+            self._requests[host] += 1
+
+    def on_connect(self, host: str):
+        """Учитывает новое TCP (и TLS) соединение с хостом."""
+        with self._lock:
+            self._connections[host] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """
+        Возвращает счетчики по хостам.
+
+        :return: словарь {host: {"requests": n, "connections": m, "reused": n - m}}
+        """
+        with self._lock:
+            return {
+                host: {
+                    "requests": count,
+                    "connections": self._connections[host],
+                    "reused": max(count - self._connections[host], 0)
+                }
+                for host, count in self._requests.items()
+            }
+
+    def totals(self) -> Dict[str, int]:
+        """Возвращает суммарные счетчики по всем хостам."""
+        with self._lock:
+            requests_total = sum(self._requests.values())
+            connections_total = sum(self._connections.values())
+        return {
+            "requests": requests_total,
+            "connections": connections_total,
+            "reused": max(requests_total - connections_total, 0)
+        }
+
+
+class _CountingConnectionMixin:
+    """
+    Примесь к соединениям urllib3, учитывающая подключения и запросы в PoolStats.
+    Если в потоке идет проверка с записью времени (probe_timing.recording),
+    записывает время разрешения имени, TCP-подключения и TLS-рукопожатия.
+    """
+
+    stats: PoolStats = None
+
+    def connect(self):
+        """Открывает соединение и учитывает его."""
+        self.stats.on_connect(self.host)
+        timing = current()
+        if timing is None:
+            super().connect()
+            return
+        timing.reused = False
+        started = time.perf_counter()
+        network = timing.network()
+        try:
+            super().connect()
+        finally:
+            if isinstance(self, HTTPSConnection):
+                # Остаток времени подключения после DNS и TCP — TLS-рукопожатие
+                elapsed = time.perf_counter() - started
+                timing.tls += max(elapsed - (timing.network() - network), 0.0)
+
+    def _new_conn(self):
+        """
+        Открывает TCP-соединение. При записи времени имя разрешается отдельно,
+        чтобы разделить время DNS и подключения; адреса перебираются по порядку,
+        как в urllib3.
+        """
+        timing = current()
+        if timing is None:
+            return super()._new_conn()
+        started = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        finally:
+            timing.dns = (timing.dns or 0.0) + time.perf_counter() - started
+        resolved = time.perf_counter()
+        host = self._dns_host
+        try:
+            error = None
+            for address in dict.fromkeys(info[4][0] for info in addresses):
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except ConnectTimeoutError as e:
+                    error = e
+            raise error
+        finally:
+            self._dns_host = host
+            timing.connect += time.perf_counter() - resolved
+
+    def request(self, *args, **kwargs):
+        """Отправляет запрос и учитывает его."""
+        self.stats.on_request(self.host)
+        return super().request(*args, **kwargs)
+
+
+class _PooledAdapter(HTTPAdapter):
+    """
+    HTTPAdapter, пулы которого используют соединения с учетом статистики.
+    """
+
+    def __init__(self, stats: PoolStats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        http_conn = type("CountingHTTPConnection", \
+                         (_CountingConnectionMixin, HTTPConnection), {"stats": self.stats})
+        https_conn = type("CountingHTTPSConnection", \
+                          (_CountingConnectionMixin, HTTPSConnection), {"stats": self.stats})
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": type("CountingHTTPConnectionPool", \
+                         (HTTPConnectionPool,), {"ConnectionCls": http_conn}),
+            "https": type("CountingHTTPSConnectionPool", \
+                          (HTTPSConnectionPool,), {"ConnectionCls": https_conn}),
+        }
+
+
+class SessionPool:
+    """
+    Общая HTTP-сессия с пулом keep-alive соединений для каждого хоста.
+    Cookies не сохраняются, чтобы проверки не влияли друг на друга.
+    """
+
+    def __init__(self, pool_connections: int = DEFAULT_POOL_CONNECTIONS, \
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE):
+        """
+        :param pool_connections: число хостов, для которых кэшируются пулы
+        :param pool_maxsize: максимальное число соединений в пуле одного хоста
+        """
+        self.stats = PoolStats()
+        self.session = requests.Session()
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        self.configure(pool_connections, pool_maxsize)
+
+    def configure(self, pool_connections: int = DEFAULT_POOL_CONNECTIONS, \
+                  pool_maxsize: int = DEFAULT_POOL_MAXSIZE):
+        """
+        Пересоздает адаптеры сессии с новыми размерами пула.
+        Соединения прежних адаптеров закрываются.
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        adapter = _PooledAdapter(self.stats, pool_connections=pool_connections, \
+                                 pool_maxsize=pool_maxsize)
+        old = {id(a): a for a in (self.session.adapters.get("http://"), \
+                                  self.session.adapters.get("https://")) if a is not None}
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        for previous in old.values():
+            previous.close()
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Выполняет HTTP-запрос через общую сессию."""
+        return self.session.request(method, url, **kwargs)
+
+    def fresh_request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Выполняет HTTP-запрос по новому соединению (отдельная сессия без общего пула),
+        с тем же учетом подключений и времени этапов.
+        """
+        with requests.Session() as session:
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            adapter = _PooledAdapter(self.stats, pool_connections=1, pool_maxsize=1)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            return session.request(method, url, **kwargs)
+
+    def close(self):
+        """Закрывает все соединения пула."""
+        self.session.close()
+
+
+_default_pool: Optional[SessionPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_session_pool() -> SessionPool:
+    """Возвращает общий пул соединений процесса (создается при первом обращении)."""
+    global _default_pool  # pylint: disable=global-statement
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = SessionPool()
+        return _default_pool
@@ -1,25 +1,72 @@
 """monitor/httpendpoint.py - Реализация HTTP-точки мониторинга"""
 
-from typing import Tuple
+import time
+from typing import List, Optional, Tuple
 from urllib.parse import urlparse
 import requests
-from bs4 import BeautifulSoup
+import httpx
 from monitor.endpoint import Endpoint
+from monitor.text_extract import DEFAULT_MAX_TEXT_CHARS, extract_text
+from monitor.http_pool import SessionPool, get_session_pool
+from monitor.latency_slo import LatencySLO
+from monitor.metrics import get_metrics
+from monitor.probe_history import DEFAULT_HISTORY_SIZE, ProbeHistory
+from monitor.probe_store import get_probe_store
+from monitor.probe_timing import PHASES, PHASE_BUCKETS, DEFAULT_TIMING_HISTORY, \
+    ProbeTiming, TimingRing, get_timing_listener, recording
+
+# Размер блока при потоковом чтении тела ответа
+CHUNK_SIZE = 16384
+# Максимальный объем читаемого тела ответа по умолчанию (1 МБ)
+DEFAULT_MAX_BODY_BYTES = 1024 * 1024
+# Время ожидания подключения и ответа по умолчанию (секунды)
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 5
 
 
 class HttpEndpoint(Endpoint):
     """
     Конкретная реализация точки мониторинга по HTTP.
-    Выполняет HTTP-запросы и определяет доступность по статус-коду.
+    Выполняет HTTP-запросы и определяет доступность по статус-коду,
+    (необязательно) по наличию ожидаемого текста в ответе и по порогам
+    задержки ответа (latency_slo).
+    Тело ответа читается потоком не более max_body_bytes байт, а текст
+    из него извлекается только при сбое.
     """
 
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, pool: SessionPool = None):
+        """
+        :param config: конфигурация ресурса
+        :param pool: пул соединений (по умолчанию общий пул процесса)
+        """
         self.name = config["name"]
         self.url = config["url"]
         self.port = config.get("port", 80)
         self.method = config.get("method", "GET").upper()
         self.success_code = config.get("success_code", 200)
         self.error_code = config.get("error_code", 500)
+        self.tags = config.get("tags", [])
+        # Новое соединение на каждую проверку (для контроля TCP/TLS-рукопожатия)
+        self.fresh_connection = config.get("fresh_connection", False)
+        # Предел читаемого тела ответа (0 — без ограничения)
+        self.max_body_bytes = config.get("max_body_bytes", DEFAULT_MAX_BODY_BYTES)
+        # Текст, который должен присутствовать в ответе (необязательно)
+        self.expect_text = config.get("expect_text")
+        # Экстракторы текста по типам содержимого и предел длины текста
+        self.text_extractors = config.get("text_extractors")
+        self.max_text_chars = config.get("max_text_chars", DEFAULT_MAX_TEXT_CHARS)
+        self.pool = pool or get_session_pool()
+        # Время ожидания подключения и ответа (секунды)
+        self.connect_timeout = config.get("connect_timeout", DEFAULT_CONNECT_TIMEOUT)
+        self.read_timeout = config.get("read_timeout", DEFAULT_READ_TIMEOUT)
+        # Пороги p50/p95 задержки ответа по скользящему окну (необязательно)
+        self.slo = LatencySLO.from_config(config)
+        # Время этапов последних проверок
+        self.timings = TimingRing(config.get("timing_history", DEFAULT_TIMING_HISTORY))
+        # Результаты последних проверок (время, код, задержка)
+        self.history = ProbeHistory(config.get("history_size", DEFAULT_HISTORY_SIZE))
+        # Метрики точки создаются при первой проверке
+        self._metrics = None
 
     def get_name(self) -> str:
         """
@@ -27,6 +74,12 @@ class HttpEndpoint(Endpoint):
         """
         return self.name
 
+    def get_tags(self) -> List[str]:
+        """
+        Возвращает теги точки мониторинга.
+        """
+        return self.tags
+
     def build_full_url(self) -> str:
         """
         Формирует полный URL с учетом порта, если он явно задан.
@@ -42,42 +95,246 @@ class HttpEndpoint(Endpoint):
     def check_status(self) -> Tuple[bool, int, str]:
         """
         Выполняет HTTP-запрос к точке и возвращает статус работоспособности.
+        Время этапов проверки сохраняется в кольцевом буфере timings.
+
+        :return: кортеж (is_ok, status_code, response)
+        """
+        full_url = self.build_full_url()
+        timing = ProbeTiming()
+        started = time.perf_counter()
+        with recording(timing):
+            try:
+                if self.fresh_connection:
+                    response = self.pool.fresh_request(self.method, full_url, stream=True, \
+                                                       timeout=(self.connect_timeout, \
+                                                                self.read_timeout))
+                else:
+                    response = self.pool.request(self.method, full_url, stream=True, \
+                                                 timeout=(self.connect_timeout, \
+                                                          self.read_timeout))
+                headers = time.perf_counter()
+                timing.ttfb = max(headers - started - timing.network(), 0.0)
+                try:
+                    body = self._read_body(response)
+                    timing.download = time.perf_counter() - headers
+                    result = self._evaluate(response, body, timing)
+                finally:
+                    response.close()
+            # ValueError (UnicodeError) — некорректное имя хоста в URL
+            except (requests.RequestException, ValueError):
+                result = False, -1, ""
+        return self._record(started, result, timing)
+
+    async def check_status_async(self, client: httpx.AsyncClient = None) -> Tuple[bool, int, str]:
+        """
+        Асинхронный вариант check_status для движка на asyncio.
+        Время этапов берется из трассировки httpx; разрешение имени входит
+        в connect (dns не измеряется отдельно).
 
-        :return: кортеж (is_ok, status_code)
+        :param client: общий httpx.AsyncClient; если не задан или требуется новое
+                       соединение, создается временный
+        :return: кортеж (is_ok, status_code, response)
         """
         full_url = self.build_full_url()
+        timing = ProbeTiming()
+        timing.dns = None
+        started = time.perf_counter()
         try:
-            response = requests.request(self.method, full_url, timeout=5)
-            code = response.status_code
-            resp_text = self.extract_text_from_response(response)
-            return code == self.success_code, code, resp_text
-        except requests.RequestException:
-            return False, -1, ""
+            if client is None or self.fresh_connection:
+                async with httpx.AsyncClient(follow_redirects=True) as own_client:
+                    result = await self._request_async(own_client, full_url, timing, started)
+            else:
+                result = await self._request_async(client, full_url, timing, started)
+        # InvalidURL, ошибки TLS и разбора URL вне транспорта — как в синхронной проверке
+        except (httpx.HTTPError, httpx.InvalidURL, OSError, ValueError):
+            result = False, -1, ""
+        return self._record(started, result, timing)
 
-    def extract_text_from_response(self, response: requests.Response) -> str:
+    def _record(self, started: float, result: Tuple[bool, int, str], \
+                timing: ProbeTiming) -> Tuple[bool, int, str]:
         """
-        Возвращает чистый текст из ответа в зависимости от типа содержимого.
+        Проверяет пороги задержки, сохраняет время этапов и результат проверки
+        и учитывает проверку в метриках.
+
+        В окно порогов задержки попадают только проверки, получившие ответ (code != -1),
+        включая ответы, тело которых не дочитано из-за read_timeout. Ошибки соединения
+        и таймауты подключения или ожидания заголовков в окно не входят: такая проверка
+        сама считается недоступностью (-1) и проходит подтверждение сбоя.
+
+        :return: результат проверки; при нарушении порогов задержки — сбой
+                 с описанием нарушения вместо текста ответа
         """
-        content_type = response.headers.get("Content-Type", "").lower()
+        timing.total = time.perf_counter() - started
+        if self.slo is not None and result[1] != -1:
+            # Задержка ответа без времени разбора тела самим монитором
+            violation = self.slo.observe(timing.total - timing.extract)
+            if violation and result[0]:
+                result = False, result[1], violation
+        timing.ok, timing.code = result[0], result[1]
+        latency = self.record_timing(timing)
+        store = get_probe_store()
+        if store is not None:
+            store.submit(self.name, timing.started, timing.code, timing.ok, latency)
+        listener = get_timing_listener()
+        if listener is not None:
+            listener(self.name, timing)
+        return result
+
+    def record_timing(self, timing: ProbeTiming) -> Optional[float]:
+        """
+        Сохраняет время этапов и результат проверки в timings и history
+        и учитывает проверку в метриках процесса (в том числе проверку,
+        выполненную другим процессом опроса).
+
+        :return: задержка ответа (None при ошибке соединения)
+        """
+        self.timings.append(timing)
+        latency = None if timing.code == -1 else timing.total
+        self.history.append(timing.started, timing.code, timing.ok, latency)
+
+        if self._metrics is None:
+            registry = get_metrics()
+            self._metrics = (
+                registry.histogram("ct_probe_duration_seconds", \
+                                   "Длительность проверки точки", endpoint=self.name),
+                registry.counter("ct_probes_total", "Число проверок точки", \
+                                 endpoint=self.name, result="success"),
+                registry.counter("ct_probes_total", "Число проверок точки", \
+                                 endpoint=self.name, result="failure"),
+                {phase: registry.histogram("ct_probe_phase_seconds", \
+                                           "Время этапа проверки (все точки)", \
+                                           PHASE_BUCKETS, phase=phase) for phase in PHASES},
+            )
+        duration, success, failure, phases = self._metrics
+        duration.observe(timing.total)
+        (success if timing.ok else failure).inc()
+        for phase, histogram in phases.items():
+            value = getattr(timing, phase)
+            # Этапы подключения учитываются только для новых соединений
+            if value is not None and (phase in ("ttfb", "download", "extract") \
+                                      or not timing.reused):
+                histogram.observe(value)
+        return latency
+
+    async def _request_async(self, client: httpx.AsyncClient, url: str, \
+                             timing: ProbeTiming, started: float) -> Tuple[bool, int, str]:
+        """Выполняет потоковый запрос через httpx и оценивает ответ."""
+        marks = {}
 
+        async def trace(event: str, _info: dict):
+            """Записывает время подключения и TLS по событиям httpcore."""
+            now = time.perf_counter()
+            if event.endswith(".started"):
+                marks[event[:-len(".started")]] = now
+            elif event == "connection.connect_tcp.complete":
+                timing.reused = False
+                timing.connect += now - marks.get("connection.connect_tcp", now)
+            elif event == "connection.start_tls.complete":
+                timing.tls += now - marks.get("connection.start_tls", now)
+
+        timeout = httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+        async with client.stream(self.method, url, timeout=timeout, \
+                                 extensions={"trace": trace}) as response:
+            headers = time.perf_counter()
+            timing.ttfb = max(headers - started - timing.network(), 0.0)
+            chunks = []
+            size = 0
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                chunks.append(chunk)
+                size += len(chunk)
+                if self.max_body_bytes and size >= self.max_body_bytes:
+                    break
+            timing.download = time.perf_counter() - headers
+            return self._evaluate(response, self._join_body(chunks), timing)
+
+    def _read_body(self, response: requests.Response) -> Optional[bytes]:
+        """
+        Читает тело ответа потоком, но не более max_body_bytes байт.
+
+        :return: прочитанные байты или None, если тело прочитать не удалось
+        """
+        chunks = []
+        size = 0
         try:
-            if "application/json" in content_type:
-                # Преобразуем JSON-ответ в строку
-                json_data = response.json()
-                return str(json_data)
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                chunks.append(chunk)
+                size += len(chunk)
+                if self.max_body_bytes and size >= self.max_body_bytes:
+                    break
+        except (requests.RequestException, TypeError):
+            return None
+        return self._join_body(chunks)
 
-            elif "text/html" in content_type:
-                # Удаляем HTML-теги
-                soup = BeautifulSoup(response.text, "lxml")
-                return soup.get_text(separator=",", strip=True)
+    def _join_body(self, chunks: list) -> bytes:
+        """Склеивает прочитанные блоки и обрезает их до max_body_bytes."""
+        body = b"".join(chunks)
+        if self.max_body_bytes:
+            return body[:self.max_body_bytes]
+        return body
 
-            elif "text/plain" in content_type:
-                return response.text.strip()
+    def _evaluate(self, response, body: Optional[bytes], \
+                  timing: Optional[ProbeTiming] = None) -> Tuple[bool, int, str]:
+        """
+        Оценивает ответ: код, ожидаемый текст и (только при сбое) извлеченный текст.
 
-            else:
-                # Для всех других типов пробуем вывести
-                # часть текста (например, XML, markdown и т.д.)
-                return response.text.strip()
+        :param response: ответ requests или httpx
+        :param body: прочитанное тело ответа
+        :param timing: запись времени этапов (в нее пишется время извлечения текста)
+        :return: кортеж (is_ok, status_code, response)
+        """
+        started = time.perf_counter()
+        try:
+            return self._assess(response, body)
+        finally:
+            if timing is not None:
+                timing.extract = time.perf_counter() - started
 
+    def _assess(self, response, body: Optional[bytes]) -> Tuple[bool, int, str]:
+        """Проверяет код и ожидаемый текст ответа, при сбое извлекает текст."""
+        code = response.status_code
+        ok = code == self.success_code
+        raw_text = None
+        if ok and self.expect_text:
+            raw_text = self._decode(response, body)
+            ok = self.expect_text in raw_text
+        if ok:
+            return True, code, ""
+        if raw_text is None:
+            raw_text = self._decode(response, body)
+        content_type = response.headers.get("Content-Type", "")
+        return False, code, self.extract_text(content_type, raw_text)
+
+    @staticmethod
+    def _decode(response, body: Optional[bytes]) -> str:
+        """Декодирует тело ответа с учетом кодировки из заголовков."""
+        if not body:
+            return ""
+        encoding = getattr(response, "encoding", None)
+        if not isinstance(encoding, str):
+            encoding = "utf-8"
+        try:
+            return body.decode(encoding, errors="replace")
+        except LookupError:
+            return body.decode("utf-8", errors="replace")
+
+    def extract_text_from_response(self, response: requests.Response) -> str:
+        """
+        Возвращает чистый текст из ответа в зависимости от типа содержимого.
+        Читает не более max_body_bytes байт тела.
+        """
+        content_type = response.headers.get("Content-Type", "")
+        return self.extract_text(content_type, self._decode(response, self._read_body(response)))
+
+    def extract_text(self, content_type: str, text: str) -> str:
+        """
+        Возвращает чистый текст из тела ответа в зависимости от типа содержимого.
+        Экстрактор выбирается по text_extractors (по умолчанию для HTML — быстрый
+        потоковый, полный разбор BeautifulSoup включается как "bs4").
+
+        :param content_type: значение заголовка Content-Type
+        :param text: декодированное тело ответа (возможно, обрезанное)
+        """
+        try:
+            return extract_text(content_type, text, self.text_extractors, self.max_text_chars)
         except Exception as e:
             return f"[Ошибка при обработке ответа]: {e}"
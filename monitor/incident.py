@@ -1,43 +1,171 @@
 """monitor/incident.py - Инцидент"""
 
 
+import time
 from datetime import datetime, timezone
+from typing import Optional, Tuple
+from monitor.body_store import BodyStore, body_key
+
+# Максимальная длина текста ответа, хранимого в инциденте
+MAX_RESPONSE_CHARS = 500
+
+
+def format_time(timestamp: Optional[float]) -> Optional[str]:
+    """Форматирует секунды эпохи как время ISO 8601 в UTC (None — None)."""
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+def parse_time(value) -> Optional[float]:
+    """Преобразует время из журнала (ISO 8601 или секунды эпохи) в секунды эпохи."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(value).timestamp()
+
+
+def compact_response(response: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Обрезает текст ответа до MAX_RESPONSE_CHARS символов.
+
+    :return: текст (обрезанный — с многоточием) и хэш полного текста,
+             если текст обрезан (иначе None)
+    """
+    if response is None or len(response) <= MAX_RESPONSE_CHARS:
+        return response, None
+    return response[:MAX_RESPONSE_CHARS] + "…", body_key(response)
+
 
 class Incident:
     """
     Представляет инцидент для конкретного ресурса.
+
+    Время начала и окончания хранится в секундах эпохи (started, ended);
+    строки ISO 8601 (start_time, end_time) формируются только при выводе.
+    Длительность инцидента, открытого в этом процессе, отсчитывается по
+    time.monotonic, поэтому перевод системных часов не делает ее отрицательной.
+    Текст ответа хранится обрезанным до MAX_RESPONSE_CHARS символов; для полного
+    текста сохраняется хэш (response_hash). Если полное тело сохранено в хранилище
+    тел (BodyStore), инцидент ссылается на него ключом (body_ref);
+    у инцидента, восстановленного из журнала, текст читается из хранилища
+    только при первом обращении к response.
     """
 
-    def __init__(self, resource_name: str, code: int, response: str = None):
+    __slots__ = ("resource_name", "code", "_response", "response_hash", "body_ref", \
+                 "timing", "started", "ended", "_monotonic", "_bodies")
+
+    def __init__(self, resource_name: str, code: int, response: str = None, \
+                 timing: dict = None, started: Optional[float] = None, \
+                 bodies: Optional[BodyStore] = None, body_ref: Optional[str] = None):
         """ Инициализирует инцидент с именем ресурса, кодом ответа и временем начала.
         :param resource_name: Имя ресурса, связанного с инцидентом.
         :param code: Код ответа, связанный с инцидентом.
         :param response: Ответ, связанный с инцидентом.
+        :param timing: Время этапов проверки, подтвердившей сбой (ProbeTiming.to_dict).
+        :param started: Время начала в секундах эпохи (по умолчанию — сейчас).
+        :param bodies: Хранилище полных тел ответов (необязательно).
+        :param body_ref: Ключ полного тела ответа, уже сохраненного в bodies.
         """
         self.resource_name = resource_name
         self.code = code
-        self.response = response
-        self.start_time = datetime.now(timezone.utc).isoformat()
-        self.end_time = None
+        self._response, self.response_hash = compact_response(response)
+        self._bodies = bodies
+        self.body_ref = body_ref
+        self.timing = timing
+        self.started = time.time() if started is None else started
+        self.ended: Optional[float] = None
+        # Отметка монотонных часов известна только для инцидента, открытого в этом процессе
+        self._monotonic = time.monotonic() if started is None else None
+
+    @property
+    def response(self) -> Optional[str]:
+        """Текст ответа (обрезанный); при необходимости читается из хранилища тел."""
+        if self._response is None and self.body_ref is not None and self._bodies is not None:
+            self._response, self.response_hash = compact_response(self._bodies.get(self.body_ref))
+        return self._response
+
+    @response.setter
+    def response(self, value: Optional[str]):
+        self._response = value
+
+    def full_response(self) -> Optional[str]:
+        """Возвращает полный текст ответа из хранилища тел (без него — обрезанный текст)."""
+        if self.body_ref is not None and self._bodies is not None:
+            text = self._bodies.get(self.body_ref)
+            if text is not None:
+                return text
+        return self.response
+
+    @property
+    def start_time(self) -> str:
+        """Время начала в формате ISO 8601 (UTC)."""
+        return format_time(self.started)
+
+    @property
+    def end_time(self) -> Optional[str]:
+        """Время окончания в формате ISO 8601 (UTC) или None для активного инцидента."""
+        return format_time(self.ended)
+
+    def duration(self, now: Optional[float] = None) -> float:
+        """
+        Возвращает длительность инцидента (секунды): до окончания
+        или, для активного инцидента, до now (по умолчанию — до текущего момента).
+        """
+        if self.ended is not None:
+            return self.ended - self.started
+        if now is None and self._monotonic is not None:
+            return time.monotonic() - self._monotonic
+        return max((time.time() if now is None else now) - self.started, 0.0)
 
     def close(self):
         """Закрывает инцидент, устанавливая время окончания."""
-        self.end_time = datetime.now(timezone.utc).isoformat()
+        self.ended = self.started + self.duration()
 
     def to_dict(self):
-        """Преобразует инцидент в словарь для сериализации."""
-        return {
+        """
+        Преобразует инцидент в словарь для сериализации.
+        Тело из хранилища записывается только ключом (body_ref) вместо текста.
+        """
+        data = {
             "resource_name": self.resource_name,
             "code": self.code,
-            "response": self.response,
             "start_time": self.start_time,
             "end_time": self.end_time
         }
+        if self.body_ref is not None:
+            data["body_ref"] = self.body_ref
+        else:
+            data["response"] = self._response
+            if self.response_hash is not None:
+                data["response_hash"] = self.response_hash
+        if self.timing is not None:
+            data["timing"] = self.timing
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict, bodies: Optional[BodyStore] = None) -> "Incident":
+        """
+        Восстанавливает инцидент из записи журнала.
+
+        :param bodies: хранилище тел для чтения текста по body_ref при первом обращении
+        :raises KeyError: если в записи нет обязательных полей
+        """
+        incident = cls(data["resource_name"], data["code"], None, data.get("timing"), \
+                       parse_time(data["start_time"]))
+        # Текст уже обрезан при записи — хранится как есть
+        incident.response = data.get("response")
+        incident._bodies = bodies
+        incident.response_hash = data.get("response_hash")
+        incident.body_ref = data.get("body_ref")
+        incident.ended = parse_time(data.get("end_time"))
+        return incident
 
     def __str__(self):
-        return f"{self.resource_name} код ответа \
-            {self.code}, {self.response} {self.start_time} → {self.end_time or '...'}"
+        return f"{self.resource_name} код ответа {self.code}, {self.response} " \
+               f"{self.start_time} → {self.end_time or '...'}"
 
     def __repr__(self):
-        return f"<Incident {self.resource_name} \
-            {self.code} {self.response} {self.start_time} → {self.end_time or '...'}>"
+        return f"<Incident {self.resource_name} {self.code} {self.response} " \
+               f"{self.start_time} → {self.end_time or '...'}>"
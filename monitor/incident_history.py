@@ -0,0 +1,221 @@
+"""monitor/incident_history.py - Индекс истории инцидентов по журналу для запросов"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from monitor.body_store import BodyStore
+from monitor.incident import compact_response, parse_time
+
+# Число инцидентов в ответе на запрос истории по умолчанию
+DEFAULT_HISTORY_LIMIT = 50
+
+# Версия схемы индекса: индекс другой версии строится заново из журнала
+SCHEMA_VERSION = 2
+
+
+class IncidentHistory:
+    """
+    Индекс истории инцидентов в файле SQLite рядом с журналом
+    (<журнал>.history.sqlite) для запросов по ресурсу, периоду и коду.
+
+    Индекс пополняется из сегментов журнала инкрементально: для каждого сегмента
+    хранится число уже прочитанных байт, хэш первой строки и идентификатор файла
+    (устройство и inode), поэтому sync() читает только дописанный хвост; если
+    текущий сегмент был ротирован (это другой файл, первая строка изменилась или
+    файл стал короче), он читается заново. Идентификатор нужен, потому что новый
+    сегмент после уплотнения может начинаться с той же записи и успеть вырасти
+    больше прочитанного размера.
+    Инцидент определяется ресурсом и временем начала: открывающая запись,
+    перенесенная в новый сегмент при уплотнении, не создает дубликат,
+    а закрывающая запись дополняет инцидент временем окончания.
+    Для записей, ссылающихся на тело ответа по ключу (body_ref), текст читается
+    из хранилища тел только для инцидентов, попавших в ответ на запрос.
+    """
+
+    def __init__(self, journal, path: Optional[str] = None, \
+                 bodies: Optional[BodyStore] = None):
+        """
+        :param journal: журнал инцидентов (IncidentJournal)
+        :param path: путь к файлу индекса (по умолчанию <журнал>.history.sqlite)
+        :param bodies: хранилище тел ответов (необязательно)
+        """
+        self.journal = journal
+        self.bodies = bodies
+        self.path = path or journal.log_file + ".history.sqlite"
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, \
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS incidents")
+            self._conn.execute("DROP TABLE IF EXISTS segments")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS incidents "
+                           "(resource_name TEXT NOT NULL, start_time REAL NOT NULL, "
+                           "end_time REAL, code INTEGER, response TEXT, body_ref TEXT, "
+                           "PRIMARY KEY (resource_name, start_time)) WITHOUT ROWID")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS incidents_start_time "
+                           "ON incidents (start_time)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS segments "
+                           "(path TEXT PRIMARY KEY, size INTEGER NOT NULL, head TEXT NOT NULL, "
+                           "file_id TEXT NOT NULL)")
+
+    def sync(self) -> int:
+        """
+        Дочитывает в индекс новые записи всех сегментов журнала.
+
+        :return: число прочитанных записей
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                count = 0
+                for path in self.journal.segments():
+                    try:
+                        count += self._sync_segment(path)
+                    except FileNotFoundError:
+                        # Сегмент ротирован во время чтения: его архивная копия
+                        # будет прочитана при следующей синхронизации
+                        continue
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return count
+
+    def _sync_segment(self, path: str) -> int:
+        """Дочитывает один сегмент журнала, начиная с сохраненной позиции."""
+        key = os.path.abspath(path)
+        row = self._conn.execute("SELECT size, head, file_id FROM segments WHERE path = ?", \
+                                 (key,)).fetchone()
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            file_id = f"{stat.st_dev}:{stat.st_ino}"
+            head = hashlib.blake2b(f.readline(), digest_size=8).hexdigest()
+            size = f.seek(0, os.SEEK_END)
+            start = 0
+            if row is not None and row[0] <= size and tuple(row[1:]) == (head, file_id):
+                start = row[0]
+            if start == size:
+                return 0
+            f.seek(start)
+            data = f.read(size - start)
+        # Неполная последняя строка (запись еще идет) будет прочитана в следующий раз
+        complete = data.rfind(b"\n") + 1
+        count = self._index_records(data[:complete].splitlines())
+        self._conn.execute("INSERT INTO segments (path, size, head, file_id) "
+                           "VALUES (?, ?, ?, ?) ON CONFLICT(path) DO UPDATE SET "
+                           "size = excluded.size, head = excluded.head, "
+                           "file_id = excluded.file_id", (key, start + complete, head, file_id))
+        return count
+
+    def _index_records(self, lines: Iterable[bytes]) -> int:
+        """Добавляет записи журнала в индекс; некорректные строки пропускаются."""
+        rows = []
+        for line in lines:
+            try:
+                record = json.loads(line)
+                rows.append((record["resource_name"], parse_time(record["start_time"]), \
+                             parse_time(record.get("end_time")), record.get("code"), \
+                             record.get("response"), record.get("body_ref")))
+            except (ValueError, KeyError, TypeError):
+                continue
+        self._conn.executemany("INSERT INTO incidents VALUES (?, ?, ?, ?, ?, ?) "
+                               "ON CONFLICT(resource_name, start_time) DO UPDATE SET "
+                               "end_time = coalesce(excluded.end_time, end_time)", rows)
+        return len(rows)
+
+    def query(self, resource: Optional[str] = None, since: Optional[float] = None, \
+              until: Optional[float] = None, code: Optional[int] = None, \
+              limit: int = DEFAULT_HISTORY_LIMIT) -> List[Dict[str, object]]:
+        """
+        Возвращает инциденты, начавшиеся в периоде, от новых к старым.
+
+        :param resource: имя ресурса (None — все ресурсы)
+        :param since: начало периода (секунды эпохи)
+        :param until: конец периода (не включается)
+        :param code: код ответа
+        :param limit: максимальное число инцидентов
+        :return: словари resource_name, start_time, end_time (секунды эпохи), code, response
+        """
+        where, params = self._where(resource, since, until, code)
+        with self._lock:
+            rows = self._conn.execute("SELECT resource_name, start_time, end_time, code, "
+                                      f"response, body_ref FROM incidents{where} "
+                                      "ORDER BY start_time DESC LIMIT ?", \
+                                      params + [limit]).fetchall()
+        return [{"resource_name": row[0], "start_time": row[1], "end_time": row[2], \
+                 "code": row[3], "response": self._response(row[4], row[5])} for row in rows]
+
+    def _response(self, response: Optional[str], body_ref: Optional[str]) -> Optional[str]:
+        """Возвращает текст ответа инцидента, читая тело из хранилища по ключу."""
+        if response is None and body_ref is not None and self.bodies is not None:
+            response, _ = compact_response(self.bodies.get(body_ref))
+        return response
+
+    def stats(self, resource: Optional[str] = None, since: Optional[float] = None, \
+              until: Optional[float] = None, code: Optional[int] = None, \
+              now: Optional[float] = None) -> Dict[str, object]:
+        """
+        Считает за один проход по инцидентам периода (упорядоченным по ресурсу
+        и времени начала): число инцидентов, открытых сейчас, суммарный простой,
+        MTTR — среднее время восстановления закрытых инцидентов,
+        MTBF — среднее время работы между окончанием инцидента и началом
+        следующего инцидента того же ресурса.
+
+        :param now: текущее время для простоя открытых инцидентов (секунды эпохи)
+        :return: словарь count, open, downtime, mttr, mtbf (секунды; None — нет данных)
+        """
+        where, params = self._where(resource, since, until, code)
+        count = still_open = repairs = gaps = 0
+        downtime = repair_sum = gap_sum = 0.0
+        previous: Tuple[Optional[str], Optional[float]] = (None, None)
+        with self._lock:
+            now = time.time() if now is None else now
+            cursor = self._conn.execute("SELECT resource_name, start_time, end_time "
+                                        f"FROM incidents{where} "
+                                        "ORDER BY resource_name, start_time", params)
+            for name, start, end in cursor:
+                count += 1
+                if end is None:
+                    still_open += 1
+                    downtime += max(now - start, 0.0)
+                else:
+                    repairs += 1
+                    repair_sum += end - start
+                    downtime += end - start
+                if previous[0] == name and previous[1] is not None:
+                    gaps += 1
+                    gap_sum += max(start - previous[1], 0.0)
+                previous = (name, end)
+        return {
+            "count": count,
+            "open": still_open,
+            "downtime": downtime,
+            "mttr": repair_sum / repairs if repairs else None,
+            "mtbf": gap_sum / gaps if gaps else None,
+        }
+
+    @staticmethod
+    def _where(resource: Optional[str], since: Optional[float], until: Optional[float], \
+               code: Optional[int]) -> Tuple[str, list]:
+        """Формирует условие запроса по ресурсу, периоду начала и коду."""
+        conditions, params = [], []
+        for condition, value in (("resource_name = ?", resource), ("start_time >= ?", since), \
+                                 ("start_time < ?", until), ("code = ?", code)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    def close(self):
+        """Закрывает файл индекса."""
+        with self._lock:
+            self._conn.close()
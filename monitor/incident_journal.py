@@ -0,0 +1,323 @@
+"""monitor/incident_journal.py - Журнал инцидентов с индексом активных записей"""
+
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+# Размер сегмента журнала, после которого он ротируется (10 МБ)
+DEFAULT_MAX_SEGMENT_BYTES = 10 * 1024 * 1024
+# Число записей между сохранениями индекса
+DEFAULT_SNAPSHOT_EVERY = 100
+# Политики сброса журнала на диск (fsync)
+FSYNC_NONE = "none"
+FSYNC_INTERVAL = "interval"
+FSYNC_EVERY_BATCH = "every-batch"
+# Максимальное число записей в одной групповой записи
+DEFAULT_BATCH_SIZE = 256
+
+
+class IncidentJournal:
+    """
+    Журнал инцидентов в формате JSONL с индексом активных инцидентов.
+
+    Рядом с текущим сегментом журнала хранится индекс (файл <журнал>.index.json):
+    размер сегмента на момент сохранения и смещения открывающих записей активных
+    инцидентов. При загрузке читаются только записи по смещениям из индекса и «хвост»
+    журнала, дописанный после сохранения индекса, поэтому время загрузки зависит
+    от числа активных инцидентов, а не от длины истории.
+
+    Когда сегмент превышает max_segment_bytes, он переименовывается
+    в <журнал>.<время> и начинается новый сегмент, в который сразу переносятся
+    открывающие записи активных инцидентов (уплотнение).
+    """
+
+    def __init__(self, log_file: str, \
+                 max_segment_bytes: int = DEFAULT_MAX_SEGMENT_BYTES, \
+                 snapshot_every: int = DEFAULT_SNAPSHOT_EVERY, \
+                 fsync: str = FSYNC_NONE, fsync_interval: float = 1.0):
+        """
+        :param log_file: путь к текущему сегменту журнала
+        :param max_segment_bytes: размер сегмента для ротации (0 — без ротации)
+        :param snapshot_every: число записей между сохранениями индекса
+        :param fsync: политика fsync: none, interval или every-batch
+        :param fsync_interval: минимальный интервал между fsync (для политики interval)
+        """
+        self.log_file = log_file
+        self.index_file = log_file + ".index.json"
+        self.max_segment_bytes = max_segment_bytes
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._last_fsync = time.monotonic()
+        self._dirty = False
+
+        self._lock = threading.RLock()
+        self._offsets: Dict[str, int] = {}
+        self._size = 0
+        self._unsaved = 0
+
+    def append(self, record: dict):
+        """
+        Дописывает запись в журнал и обновляет индекс активных инцидентов.
+
+        :param record: словарь инцидента (Incident.to_dict)
+        """
+        self.append_batch([record])
+
+    def append_batch(self, records: List[dict]):
+        """
+        Дописывает группу записей одной операцией записи (групповая фиксация)
+        и при необходимости сбрасывает журнал на диск согласно политике fsync.
+
+        :param records: словари инцидентов
+        """
+        lines = [(json.dumps(record) + "\n").encode("utf-8") for record in records]
+        with self._lock:
+            directory = os.path.dirname(self.log_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.log_file, "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(b"".join(lines))
+                self._dirty = True
+                if self._need_fsync():
+                    self._fsync(f)
+            for record, line in zip(records, lines):
+                self._track(record, offset)
+                offset += len(line)
+            self._size = offset
+
+            self._unsaved += len(records)
+            if self.max_segment_bytes and self._size >= self.max_segment_bytes:
+                self._rotate()
+            elif self._unsaved >= self.snapshot_every:
+                self._save_index()
+
+    def load_active(self) -> List[dict]:
+        """
+        Загружает открывающие записи активных инцидентов.
+        Использует индекс, если он соответствует журналу, иначе читает журнал целиком
+        и сохраняет новый индекс.
+
+        :return: список записей активных инцидентов
+        """
+        with self._lock:
+            self._offsets = {}
+            self._size = 0
+            if not os.path.exists(self.log_file):
+                return []
+
+            index = self._read_index()
+            start = 0
+            if index is not None:
+                self._offsets = index["active"]
+                start = index["size"]
+            self._replay(start)
+
+            records = self._read_records()
+            if records is None:
+                # Индекс не соответствует журналу — полное перечитывание
+                self._offsets = {}
+                self._replay(0)
+                records = self._read_records() or []
+                index = None
+
+            if index is None or self._size != start:
+                self._save_index()
+            return records
+
+    def segments(self) -> List[str]:
+        """Возвращает пути всех сегментов журнала: архивные по времени, затем текущий."""
+        archived = sorted(glob.glob(glob.escape(self.log_file) + ".*[0-9]"))
+        return archived + [self.log_file]
+
+    def close(self):
+        """Сохраняет индекс, если в нем есть несохраненные изменения."""
+        with self._lock:
+            if self._unsaved:
+                self._save_index()
+
+    def sync_pending(self):
+        """Сбрасывает на диск записи, еще не попавшие под fsync (для политики interval)."""
+        with self._lock:
+            if not self._dirty or self.fsync == FSYNC_NONE or not os.path.exists(self.log_file):
+                return
+            with open(self.log_file, "ab") as f:
+                self._fsync(f)
+
+    def _fsync(self, f):
+        """Сбрасывает открытый файл журнала на диск."""
+        f.flush()
+        os.fsync(f.fileno())
+        self._last_fsync = time.monotonic()
+        self._dirty = False
+
+    def _need_fsync(self) -> bool:
+        """Определяет, нужен ли fsync после текущей записи."""
+        if self.fsync == FSYNC_EVERY_BATCH:
+            return True
+        if self.fsync == FSYNC_INTERVAL:
+            return time.monotonic() - self._last_fsync >= self.fsync_interval
+        return False
+
+    def _track(self, record: dict, offset: int):
+        """Учитывает запись в смещениях активных инцидентов."""
+        name = record["resource_name"]
+        if record.get("end_time") is None:
+            self._offsets[name] = offset
+        else:
+            self._offsets.pop(name, None)
+
+    def _replay(self, start: int):
+        """Применяет к индексу записи журнала, начиная с байта start."""
+        with open(self.log_file, "rb") as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                try:
+                    self._track(json.loads(line), offset)
+                except (ValueError, KeyError, TypeError):
+                    pass
+                offset += len(line)
+        self._size = offset
+
+    def _read_records(self) -> Optional[List[dict]]:
+        """
+        Читает записи активных инцидентов по смещениям.
+
+        :return: список записей или None, если смещения не соответствуют журналу
+        """
+        records = []
+        with open(self.log_file, "rb") as f:
+            for name, offset in self._offsets.items():
+                f.seek(offset)
+                try:
+                    record = json.loads(f.readline())
+                except ValueError:
+                    return None
+                if not isinstance(record, dict) or record.get("resource_name") != name \
+                        or record.get("end_time") is not None:
+                    return None
+                records.append(record)
+        return records
+
+    def _read_index(self) -> Optional[dict]:
+        """Читает индекс, если он есть и не опережает журнал."""
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            size = os.path.getsize(self.log_file)
+            if not isinstance(index.get("active"), dict) or index.get("size", -1) > size:
+                return None
+            return index
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _save_index(self):
+        """Атомарно сохраняет индекс (через временный файл)."""
+        tmp_file = self.index_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"size": self._size, "active": self._offsets}, f)
+        os.replace(tmp_file, self.index_file)
+        self._unsaved = 0
+
+    def _rotate(self):
+        """Архивирует текущий сегмент и начинает новый с активными инцидентами."""
+        records = self._read_records() or []
+        suffix = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S%f")
+        os.replace(self.log_file, f"{self.log_file}.{suffix}")
+
+        self._offsets = {}
+        offset = 0
+        with open(self.log_file, "wb") as f:
+            for record in records:
+                line = (json.dumps(record) + "\n").encode("utf-8")
+                f.write(line)
+                self._offsets[record["resource_name"]] = offset
+                offset += len(line)
+        self._size = offset
+        self._save_index()
+
+
+class JournalWriter(threading.Thread):
+    """
+    Фоновая запись в журнал инцидентов.
+    Потоки опроса только кладут записи в очередь в памяти; поток записи
+    забирает все накопившиеся записи (до batch_size) и пишет их одной
+    групповой операцией, применяя политику fsync журнала.
+    """
+
+    _STOP = object()
+
+    def __init__(self, journal: IncidentJournal, batch_size: int = DEFAULT_BATCH_SIZE, \
+                 logger: Optional[logging.Logger] = None):
+        """
+        :param journal: журнал инцидентов
+        :param batch_size: максимальное число записей в одной групповой записи
+        :param logger: логгер
+        """
+        super().__init__(daemon=True, name="JournalWriter")
+        self.journal = journal
+        self.batch_size = batch_size
+        self.logger = logger or logging.getLogger(__name__)
+        self._queue: queue.Queue = queue.Queue()
+
+    def submit(self, record: dict):
+        """Ставит запись в очередь на запись (не блокирует вызывающий поток)."""
+        self._queue.put(record)
+
+    def depth(self) -> int:
+        """Возвращает число записей, ожидающих записи."""
+        return self._queue.qsize()
+
+    def flush(self):
+        """Ждет, пока все поставленные в очередь записи будут записаны."""
+        if self.is_alive():
+            self._queue.join()
+
+    def stop(self):
+        """Записывает оставшиеся записи и останавливает поток."""
+        self._queue.put(self._STOP)
+        if self.is_alive():
+            self.join()
+
+    def run(self):
+        """Цикл групповой записи."""
+        # При политике interval поток просыпается и без новых записей, чтобы сбросить хвост
+        timeout = self.journal.fsync_interval if self.journal.fsync == FSYNC_INTERVAL else None
+        stopping = False
+        while not stopping:
+            try:
+                batch = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                self._sync_pending()
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [item for item in batch if item is not self._STOP]
+            stopping = len(records) != len(batch)
+            try:
+                if records:
+                    self.journal.append_batch(records)
+            except (OSError, TypeError, ValueError) as e:
+                self.logger.error("Ошибка записи журнала инцидентов: %s", e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        self._sync_pending()
+
+    def _sync_pending(self):
+        """Сбрасывает на диск незафиксированные записи журнала."""
+        try:
+            self.journal.sync_pending()
+        except OSError as e:
+            self.logger.error("Ошибка fsync журнала инцидентов: %s", e)
@@ -1,47 +1,183 @@
 """monitor/incident_manager.py - Управление инцидентами"""
 
-import json
-import os
-from typing import Dict, List
+import copy
+import logging
+import threading
+import time
+from typing import Dict, List, Mapping, Optional
+from monitor.body_store import BodyStore, DEFAULT_BODY_DAYS, PURGE_INTERVAL
 from monitor.endpoint import Endpoint
 from monitor.incident import Incident
+from monitor.incident_history import IncidentHistory
+from monitor.incident_journal import IncidentJournal, JournalWriter, \
+    DEFAULT_BATCH_SIZE, DEFAULT_MAX_SEGMENT_BYTES, DEFAULT_SNAPSHOT_EVERY, FSYNC_NONE
+from monitor.metrics import MetricsRegistry
 from monitor.notifier import Notifier
 
 class IncidentManager:
     """
     Управляет регистрацией, закрытием и хранением инцидентов.
+
+    Активные инциденты хранятся в словаре, который после публикации не изменяется
+    (копирование при записи): писатели под блокировкой строят новый словарь
+    и заменяют ссылку, читатели берут текущую ссылку без блокировок и всегда
+    видят целостный снимок.
     """
 
-    def __init__(self, log_file: str = "logs/incidents.jsonl"):
+    def __init__(self, log_file: str = "logs/incidents.jsonl", \
+                 max_segment_bytes: int = DEFAULT_MAX_SEGMENT_BYTES, \
+                 snapshot_every: int = DEFAULT_SNAPSHOT_EVERY, \
+                 writer: str = "sync", fsync: str = FSYNC_NONE, \
+                 fsync_interval: float = 1.0, batch_size: int = DEFAULT_BATCH_SIZE, \
+                 bodies: Optional[str] = None, body_days: float = DEFAULT_BODY_DAYS, \
+                 logger: Optional[logging.Logger] = None):
+        """
+        :param log_file: путь к журналу инцидентов
+        :param max_segment_bytes: размер сегмента журнала для ротации
+        :param snapshot_every: число записей между сохранениями индекса журнала
+        :param writer: sync — запись в вызывающем потоке, background — фоновая запись
+        :param fsync: политика fsync журнала: none, interval или every-batch
+        :param fsync_interval: интервал fsync для политики interval (секунды)
+        :param batch_size: максимальное число записей в групповой записи
+        :param bodies: каталог хранилища тел ответов; без него текст ответа
+                       записывается в журнал целиком (обрезанным)
+        :param body_days: срок хранения тела после последнего сохранения (сутки, 0 — бессрочно)
+        :param logger: логгер
+        """
         self.log_file = log_file
+        self.logger = logger or logging.getLogger(__name__)
+        self.bodies = BodyStore(bodies) if bodies else None
+        self.body_days = body_days
+        self.journal = IncidentJournal(log_file, max_segment_bytes, snapshot_every, \
+                                       fsync, fsync_interval)
+        self.writer = None
+        if writer == "background":
+            self.writer = JournalWriter(self.journal, batch_size)
+            self.writer.start()
         self.notifier = None
+        self.claims = None
         self.all_endpoints = None
-        self.active_incidents: Dict[str, Incident] = {}
+        self._lock = threading.Lock()
+        self._history = None
+        self._history_lock = threading.Lock()
+        self.active_incidents: Mapping[str, Incident] = {}
         self._load_active_incidents()
+        # Устаревшие тела удаляет отдельный поток, а не потоки опроса
+        self._purge_stop = threading.Event()
+        self._purger = None
+        if self.bodies is not None and self.body_days:
+            self._purger = threading.Thread(target=self._purge_bodies_loop, daemon=True, \
+                                            name="BodyPurger")
+            self._purger.start()
+
+    def register_incident(self, resource_name: str, code: int, response: str, \
+                          timing: dict = None):
+        """
+        Открывает инцидент, если он ещё не активен.
 
-    def register_incident(self, resource_name: str, code: int, response: str):
-        """Открывает инцидент, если он ещё не активен."""
-        if resource_name not in self.active_incidents:
-            incident = Incident(resource_name, code, response)
-            self.active_incidents[resource_name] = incident
+        :param timing: время этапов проверки, подтвердившей сбой (необязательно)
+        """
+        if resource_name in self.active_incidents:
+            return
+        # Тело пишется на диск до блокировки, чтобы не задерживать другие точки
+        body_ref = self._store_body(response)
+        with self._lock:
+            if resource_name in self.active_incidents:
+                return
+            incident = Incident(resource_name, code, response, timing, \
+                                bodies=self.bodies, body_ref=body_ref)
+            active = dict(self.active_incidents)
+            active[resource_name] = incident
+            self.active_incidents = active
             self._append_to_log(incident.to_dict())
-            if self.notifier:
-                self.notifier.send_task(self.notifier.notify_incident(incident))
+        # В кластере об инциденте уведомляет только узел, открывший его первым
+        if self.claims and not self.claims.claim_incident(resource_name):
+            return
+        if self.notifier:
+            self.notifier.submit_incident(incident)
+
+    def _store_body(self, response: Optional[str]) -> Optional[str]:
+        """
+        Сохраняет полное тело ответа в хранилище тел.
+
+        :return: ключ тела или None, если хранилища нет или запись не удалась
+                 (тогда в журнал попадет обрезанный текст)
+        """
+        if self.bodies is None or not response:
+            return None
+        try:
+            return self.bodies.put(response)
+        except OSError as e:
+            self.logger.error("Не удалось сохранить тело ответа: %s", e)
+            return None
+
+    def purge_bodies(self, now: Optional[float] = None) -> int:
+        """
+        Удаляет тела ответов, которые не сохранялись дольше body_days суток,
+        кроме тел активных инцидентов. Записи истории, ссылающиеся на удаленное
+        тело, остаются без текста ответа.
+
+        :param now: текущее время в секундах эпохи (по умолчанию — сейчас)
+        :return: число удаленных файлов
+        """
+        if self.bodies is None or not self.body_days:
+            return 0
+        older_than = (time.time() if now is None else now) - self.body_days * 86400
+        keep = [incident.body_ref for incident in self.active_incidents.values() \
+                if incident.body_ref is not None]
+        return self.bodies.purge(older_than, keep)
+
+    def _purge_bodies_loop(self):
+        """Удаляет устаревшие тела ответов при запуске и затем раз в PURGE_INTERVAL секунд."""
+        while True:
+            removed = self.purge_bodies()
+            if removed:
+                self.logger.info("Удалено устаревших тел ответов: %d", removed)
+            if self._purge_stop.wait(PURGE_INTERVAL):
+                break
 
     def resolve_incident(self, resource_name: str):
         """Закрывает активный инцидент, если он существует."""
-        incident = self.active_incidents.get(resource_name)
-        if incident:
+        with self._lock:
+            if resource_name not in self.active_incidents:
+                return
+            active = dict(self.active_incidents)
+            # Закрывается копия, чтобы не менять объект в уже опубликованных снимках
+            incident = copy.copy(active.pop(resource_name))
+            incident.close()
+            self.active_incidents = active
+            self._append_to_log(incident.to_dict())
+        if self.claims and not self.claims.release_incident(resource_name):
+            return
+        if self.notifier:
+            self.notifier.submit_recovery(incident)
+
+    def handoff_incident(self, resource_name: str):
+        """
+        Закрывает инцидент локально без уведомления, когда точка перешла
+        к другому узлу кластера (отметка в общем хранилище сохраняется для нового владельца)
+        или исключена из конфигурации.
+        """
+        with self._lock:
+            if resource_name not in self.active_incidents:
+                return
+            active = dict(self.active_incidents)
+            incident = copy.copy(active.pop(resource_name))
             incident.close()
+            self.active_incidents = active
             self._append_to_log(incident.to_dict())
-            del self.active_incidents[resource_name]
-            if self.notifier:
-                self.notifier.send_task(self.notifier.notify_recovery(incident))
 
     def set_notifier(self, notifier: Notifier):
         """Устанавливает уведомитель."""
         self.notifier = notifier
 
+    def set_claims(self, claims):
+        """
+        Устанавливает общее хранилище отметок об инцидентах (LeaseStore)
+        для исключения повторных уведомлений от разных узлов.
+        """
+        self.claims = claims
+
     def set_endpoints(self, all_endpoints: List[Endpoint]):
         """Устанавливает точки мониторинга."""
         self.all_endpoints = all_endpoints
@@ -50,33 +186,82 @@ class IncidentManager:
         """Возвращает список всех активных инцидентов."""
         return list(self.active_incidents.values())
 
+    def get_active_map(self) -> Mapping[str, Incident]:
+        """
+        Возвращает снимок активных инцидентов {имя ресурса: инцидент}.
+        Снимок не изменяется и не должен изменяться вызывающим кодом.
+        """
+        return self.active_incidents
+
     def get_all_ep_names(self) -> List[str]:
         """Возвращает список всех уникальных имён ресурсов."""
         return [ep.get_name() for ep in self.all_endpoints]
 
+    def get_all_endpoints(self) -> List[Endpoint]:
+        """Возвращает список всех точек мониторинга."""
+        return list(self.all_endpoints or [])
+
     def reload_active_incidents(self):
         """Переоткрывает активные инциденты из журнала."""
-        self._load_active_incidents()
+        with self._lock:
+            if self.writer:
+                self.writer.flush()
+            self._load_active_incidents()
+
+    def get_history(self) -> IncidentHistory:
+        """
+        Возвращает индекс истории инцидентов, дочитав в него новые записи журнала.
+        Индекс открывается при первом обращении.
+        """
+        if self.writer:
+            self.writer.flush()
+        with self._history_lock:
+            if self._history is None:
+                self._history = IncidentHistory(self.journal, bodies=self.bodies)
+            self._history.sync()
+            return self._history
+
+    def journal_depth(self) -> int:
+        """Возвращает число записей журнала, ожидающих записи (0 при синхронной записи)."""
+        return self.writer.depth() if self.writer else 0
+
+    def register_metrics(self, registry: MetricsRegistry):
+        """Публикует число активных инцидентов и глубину очереди записи журнала."""
+        registry.register_callback("ct_active_incidents", "Число активных инцидентов", \
+                                   lambda: len(self.active_incidents))
+        registry.register_callback("ct_journal_queue_depth", \
+                                   "Число записей журнала, ожидающих записи", self.journal_depth)
+
+    def close(self):
+        """Дописывает очередь журнала и сохраняет его индекс перед завершением работы."""
+        self._purge_stop.set()
+        if self._purger is not None:
+            self._purger.join()
+        if self.writer:
+            self.writer.stop()
+        self.journal.close()
+        with self._history_lock:
+            if self._history is not None:
+                self._history.close()
+                self._history = None
 
     def _append_to_log(self, record: dict):
         """Добавляет запись об инциденте в журнал (формат JSONL)."""
-        os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
-        with open(self.log_file, "a", encoding="utf-8") as f:
-            json.dump(record, f)
-            f.write("\n")
+        if self.writer:
+            self.writer.submit(record)
+        else:
+            self.journal.append(record)
 
     def _load_active_incidents(self):
-        """Загружает только активные (не завершённые) инциденты из журнала."""
-        self.active_incidents.clear()
-        if not os.path.exists(self.log_file):
-            return
-        with open(self.log_file, "r", encoding="utf-8") as f:
-            for line in f:
-                try:
-                    data = json.loads(line)
-                    if data.get("end_time") is None:
-                        incident = Incident(data["resource_name"],data["code"],data["response"])
-                        incident.start_time = data["start_time"]
-                        self.active_incidents[data["resource_name"]] = incident
-                except (json.JSONDecodeError, KeyError):
-                    continue
+        """
+        Загружает только активные (не завершённые) инциденты из журнала.
+        Новый словарь публикуется целиком после загрузки.
+        """
+        active: Dict[str, Incident] = {}
+        for data in self.journal.load_active():
+            try:
+                incident = Incident.from_dict(data, self.bodies)
+            except (KeyError, TypeError, ValueError):
+                continue
+            active[incident.resource_name] = incident
+        self.active_incidents = active
@@ -0,0 +1,97 @@
+"""monitor/latency_slo.py - Пороги задержки ответа по скользящему окну"""
+
+import bisect
+import math
+from collections import deque
+from typing import Dict, Optional
+
+# Число последних ответов в окне по умолчанию
+DEFAULT_SLO_WINDOW = 20
+# Квантили, для которых задаются пороги в конфигурации
+SLO_QUANTILES = {"p50": 0.5, "p95": 0.95}
+
+
+class SlidingQuantiles:
+    """
+    Квантили по скользящему окну последних значений.
+    Значения хранятся дважды: в порядке поступления (для вытеснения старых)
+    и в отсортированном списке (вставка и удаление через bisect), поэтому
+    квантиль берется по индексу за O(1), а добавление стоит O(log n) на поиск
+    и сдвиг короткого списка.
+    Не потокобезопасен: проверки одной точки выполняются последовательно.
+    """
+
+    def __init__(self, window: int = DEFAULT_SLO_WINDOW):
+        """
+        :param window: число хранимых значений
+        """
+        self.window = window
+        self._order: deque = deque()
+        self._sorted = []
+
+    def add(self, value: float):
+        """Добавляет значение, вытесняя самое старое при заполненном окне."""
+        if len(self._order) == self.window:
+            oldest = self._order.popleft()
+            del self._sorted[bisect.bisect_left(self._sorted, oldest)]
+        self._order.append(value)
+        bisect.insort(self._sorted, value)
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Возвращает квантиль q по методу ближайшего ранга
+        (значение, не меньше которого q доля окна), None — если окно пусто.
+        """
+        if not self._sorted:
+            return None
+        rank = max(math.ceil(q * len(self._sorted)), 1)
+        return self._sorted[rank - 1]
+
+
+class LatencySLO:
+    """
+    Пороги задержки ответа точки (p50 и p95 по скользящему окну).
+    Квантиль оценивается, только когда в окне достаточно ответов, чтобы один
+    выброс не считался нарушением: для p50 — от 2 ответов, для p95 — от 20.
+    Поэтому схема конфигурации не допускает окно меньше 20 ответов при пороге p95:
+    такой порог никогда бы не сработал.
+    """
+
+    def __init__(self, thresholds: Dict[str, float], window: int = DEFAULT_SLO_WINDOW):
+        """
+        :param thresholds: пороги в секундах, например {"p50": 1.0, "p95": 3.0}
+        :param window: число последних ответов в окне
+        """
+        self.thresholds = {name: thresholds[name] for name in SLO_QUANTILES \
+                           if thresholds.get(name) is not None}
+        self.window = SlidingQuantiles(window)
+
+    @classmethod
+    def from_config(cls, resource_config: dict) -> Optional["LatencySLO"]:
+        """Создает пороги из параметра ресурса latency_slo (None, если он не задан)."""
+        slo = resource_config.get("latency_slo")
+        if not slo:
+            return None
+        return cls(slo, slo.get("window", DEFAULT_SLO_WINDOW))
+
+    def observe(self, latency: float) -> Optional[str]:
+        """
+        Учитывает задержку ответа и проверяет пороги.
+
+        :param latency: задержка ответа (секунды)
+        :return: описание нарушения или None, если пороги соблюдены
+        """
+        self.window.add(latency)
+        count = len(self.window)
+        for name, threshold in self.thresholds.items():
+            q = SLO_QUANTILES[name]
+            if count < math.ceil(1 / (1 - q)):
+                continue
+            value = self.window.quantile(q)
+            if value > threshold:
+                return (f"Медленный ответ: {name} {value:.2f} с > {threshold:.2f} с "
+                        f"(последние {count} ответов)")
+        return None
@@ -0,0 +1,350 @@
+"""monitor/metrics.py - Гистограммы задержек, счетчики и страница /metrics"""
+
+import bisect
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, unquote
+from monitor.probe_history import history_report
+
+# Границы корзин по умолчанию (секунды): от 10 мс до 2 минут
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Адрес страницы метрик по умолчанию
+DEFAULT_METRICS_HOST = "127.0.0.1"
+DEFAULT_METRICS_PORT = 9108
+# Тип содержимого текстового формата Prometheus
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+JSON_CONTENT_TYPE = "application/json; charset=utf-8"
+
+HISTOGRAM = "histogram"
+COUNTER = "counter"
+GAUGE = "gauge"
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными границами корзин (как histogram в Prometheus).
+    Хранит число наблюдений в каждой корзине, общее число и сумму;
+    квантили оцениваются линейной интерполяцией внутри корзины.
+    Потокобезопасна.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        :param buckets: возрастающие верхние границы корзин
+        """
+        self.buckets = list(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # последняя корзина — +Inf
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Учитывает одно наблюдение."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value
+
+    def counts(self) -> Tuple[List[int], float]:
+        """Возвращает число наблюдений в каждой корзине (не накопительное) и их сумму."""
+        with self._lock:
+            return list(self._counts), self._sum
+
+    def merge(self, counts: Sequence[int], value_sum: float):
+        """
+        Добавляет наблюдения гистограммы с теми же границами, полученные
+        из другого процесса (разность counts() между двумя отправками).
+        """
+        with self._lock:
+            for index, count in enumerate(counts):
+                self._counts[index] += count
+            self._count += sum(counts)
+            self._sum += value_sum
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Оценивает квантиль q (0..1).
+
+        :return: значение квантиля или None, если наблюдений нет
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index == len(self.buckets):
+                    return lower
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def snapshot(self) -> Dict[str, object]:
+        """
+        Возвращает состояние гистограммы: накопительные счетчики по границам,
+        общее число и сумму наблюдений.
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total, value_sum = self._count, self._sum
+        cumulative: List[int] = []
+        running = 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return {
+            "buckets": list(zip(self.buckets + [float("inf")], cumulative)),
+            "count": total,
+            "sum": value_sum,
+        }
+
+
+class Counter:
+    """Монотонно растущий счетчик. Потокобезопасен."""
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        """Увеличивает счетчик."""
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        """Текущее значение счетчика."""
+        with self._lock:
+            return self._value
+
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricFamily:
+    """Метрика с одним именем и описанием и набором значений по меткам."""
+
+    def __init__(self, name: str, help_text: str, kind: str):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        # Метки -> Histogram, Counter или функция, возвращающая значение
+        self.children: Dict[Labels, object] = {}
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    """Приводит метки к упорядоченному кортежу (ключ набора значений)."""
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    """Экранирует значение метки для текстового формата Prometheus."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    """Форматирует метки: {a="1",b="2"} или пустую строку."""
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    """Форматирует число для текстового формата Prometheus."""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик процесса: гистограммы, счетчики и значения, вычисляемые
+    при чтении (глубина очередей). render() выдает текстовый формат Prometheus.
+    Потокобезопасен.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families: Dict[str, MetricFamily] = {}
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS, \
+                  **labels) -> Histogram:
+        """Возвращает гистограмму с заданными метками, создавая ее при первом обращении."""
+        return self._child(name, help_text, HISTOGRAM, labels, lambda: Histogram(buckets))
+
+    def counter(self, name: str, help_text: str, **labels) -> Counter:
+        """Возвращает счетчик с заданными метками, создавая его при первом обращении."""
+        return self._child(name, help_text, COUNTER, labels, Counter)
+
+    def register_histogram(self, name: str, help_text: str, histogram: Histogram, **labels):
+        """Публикует уже существующую гистограмму (например, задержку уведомлений)."""
+        self._set(name, help_text, HISTOGRAM, labels, histogram)
+
+    def register_callback(self, name: str, help_text: str, func: Callable[[], float], \
+                          kind: str = GAUGE, **labels):
+        """
+        Публикует значение, которое вычисляется при каждом чтении метрик.
+
+        :param func: функция без аргументов, возвращающая число
+        :param kind: gauge (текущее значение) или counter (накопленное)
+        """
+        self._set(name, help_text, kind, labels, func)
+
+    def remove(self, **labels):
+        """Удаляет все значения, метки которых содержат заданные (например, endpoint=имя)."""
+        wanted = set(_labels(labels))
+        with self._lock:
+            for family in self._families.values():
+                for key in [key for key in family.children if wanted <= set(key)]:
+                    del family.children[key]
+
+    def render(self) -> str:
+        """Возвращает все метрики в текстовом формате Prometheus."""
+        with self._lock:
+            families = [(family, list(family.children.items())) \
+                        for family in self._families.values()]
+        lines: List[str] = []
+        for family, children in families:
+            lines.append(f"# HELP {family.name} {family.help_text}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for labels, child in children:
+                if isinstance(child, Histogram):
+                    snapshot = child.snapshot()
+                    for bound, count in snapshot["buckets"]:
+                        le = (("le", _format_value(bound)),)
+                        lines.append(f"{family.name}_bucket{_format_labels(labels, le)} {count}")
+                    lines.append(f"{family.name}_sum{_format_labels(labels)} "
+                                 f"{_format_value(snapshot['sum'])}")
+                    lines.append(f"{family.name}_count{_format_labels(labels)} "
+                                 f"{snapshot['count']}")
+                    continue
+                value = child.value if isinstance(child, Counter) else child()
+                lines.append(f"{family.name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _family(self, name: str, help_text: str, kind: str) -> MetricFamily:
+        """Возвращает метрику по имени (вызывается под блокировкой)."""
+        family = self._families.get(name)
+        if family is None:
+            family = MetricFamily(name, help_text, kind)
+            self._families[name] = family
+        elif family.kind != kind:
+            raise ValueError(f"Метрика {name} уже зарегистрирована как {family.kind}")
+        return family
+
+    def _child(self, name: str, help_text: str, kind: str, labels: Dict[str, str], factory):
+        """Возвращает значение метрики по меткам, создавая его при первом обращении."""
+        key = _labels(labels)
+        with self._lock:
+            family = self._family(name, help_text, kind)
+            child = family.children.get(key)
+            if child is None:
+                child = factory()
+                family.children[key] = child
+            return child
+
+    def _set(self, name: str, help_text: str, kind: str, labels: Dict[str, str], child):
+        """Устанавливает значение метрики по меткам."""
+        with self._lock:
+            self._family(name, help_text, kind).children[_labels(labels)] = child
+
+
+class MetricsServer(threading.Thread):
+    """
+    HTTP-сервер страницы /metrics для Prometheus и истории проверок /uptime (JSON),
+    как у команды бота /uptime: /uptime — сводки всех точек, /uptime/<имя> — сводка
+    и проверки одной точки,
+    параметр period=<секунды> ограничивает период.
+    Предоставляет stop и join, как потоки опроса.
+    """
+
+    def __init__(self, registry: "MetricsRegistry", host: str = DEFAULT_METRICS_HOST, \
+                 port: int = DEFAULT_METRICS_PORT, logger: Optional[logging.Logger] = None, \
+                 endpoints: Optional[Callable[[], Iterable]] = None):
+        """
+        :param registry: реестр метрик
+        :param host: адрес, на котором принимаются запросы
+        :param port: порт (0 — любой свободный, см. server_address)
+        :param logger: логгер
+        :param endpoints: функция, возвращающая точки мониторинга (None — без /uptime)
+        """
+        super().__init__(daemon=True, name="MetricsServer")
+        self.registry = registry
+        self.logger = logger or logging.getLogger(__name__)
+
+        class Handler(BaseHTTPRequestHandler):
+            """Отдает метрики по GET /metrics и историю проверок по GET /uptime."""
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                """Обрабатывает GET-запрос."""
+                path, _, query = self.path.partition("?")
+                if path == "/metrics":
+                    self._reply(registry.render(), CONTENT_TYPE)
+                    return
+                if endpoints is None or not (path == "/uptime" or path.startswith("/uptime/")):
+                    self.send_error(404)
+                    return
+                try:
+                    period = float(parse_qs(query).get("period", ["0"])[0])
+                except ValueError:
+                    self.send_error(400, "period: ожидается число секунд")
+                    return
+                name = unquote(path[len("/uptime/"):]) if path != "/uptime" else None
+                report = history_report(endpoints() or [], name, \
+                                        time.time() - period if period > 0 else None)
+                if report is None:
+                    self.send_error(404)
+                    return
+                self._reply(json.dumps(report, ensure_ascii=False), JSON_CONTENT_TYPE)
+
+            def _reply(self, text: str, content_type: str):
+                """Отправляет ответ 200 с телом text."""
+                body = text.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+                """Запросы не пишутся в журнал (их делает Prometheus каждые несколько секунд)."""
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.server_address = self._server.server_address
+
+    def run(self):
+        """Обслуживает запросы до остановки."""
+        self.logger.info("Метрики доступны на http://%s:%d/metrics", *self.server_address[:2])
+        try:
+            self._server.serve_forever(poll_interval=0.5)
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        """Останавливает сервер."""
+        if self.is_alive():
+            self._server.shutdown()
+        else:
+            self._server.server_close()
+
+
+_metrics = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Возвращает общий реестр метрик процесса."""
+    return _metrics
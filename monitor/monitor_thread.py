@@ -1,10 +1,12 @@
 """monitor/monitor_thread.py - Поток мониторинга точки"""
 
 import threading
-import time
 import logging
 from typing import Optional
 from monitor.incident_manager import IncidentManager
+from monitor.probe_rate import get_probe_rates
+from monitor.probe_timing import last_timing
+from monitor.probe_state import AdaptiveInterval
 
 class MonitorThread(threading.Thread):
     """
@@ -14,7 +16,7 @@ class MonitorThread(threading.Thread):
 
     def __init__(self, endpoint, resource_config: dict, \
                  logger: Optional[logging.Logger] = None, \
-                 incidents: Optional[IncidentManager] = None):
+                 incidents: Optional[IncidentManager] = None, in_incident: bool = False):
         super().__init__(daemon=True)
         self.endpoint = endpoint
         self.name = endpoint.get_name()
@@ -26,9 +28,26 @@ class MonitorThread(threading.Thread):
         self.check_interval = resource_config['check_interval']
         self.retry_interval = resource_config['retry_interval']
         self.max_attempts = resource_config['max_attempts']
+        self.interval = AdaptiveInterval(resource_config)
+        self.counter = get_probe_rates().counter(self.name, self.retry_interval)
 
-        # Состояние
-        self.in_incident = False
+        # Состояние (инцидент может быть уже открыт до запуска опроса)
+        self.in_incident = in_incident
+
+    def reconfigure(self, endpoint, resource_config: dict):
+        """
+        Применяет новую конфигурацию ресурса без перезапуска потока.
+        Состояние инцидента сохраняется; новые интервалы действуют со следующей паузы.
+
+        :param endpoint: точка мониторинга с новыми параметрами запроса
+        :param resource_config: новая конфигурация ресурса
+        """
+        self.endpoint = endpoint
+        self.check_interval = resource_config['check_interval']
+        self.retry_interval = resource_config['retry_interval']
+        self.max_attempts = resource_config['max_attempts']
+        self.interval = AdaptiveInterval(resource_config)
+        self.counter.retry_interval = self.retry_interval
 
     def stop(self):
         """Останавливает поток мониторинга."""
@@ -40,7 +59,7 @@ class MonitorThread(threading.Thread):
         try:
             while not self._stop_event.is_set():
                 # Проверяем состояние точки
-                status, code, resp = self.endpoint.check_status()
+                status, code, resp = self._probe()
 
                 if not self.in_incident and not status:
                     self.logger.warning("%s — ошибка %s, %s. Начинаем повторные попытки...", \
@@ -50,7 +69,8 @@ class MonitorThread(threading.Thread):
                                         self.name)
                         self.in_incident = True
                         if self.incidents:
-                            self.incidents.register_incident(self.name, code, resp)
+                            self.incidents.register_incident(self.name, code, resp, \
+                                                             last_timing(self.endpoint))
 
                 elif self.in_incident and status:
                     self.logger.info("%s — получен ответ %s, %s. Проверка восстановления...", \
@@ -65,7 +85,12 @@ class MonitorThread(threading.Thread):
                 else:
                     self.logger.debug("%s — стабильное состояние: код %s", self.name, code)
 
-                self._sleep(self.retry_interval)
+                # В рабочем состоянии опрашиваем раз в check_interval (с адаптивным ростом),
+                # при подозрении на сбой и во время инцидента — раз в retry_interval
+                if not self.in_incident and status:
+                    self._sleep(self.interval.stable())
+                else:
+                    self._sleep(self.interval.suspect())
         except Exception as e:
             self.logger.error("%s — ошибка в потоке: %s", self.name, e)
         finally:
@@ -84,7 +109,7 @@ class MonitorThread(threading.Thread):
                 return False
 
             # Проверяем состояние точки
-            status, code, _ = self.endpoint.check_status()
+            status, code, _ = self._probe()
             self.logger.debug("%s — попытка %d: код %s, ожидаем %s", \
                               self.name, attempt + 1, code, expected)
 
@@ -102,6 +127,11 @@ class MonitorThread(threading.Thread):
         self.logger.debug("%s — устойчивое состояние НЕ достигнуто (%s)", self.name, expected)
         return False
 
+    def _probe(self):
+        """Выполняет одну проверку точки и учитывает ее в счетчике частоты."""
+        self.counter.record()
+        return self.endpoint.check_status()
+
     def _sleep(self, seconds: int, max_seconds: int = 5):
         """
         Усыпляет поток на заданное количество секунд с проверкой флага остановки.
@@ -116,5 +146,6 @@ class MonitorThread(threading.Thread):
         remaining_time = seconds
         while remaining_time > 0 and not self._stop_event.is_set():
             sleep_time = min(remaining_time, max_seconds)
-            time.sleep(sleep_time)
+            # Ожидание события прерывается сразу при остановке (удаление точки при перечитывании)
+            self._stop_event.wait(sleep_time)
             remaining_time -= sleep_time
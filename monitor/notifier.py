@@ -1,6 +1,7 @@
 """monitor/notifier.py - Абстрактный класс уведомителя"""
 
 from abc import ABC, abstractmethod
+from typing import Any, Coroutine
 from monitor.incident import Incident
 
 class Notifier(ABC):
@@ -24,3 +25,18 @@ class Notifier(ABC):
     @abstractmethod
     async def notify_info(self, message: str):
         """Уведомить о системном событии (например, запуск, остановка, сбой)."""
+
+    @abstractmethod
+    def send_task(self, coro: Coroutine[Any, Any, Any]):
+        """Запустить корутину уведомления из потока опроса."""
+
+    def submit_incident(self, incident: Incident):
+        """
+        Передать событие открытия инцидента из потока опроса.
+        Реализации могут объединять события; по умолчанию уведомление отправляется сразу.
+        """
+        self.send_task(self.notify_incident(incident))
+
+    def submit_recovery(self, incident: Incident):
+        """Передать событие завершения инцидента из потока опроса."""
+        self.send_task(self.notify_recovery(incident))
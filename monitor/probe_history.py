@@ -0,0 +1,187 @@
+"""monitor/probe_history.py - История последних проверок точки в компактных массивах"""
+
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Число последних проверок, хранимых для точки по умолчанию
+DEFAULT_HISTORY_SIZE = 1000
+# Ширина спарклайна по умолчанию (символов)
+DEFAULT_SPARKLINE_WIDTH = 20
+# Символы спарклайна задержки и отметка отрезка со сбоем
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+SPARK_FAILURE = "×"
+# Предельные значения 16-битных полей: промежуток между проверками (секунды)
+# и задержка (миллисекунды); UNKNOWN_LATENCY — задержка неизвестна
+MAX_GAP = 0xFFFF
+MAX_LATENCY_MS = 0xFFFE
+UNKNOWN_LATENCY = 0xFFFF
+
+# Проверка: время (секунды эпохи), код ответа, успех, задержка (секунды или None)
+Sample = Tuple[int, int, bool, Optional[float]]
+
+
+class ProbeHistory:
+    """
+    Кольцевой буфер последних проверок одной точки.
+    Вместо списка словарей проверки хранятся в трех массивах array
+    по 2 байта на поле — 6 байт на проверку, поэтому 10 000 точек
+    по 1000 проверок занимают около 60 МБ:
+
+    - gaps — секунды от предыдущей проверки (время восстанавливается
+      от времени последней проверки; промежутки длиннее 18 часов
+      записываются как 18 часов);
+    - codes — код ответа со знаком: n > 0 — успешная проверка с кодом n,
+      n <= 0 — сбой с кодом -n - 1 (-1 — ошибка соединения);
+    - latency — задержка в миллисекундах (до 65 с).
+
+    Массивы растут до size записей, затем новая запись заменяет самую старую.
+    Потокобезопасен.
+    """
+
+    __slots__ = ("size", "_gaps", "_codes", "_latency", "_next", "_last", "_lock")
+
+    def __init__(self, size: int = DEFAULT_HISTORY_SIZE):
+        """
+        :param size: число хранимых проверок
+        """
+        self.size = size
+        self._gaps = array("H")
+        self._codes = array("h")
+        self._latency = array("H")
+        # Позиция, в которую попадет следующая запись заполненного буфера (самая старая)
+        self._next = 0
+        # Время последней проверки (секунды эпохи)
+        self._last: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def append(self, timestamp: float, code: int, ok: bool, latency: Optional[float]):
+        """
+        Добавляет проверку, вытесняя самую старую при заполненном буфере.
+
+        :param timestamp: время начала проверки (секунды эпохи)
+        :param code: код ответа (-1 — ошибка соединения)
+        :param ok: проверка успешна
+        :param latency: задержка ответа (секунды) или None
+        """
+        second = int(timestamp)
+        stored_code = code if ok and code > 0 else -code - 1
+        stored_latency = UNKNOWN_LATENCY if latency is None \
+            else min(int(latency * 1000 + 0.5), MAX_LATENCY_MS)
+        with self._lock:
+            gap = 0 if self._last is None else min(max(second - self._last, 0), MAX_GAP)
+            self._last = second if self._last is None else self._last + gap
+            if len(self._codes) < self.size:
+                self._gaps.append(gap)
+                self._codes.append(stored_code)
+                self._latency.append(stored_latency)
+                return
+            self._gaps[self._next] = gap
+            self._codes[self._next] = stored_code
+            self._latency[self._next] = stored_latency
+            self._next = (self._next + 1) % self.size
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._codes)
+
+    def nbytes(self) -> int:
+        """Возвращает объем данных массивов (байты)."""
+        with self._lock:
+            return sum(len(column) * column.itemsize \
+                       for column in (self._gaps, self._codes, self._latency))
+
+    def samples(self, since: Optional[float] = None) -> List[Sample]:
+        """
+        Возвращает проверки от старых к новым.
+
+        :param since: только проверки не раньше этого времени (секунды эпохи)
+        :return: список (время, код, успех, задержка в секундах или None)
+        """
+        with self._lock:
+            count = len(self._codes)
+            result: List[Sample] = []
+            timestamp = self._last
+            for offset in range(count):
+                index = (self._next - 1 - offset) % count
+                if since is not None and timestamp < since:
+                    break
+                stored_code = self._codes[index]
+                stored_latency = self._latency[index]
+                result.append((timestamp, stored_code if stored_code > 0 else -stored_code - 1, \
+                               stored_code > 0, None if stored_latency == UNKNOWN_LATENCY \
+                               else stored_latency / 1000))
+                timestamp -= self._gaps[index]
+        result.reverse()
+        return result
+
+    def summary(self, since: Optional[float] = None, \
+                width: int = DEFAULT_SPARKLINE_WIDTH) -> Dict[str, object]:
+        """
+        Возвращает сводку по проверкам: число проверок, доля успешных (%),
+        медиана задержки (секунды), время первой и последней проверки и спарклайн.
+
+        :param since: только проверки не раньше этого времени (секунды эпохи)
+        :param width: ширина спарклайна
+        """
+        samples = self.samples(since)
+        ok = sum(1 for sample in samples if sample[2])
+        latencies = sorted(sample[3] for sample in samples if sample[3] is not None)
+        return {
+            "count": len(samples),
+            "uptime": round(ok * 100 / len(samples), 2) if samples else None,
+            "p50": latencies[(len(latencies) - 1) // 2] if latencies else None,
+            "first": samples[0][0] if samples else None,
+            "last": samples[-1][0] if samples else None,
+            "sparkline": sparkline(samples, width),
+        }
+
+
+def sparkline(samples: List[Sample], width: int = DEFAULT_SPARKLINE_WIDTH) -> str:
+    """
+    Строит спарклайн задержки: проверки делятся на width отрезков подряд,
+    высота символа — средняя задержка отрезка относительно самого медленного,
+    отрезок с хотя бы одним сбоем отмечается символом SPARK_FAILURE.
+
+    :param samples: проверки от старых к новым
+    :param width: число символов
+    :return: строка спарклайна (пустая, если проверок нет)
+    """
+    if not samples:
+        return ""
+    width = min(width, len(samples))
+    buckets = []
+    for number in range(width):
+        chunk = samples[number * len(samples) // width:(number + 1) * len(samples) // width]
+        latencies = [sample[3] for sample in chunk if sample[3] is not None]
+        failed = not all(sample[2] for sample in chunk)
+        buckets.append((failed, sum(latencies) / len(latencies) if latencies else 0.0))
+    top = max(mean for _, mean in buckets) or 1.0
+    levels = len(SPARK_CHARS) - 1
+    return "".join(SPARK_FAILURE if failed else SPARK_CHARS[round(mean / top * levels)] \
+                   for failed, mean in buckets)
+
+
+def history_report(endpoints: Iterable, name: Optional[str] = None, \
+                   since: Optional[float] = None) -> Optional[Dict[str, object]]:
+    """
+    Формирует отчет об истории проверок для API (/uptime).
+
+    :param endpoints: точки мониторинга (учитываются только хранящие историю проверок)
+    :param name: имя точки — сводка и сами проверки одной точки; None — сводки всех точек
+    :param since: только проверки не раньше этого времени (секунды эпохи)
+    :return: {имя: сводка} или сводка точки name с ключом samples; None — точка не найдена
+    """
+    report: Dict[str, object] = {}
+    for endpoint in endpoints:
+        history = getattr(endpoint, "history", None)
+        if history is None:
+            continue
+        if name is None:
+            report[endpoint.get_name()] = history.summary(since)
+        elif endpoint.get_name() == name:
+            summary = history.summary(since)
+            summary["samples"] = [{"time": timestamp, "code": code, "ok": ok, "latency": latency} \
+                                  for timestamp, code, ok, latency in history.samples(since)]
+            return summary
+    return report if name is None else None
@@ -0,0 +1,92 @@
+"""monitor/probe_rate.py - Счетчики фактической частоты проверок"""
+
+import threading
+import time
+from typing import Dict
+
+
+class ProbeCounter:
+    """
+    Счетчик проверок одной точки.
+    Сравнивает фактическую частоту опроса с частотой при постоянном опросе
+    раз в retry_interval (поведение до введения адаптивного интервала).
+    """
+
+    def __init__(self, name: str, retry_interval: float):
+        self.name = name
+        self.retry_interval = retry_interval
+        self.probes = 0
+        self.started = time.monotonic()
+
+    def record(self):
+        """Учитывает одну проверку."""
+        self.probes += 1
+
+    def rate(self) -> float:
+        """Возвращает фактическое число проверок в минуту."""
+        elapsed = time.monotonic() - self.started
+        return self.probes * 60 / elapsed if elapsed > 0 else 0.0
+
+    def baseline_rate(self) -> float:
+        """Возвращает число проверок в минуту при опросе раз в retry_interval."""
+        return 60 / self.retry_interval if self.retry_interval else 0.0
+
+    def to_dict(self) -> dict:
+        """Преобразует счетчик в словарь для отчетов."""
+        return {
+            "probes": self.probes,
+            "rate": self.rate(),
+            "baseline_rate": self.baseline_rate()
+        }
+
+
+class ProbeRates:
+    """
+    Реестр счетчиков частоты проверок по именам точек.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, ProbeCounter] = {}
+
+    def counter(self, name: str, retry_interval: float) -> ProbeCounter:
+        """Возвращает счетчик точки, создавая его при первом обращении."""
+        with self._lock:
+            counter = self._counters.get(name)
+            if counter is None:
+                counter = ProbeCounter(name, retry_interval)
+                self._counters[name] = counter
+            return counter
+
+    def remove(self, name: str):
+        """Удаляет счетчик точки, исключенной из мониторинга."""
+        with self._lock:
+            self._counters.pop(name, None)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Возвращает счетчики всех точек."""
+        with self._lock:
+            counters = list(self._counters.values())
+        return {counter.name: counter.to_dict() for counter in counters}
+
+    def totals(self) -> Dict[str, float]:
+        """
+        Возвращает суммарную фактическую и базовую частоту (проверок в минуту)
+        и долю сокращения числа запросов.
+        """
+        snapshot = self.snapshot().values()
+        rate = sum(item["rate"] for item in snapshot)
+        baseline = sum(item["baseline_rate"] for item in snapshot)
+        return {
+            "rate": rate,
+            "baseline_rate": baseline,
+            "reduction": 1 - rate / baseline if baseline else 0.0
+        }
+
+
+_probe_rates = ProbeRates()
+
+
+def get_probe_rates() -> ProbeRates:
+    """Возвращает общий реестр счетчиков процесса."""
+    return _probe_rates
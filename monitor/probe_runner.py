@@ -0,0 +1,176 @@
+"""monitor/probe_runner.py - Запуск опроса набора ресурсов выбранным движком"""
+
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from monitor.async_monitor import AsyncMonitor
+from monitor.httpendpoint import HttpEndpoint
+from monitor.metrics import get_metrics
+from monitor.monitor_thread import MonitorThread
+from monitor.probe_rate import get_probe_rates
+from monitor.scheduler import ProbeScheduler
+
+
+class ProbeSet:
+    """
+    Набор опрашиваемых точек с выбранным движком.
+    apply() сравнивает новый список ресурсов с текущим по имени и запускает,
+    останавливает или перенастраивает только изменившиеся точки; опрос
+    остальных точек, их состояние и соединения пула сохраняются.
+    Предоставляет stop и join, как потоки опроса.
+    """
+
+    def __init__(self, logger: logging.Logger, incidents, engine: str = "threads", \
+                 max_concurrency: int = 100, probe_jitter: float = 0.1, \
+                 active: Iterable[str] = ()):
+        """
+        :param logger: логгер
+        :param incidents: получатель событий (register_incident/resolve_incident)
+        :param engine: движок опроса: threads, asyncio или scheduler
+        :param max_concurrency: предел одновременных проверок (asyncio, scheduler)
+        :param probe_jitter: разброс пауз планировщика (scheduler)
+        :param active: имена точек с уже открытым инцидентом: их опрос начинается
+                       с ожидания восстановления
+        """
+        self.logger = logger
+        self.incidents = incidents
+        self._active = set(active)
+        self.engine = None
+        if engine == "asyncio":
+            self.engine = AsyncMonitor(logger, incidents, max_concurrency)
+        elif engine == "scheduler":
+            self.engine = ProbeScheduler(logger, incidents, max_concurrency, probe_jitter)
+
+        self._lock = threading.Lock()
+        self._configs: Dict[str, dict] = {}
+        self._endpoints: Dict[str, HttpEndpoint] = {}
+        self._threads: Dict[str, MonitorThread] = {}
+        self._retired: List[MonitorThread] = []
+
+    def apply(self, resources: List[dict]) -> Dict[str, int]:
+        """
+        Приводит опрос к новому списку ресурсов.
+
+        :param resources: конфигурации ресурсов
+        :return: число добавленных, удаленных, перенастроенных и неизмененных точек
+        """
+        with self._lock:
+            new = {resource_config["name"]: resource_config for resource_config in resources}
+            removed = [name for name in self._configs if name not in new]
+            for name in removed:
+                self._remove(name)
+
+            summary = {"added": 0, "removed": len(removed), "updated": 0, "unchanged": 0}
+            for name, resource_config in new.items():
+                old = self._configs.get(name)
+                if old is None:
+                    self._add(name, resource_config)
+                    summary["added"] += 1
+                elif old != resource_config:
+                    self._update(name, resource_config)
+                    summary["updated"] += 1
+                else:
+                    summary["unchanged"] += 1
+
+            if self.engine is not None and not self.engine.is_alive() \
+                    and self.engine.ident is None:
+                self.engine.start()
+            return summary
+
+    def endpoints(self) -> List[HttpEndpoint]:
+        """Возвращает текущие точки мониторинга."""
+        with self._lock:
+            return list(self._endpoints.values())
+
+    def stop(self):
+        """Останавливает опрос всех точек."""
+        with self._lock:
+            threads = list(self._threads.values())
+        for thread in threads:
+            thread.stop()
+        if self.engine is not None:
+            self.engine.stop()
+
+    def join(self, timeout: Optional[float] = None):
+        """Ждет завершения опроса (в том числе потоков удаленных точек)."""
+        with self._lock:
+            threads = list(self._threads.values()) + self._retired
+            self._retired = []
+        for thread in threads:
+            thread.join(timeout)
+        if self.engine is not None and self.engine.ident is not None:
+            self.engine.join(timeout)
+
+    def _add(self, name: str, resource_config: dict):
+        """Запускает опрос новой точки."""
+        endpoint = HttpEndpoint(resource_config)
+        self._configs[name] = resource_config
+        self._endpoints[name] = endpoint
+        in_incident = name in self._active
+        self._active.discard(name)
+        if self.engine is not None:
+            self.engine.add(endpoint, resource_config, in_incident)
+            return
+        thread = MonitorThread(endpoint, resource_config, self.logger, self.incidents, \
+                               in_incident)
+        thread.start()
+        self._threads[name] = thread
+
+    def _update(self, name: str, resource_config: dict):
+        """
+        Перенастраивает опрос точки, сохраняя ее состояние, историю и время этапов
+        проверок, а при неизменных порогах задержки — и окно их оценки.
+        """
+        endpoint = HttpEndpoint(resource_config)
+        previous = self._endpoints[name]
+        if previous.history.size == endpoint.history.size:
+            endpoint.history = previous.history
+        if previous.timings.size == endpoint.timings.size:
+            endpoint.timings = previous.timings
+        if self._configs[name].get("latency_slo") == resource_config.get("latency_slo"):
+            endpoint.slo = previous.slo
+        self._configs[name] = resource_config
+        self._endpoints[name] = endpoint
+        if self.engine is not None:
+            self.engine.update(endpoint, resource_config)
+        else:
+            self._threads[name].reconfigure(endpoint, resource_config)
+
+    def _remove(self, name: str):
+        """Останавливает опрос точки; ее активный инцидент закрывается без уведомления."""
+        del self._configs[name]
+        del self._endpoints[name]
+        if self.engine is not None:
+            self.engine.remove(name)
+        else:
+            thread = self._threads.pop(name)
+            thread.stop()
+            self._retired.append(thread)
+        get_probe_rates().remove(name)
+        get_metrics().remove(endpoint=name)
+        handoff = getattr(self.incidents, "handoff_incident", None)
+        if handoff is not None:
+            handoff(name)
+
+
+def start_probes(resources: List[dict], logger: logging.Logger, incidents, \
+                 engine: str = "threads", max_concurrency: int = 100, \
+                 probe_jitter: float = 0.1, active: Iterable[str] = ()) \
+        -> Tuple[List[HttpEndpoint], List[ProbeSet]]:
+    """
+    Создает точки мониторинга для ресурсов и запускает их опрос.
+    В режиме threads на каждую точку запускается MonitorThread,
+    в режимах asyncio и scheduler все точки опрашиваются одним движком.
+
+    :param resources: конфигурации ресурсов
+    :param logger: логгер
+    :param incidents: получатель событий (register_incident/resolve_incident)
+    :param engine: движок опроса: threads, asyncio или scheduler
+    :param max_concurrency: предел одновременных проверок (asyncio, scheduler)
+    :param probe_jitter: разброс пауз планировщика (scheduler)
+    :param active: имена точек с уже открытым инцидентом
+    :return: созданные точки и набор опроса (у него есть stop и join, как у потоков)
+    """
+    probes = ProbeSet(logger, incidents, engine, max_concurrency, probe_jitter, active)
+    probes.apply(resources)
+    return probes.endpoints(), [probes]
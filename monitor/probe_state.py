@@ -0,0 +1,155 @@
+"""monitor/probe_state.py - Состояние опроса точки без блокирующих ожиданий"""
+
+import logging
+from typing import Optional
+from monitor.probe_rate import get_probe_rates
+
+# События, возвращаемые ProbeState.observe
+INCIDENT = "incident"
+RECOVERY = "recovery"
+
+
+class AdaptiveInterval:
+    """
+    Адаптивный интервал опроса.
+    В устойчивом рабочем состоянии точка опрашивается раз в check_interval;
+    после каждых backoff_after подряд успешных проверок интервал умножается
+    на backoff_factor, но не превышает max_check_interval.
+    При подозрении на сбой и во время инцидента используется retry_interval,
+    а рост интервала начинается заново.
+    """
+
+    def __init__(self, resource_config: dict):
+        self.check_interval = resource_config['check_interval']
+        self.retry_interval = resource_config['retry_interval']
+        self.max_check_interval = resource_config.get('max_check_interval', self.check_interval)
+        self.backoff_factor = resource_config.get('backoff_factor', 2.0)
+        self.backoff_after = resource_config.get('backoff_after', 10)
+
+        self.current = self.check_interval
+        self._stable_count = 0
+
+    def stable(self) -> float:
+        """Возвращает паузу после успешной проверки в рабочем состоянии."""
+        self._stable_count += 1
+        if self._stable_count >= self.backoff_after and self.current < self.max_check_interval:
+            self.current = min(self.current * self.backoff_factor, self.max_check_interval)
+            self._stable_count = 0
+        return self.current
+
+    def suspect(self) -> float:
+        """Возвращает паузу при подозрении на сбой и сбрасывает рост интервала."""
+        self.current = self.check_interval
+        self._stable_count = 0
+        return self.retry_interval
+
+
+class ProbeState:
+    """
+    Конечный автомат подтверждения сбоя и восстановления для одной точки.
+    Повторяет правила MonitorThread: после первого отклонения от текущего состояния
+    требуется max_attempts подряд подтверждений с интервалом retry_interval.
+    Если очередная проверка не подтверждает отклонение, подтверждение прерывается.
+    """
+
+    def __init__(self, name: str, resource_config: dict, \
+                 logger: Optional[logging.Logger] = None):
+        self.name = name
+        self.logger = logger or logging.getLogger(__name__)
+
+        # Настройки опроса
+        self.check_interval = resource_config['check_interval']
+        self.retry_interval = resource_config['retry_interval']
+        self.max_attempts = resource_config['max_attempts']
+        self.interval = AdaptiveInterval(resource_config)
+        self.counter = get_probe_rates().counter(name, self.retry_interval)
+
+        # Состояние
+        self.in_incident = False
+        self.last_status = True
+        self._expected: Optional[bool] = None
+        self._confirmations = 0
+        self.trigger_code: Optional[int] = None
+        self.trigger_response: Optional[str] = None
+
+    def reconfigure(self, resource_config: dict):
+        """
+        Применяет новые настройки опроса, сохраняя состояние инцидента
+        и начатое подтверждение.
+        """
+        self.check_interval = resource_config['check_interval']
+        self.retry_interval = resource_config['retry_interval']
+        self.max_attempts = resource_config['max_attempts']
+        self.interval = AdaptiveInterval(resource_config)
+        self.counter.retry_interval = self.retry_interval
+
+    @property
+    def confirming(self) -> bool:
+        """True, если идет проверка устойчивости сбоя или восстановления."""
+        return self._expected is not None
+
+    def observe(self, status: bool, code: int, resp: str) -> Optional[str]:
+        """
+        Учитывает результат проверки.
+
+        :param status: успешна ли проверка
+        :param code: код ответа
+        :param resp: текст ответа
+        :return: INCIDENT или RECOVERY при подтвержденной смене состояния, иначе None
+        """
+        self.counter.record()
+        self.last_status = status
+        if self._expected is not None:
+            return self._confirm(status, code)
+
+        if not self.in_incident and not status:
+            self.logger.warning("%s — ошибка %s, %s. Начинаем повторные попытки...", \
+                                self.name, code, resp)
+            self._start(False, code, resp)
+        elif self.in_incident and status:
+            self.logger.info("%s — получен ответ %s, %s. Проверка восстановления...", \
+                             self.name, code, resp)
+            self._start(True, code, resp)
+        else:
+            self.logger.debug("%s — стабильное состояние: код %s", self.name, code)
+        return None
+
+    def next_delay(self) -> float:
+        """
+        Возвращает паузу до следующей проверки.
+        Вызывается один раз после каждой проверки.
+        """
+        if self.confirming or self.in_incident or not self.last_status:
+            return self.interval.suspect()
+        return self.interval.stable()
+
+    def _start(self, expected: bool, code: int, resp: str):
+        """Начинает проверку устойчивости, запоминая исходный ответ."""
+        self._expected = expected
+        self._confirmations = 0
+        self.trigger_code = code
+        self.trigger_response = resp
+
+    def _confirm(self, status: bool, code: int) -> Optional[str]:
+        """Обрабатывает очередную попытку подтверждения."""
+        expected = self._expected
+        self.logger.debug("%s — попытка %d: код %s, ожидаем %s", \
+                          self.name, self._confirmations + 1, code, expected)
+        if status != expected:
+            self.logger.debug("%s — устойчивое состояние НЕ достигнуто (%s)", self.name, expected)
+            self._expected = None
+            return None
+
+        self._confirmations += 1
+        if self._confirmations < self.max_attempts:
+            return None
+
+        self.logger.debug("%s — устойчивое состояние достигнуто (%s)", self.name, expected)
+        self._expected = None
+        if expected:
+            self.logger.warning("%s — инцидент закрыт. Устойчивое восстановление.", self.name)
+            self.in_incident = False
+            return RECOVERY
+        self.logger.warning("%s — подтвержденный сбой. Открываем инцидент.", self.name)
+        self.in_incident = True
+        return INCIDENT
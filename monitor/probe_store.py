@@ -0,0 +1,371 @@
+"""monitor/probe_store.py - Хранилище результатов проверок со сверткой по минутам и часам"""
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from monitor.metrics import COUNTER, MetricsRegistry
+
+# Файл хранилища по умолчанию
+DEFAULT_PROBE_STORE_PATH = "logs/probes.sqlite"
+# Сроки хранения по умолчанию (сутки): проверки, минутная и часовая свертка
+DEFAULT_RAW_DAYS = 2
+DEFAULT_MINUTE_DAYS = 31
+DEFAULT_HOUR_DAYS = 400
+# Максимальное число проверок в одной групповой записи
+DEFAULT_BATCH_SIZE = 1000
+# Максимальное число проверок, ожидающих записи
+DEFAULT_QUEUE_SIZE = 100000
+# Как часто записывать в лог число отброшенных проверок (каждая N-я)
+DROP_LOG_EVERY = 1000
+# Как часто поток записи удаляет устаревшие данные (секунды)
+PURGE_INTERVAL = 3600
+# Уровни свертки от крупного к мелкому: шаг (секунды) и таблица
+ROLLUPS = ((3600, "probes_1h"), (60, "probes_1m"))
+RAW_TABLE = "probes_raw"
+
+# Проверка: имя точки, время (секунды эпохи), код ответа, успех, задержка (секунды или None)
+ProbeSample = Tuple[str, float, int, bool, Optional[float]]
+
+
+class ProbeStore:
+    """
+    Хранилище результатов проверок в файле SQLite.
+    Каждая проверка записывается в таблицу probes_raw и одновременно
+    добавляется к минутной (probes_1m) и часовой (probes_1h) свертке:
+    число проверок, число успешных, сумма и максимум задержки.
+    Запрос за период складывает целые часы из часовой свертки, края периода —
+    из минутной, остаток (меньше минуты) — из проверок, поэтому доступность
+    за месяц считается по сотням строк, а не по всем проверкам.
+    У каждого уровня свой срок хранения (purge).
+    """
+
+    def __init__(self, path: str = DEFAULT_PROBE_STORE_PATH, raw_days: float = DEFAULT_RAW_DAYS, \
+                 minute_days: float = DEFAULT_MINUTE_DAYS, hour_days: float = DEFAULT_HOUR_DAYS):
+        """
+        :param path: путь к файлу SQLite
+        :param raw_days: срок хранения проверок (сутки)
+        :param minute_days: срок хранения минутной свертки (сутки)
+        :param hour_days: срок хранения часовой свертки (сутки)
+        """
+        self.path = path
+        self.retention = {RAW_TABLE: raw_days * 86400, "probes_1m": minute_days * 86400, \
+                          "probes_1h": hour_days * 86400}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._ids: Dict[str, int] = {}
+        # Запись и чтение идут через разные соединения: в режиме WAL
+        # запросы не ждут групповой записи
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self._read_lock = threading.Lock()
+        self._reader = self._connect()
+        self._conn.execute("CREATE TABLE IF NOT EXISTS endpoints "
+                           "(id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {RAW_TABLE} "
+                           "(endpoint INTEGER NOT NULL, ts REAL NOT NULL, code INTEGER NOT NULL, "
+                           "ok INTEGER NOT NULL, latency REAL)")
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {RAW_TABLE}_endpoint_ts "
+                           f"ON {RAW_TABLE} (endpoint, ts)")
+        for _, table in ROLLUPS:
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS {table} "
+                               "(endpoint INTEGER NOT NULL, bucket INTEGER NOT NULL, "
+                               "count INTEGER NOT NULL, ok INTEGER NOT NULL, "
+                               "latency_sum REAL NOT NULL, latency_count INTEGER NOT NULL, "
+                               "latency_max REAL NOT NULL, PRIMARY KEY (endpoint, bucket)) "
+                               "WITHOUT ROWID")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Открывает соединение с файлом хранилища."""
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, \
+                               check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Выполняет операции записи в одной транзакции."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _endpoint_id(self, conn: sqlite3.Connection, name: str) -> int:
+        """Возвращает идентификатор точки, добавляя ее при первой записи."""
+        endpoint = self._ids.get(name)
+        if endpoint is None:
+            conn.execute("INSERT OR IGNORE INTO endpoints (name) VALUES (?)", (name,))
+            endpoint = conn.execute("SELECT id FROM endpoints WHERE name = ?", \
+                                    (name,)).fetchone()[0]
+            self._ids[name] = endpoint
+        return endpoint
+
+    def write_batch(self, samples: List[ProbeSample]):
+        """
+        Записывает проверки и обновляет свертки одной транзакцией.
+        Проверки пачки сначала складываются по минутам и часам,
+        поэтому на каждую строку свертки приходится одно обновление.
+
+        :param samples: проверки (имя, время, код, успех, задержка)
+        """
+        with self._transaction() as conn:
+            raw = []
+            rollups: Dict[str, Dict[Tuple[int, int], List[float]]] = \
+                {table: {} for _, table in ROLLUPS}
+            for name, timestamp, code, ok, latency in samples:
+                endpoint = self._endpoint_id(conn, name)
+                raw.append((endpoint, timestamp, code, int(ok), latency))
+                for step, table in ROLLUPS:
+                    row = rollups[table].setdefault((endpoint, int(timestamp // step * step)), \
+                                                    [0, 0, 0.0, 0, 0.0])
+                    row[0] += 1
+                    row[1] += int(ok)
+                    if latency is not None:
+                        row[2] += latency
+                        row[3] += 1
+                        row[4] = max(row[4], latency)
+            conn.executemany(f"INSERT INTO {RAW_TABLE} (endpoint, ts, code, ok, latency) "
+                             "VALUES (?, ?, ?, ?, ?)", raw)
+            for table, rows in rollups.items():
+                conn.executemany(
+                    f"INSERT INTO {table} VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(endpoint, bucket) DO UPDATE SET "
+                    "count = count + excluded.count, ok = ok + excluded.ok, "
+                    "latency_sum = latency_sum + excluded.latency_sum, "
+                    "latency_count = latency_count + excluded.latency_count, "
+                    "latency_max = max(latency_max, excluded.latency_max)", \
+                    [key + tuple(values) for key, values in rows.items()])
+
+    def purge(self, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Удаляет данные старше срока хранения своего уровня.
+        Удаление идет по индексу (точка, время) каждой точки.
+
+        :param now: текущее время (секунды эпохи)
+        :return: число удаленных строк по таблицам
+        """
+        now = time.time() if now is None else now
+        deleted = {}
+        with self._transaction() as conn:
+            endpoints = [row[0] for row in conn.execute("SELECT id FROM endpoints")]
+            for table, retention in self.retention.items():
+                column = "ts" if table == RAW_TABLE else "bucket"
+                cursor = conn.executemany(f"DELETE FROM {table} "
+                                          f"WHERE endpoint = ? AND {column} < ?", \
+                                          [(endpoint, now - retention) for endpoint in endpoints])
+                deleted[table] = cursor.rowcount
+        return deleted
+
+    def names(self) -> List[str]:
+        """Возвращает имена точек, для которых есть записи."""
+        with self._read_lock:
+            return [row[0] for row in self._reader.execute("SELECT name FROM endpoints "
+                                                           "ORDER BY name")]
+
+    def availability(self, name: str, since: float, \
+                     until: Optional[float] = None) -> Optional[Dict[str, object]]:
+        """
+        Возвращает доступность и задержку точки за период.
+
+        :param name: имя точки
+        :param since: начало периода (секунды эпохи)
+        :param until: конец периода (по умолчанию — сейчас)
+        :return: словарь count, ok, availability (%), latency_avg и latency_max (секунды)
+                 или None, если для точки нет записей
+        """
+        until = time.time() if until is None else until
+        totals = [0, 0, 0.0, 0, 0.0]
+        with self._read_lock:
+            row = self._reader.execute("SELECT id FROM endpoints WHERE name = ?", \
+                                       (name,)).fetchone()
+            if row is None:
+                return None
+            for table, start, end in plan_ranges(since, until):
+                if table == RAW_TABLE:
+                    query = (f"SELECT count(*), sum(ok), sum(latency), count(latency), "
+                             f"max(latency) FROM {RAW_TABLE} "
+                             "WHERE endpoint = ? AND ts >= ? AND ts < ?")
+                else:
+                    query = (f"SELECT sum(count), sum(ok), sum(latency_sum), sum(latency_count), "
+                             f"max(latency_max) FROM {table} "
+                             "WHERE endpoint = ? AND bucket >= ? AND bucket < ?")
+                values = self._reader.execute(query, (row[0], start, end)).fetchone()
+                for index in range(4):
+                    totals[index] += values[index] or 0
+                totals[4] = max(totals[4], values[4] or 0.0)
+        count, ok, latency_sum, latency_count, latency_max = totals
+        return {
+            "count": count,
+            "ok": ok,
+            "availability": round(ok * 100 / count, 3) if count else None,
+            "latency_avg": latency_sum / latency_count if latency_count else None,
+            "latency_max": latency_max if latency_count else None,
+        }
+
+    def close(self):
+        """Закрывает соединения с хранилищем."""
+        with self._lock:
+            self._conn.close()
+        with self._read_lock:
+            self._reader.close()
+
+
+def plan_ranges(since: float, until: float, rollups=ROLLUPS) -> List[Tuple[str, float, float]]:
+    """
+    Разбивает период на части для запроса: целые интервалы крупного уровня
+    свертки, края — следующим уровнем, остаток — по проверкам.
+
+    :param since: начало периода
+    :param until: конец периода (не включается)
+    :param rollups: уровни свертки от крупного к мелкому
+    :return: список (таблица, начало, конец)
+    """
+    if since >= until:
+        return []
+    if not rollups:
+        return [(RAW_TABLE, since, until)]
+    step, table = rollups[0]
+    start = -(-since // step) * step
+    end = until // step * step
+    if start >= end:
+        return plan_ranges(since, until, rollups[1:])
+    return plan_ranges(since, start, rollups[1:]) + [(table, start, end)] \
+        + plan_ranges(end, until, rollups[1:])
+
+
+class ProbeStoreWriter(threading.Thread):
+    """
+    Фоновая запись проверок в хранилище.
+    Проверки только кладут результат в очередь; поток записи забирает
+    все накопившиеся проверки (до batch_size) и пишет их одной транзакцией,
+    раз в PURGE_INTERVAL удаляя устаревшие данные. Очередь ограничена queue_size:
+    если хранилище не успевает (файл заблокирован другим процессом), новые
+    проверки отбрасываются и учитываются в dropped.
+    """
+
+    _STOP = object()
+
+    def __init__(self, store: ProbeStore, batch_size: int = DEFAULT_BATCH_SIZE, \
+                 logger: Optional[logging.Logger] = None, \
+                 queue_size: int = DEFAULT_QUEUE_SIZE):
+        """
+        :param store: хранилище проверок
+        :param batch_size: максимальное число проверок в одной групповой записи
+        :param logger: логгер
+        :param queue_size: максимальное число проверок, ожидающих записи
+        """
+        super().__init__(daemon=True, name="ProbeStoreWriter")
+        self.store = store
+        self.batch_size = batch_size
+        self.logger = logger or logging.getLogger(__name__)
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._next_purge = time.monotonic()
+
+    def submit(self, name: str, timestamp: float, code: int, ok: bool, \
+               latency: Optional[float]) -> bool:
+        """
+        Ставит проверку в очередь на запись (не блокирует вызывающий поток).
+
+        :return: False, если очередь переполнена и проверка отброшена
+        """
+        try:
+            self._queue.put_nowait((name, timestamp, code, ok, latency))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % DROP_LOG_EVERY == 1:
+                self.logger.warning("Очередь записи проверок переполнена — проверка пропущена "
+                                    "(%d)", self.dropped)
+            return False
+
+    def depth(self) -> int:
+        """Возвращает число проверок, ожидающих записи."""
+        return self._queue.qsize()
+
+    def register_metrics(self, registry: MetricsRegistry):
+        """Публикует глубину очереди записи и число отброшенных проверок."""
+        registry.register_callback("ct_probe_store_queue_depth", \
+                                   "Число проверок, ожидающих записи в хранилище", self.depth)
+        registry.register_callback("ct_probe_store_dropped_total", \
+                                   "Число проверок, отброшенных при переполнении очереди записи", \
+                                   lambda: self.dropped, COUNTER)
+
+    def flush(self):
+        """Ждет, пока все поставленные в очередь проверки будут записаны."""
+        if self.is_alive():
+            self._queue.join()
+
+    def stop(self):
+        """Записывает оставшиеся проверки, останавливает поток и закрывает хранилище."""
+        if self.is_alive():
+            self._queue.put(self._STOP)
+            self.join()
+        self.store.close()
+
+    def run(self):
+        """Цикл групповой записи."""
+        stopping = False
+        while not stopping:
+            try:
+                batch = [self._queue.get(timeout=PURGE_INTERVAL)]
+            except queue.Empty:
+                batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            samples = [item for item in batch if item is not self._STOP]
+            stopping = len(samples) != len(batch)
+            try:
+                if samples:
+                    self.store.write_batch(samples)
+                if time.monotonic() >= self._next_purge:
+                    self._next_purge = time.monotonic() + PURGE_INTERVAL
+                    self.store.purge()
+            except sqlite3.Error as e:
+                self.logger.error("Ошибка записи хранилища проверок: %s", e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+_probe_store: Optional[ProbeStoreWriter] = None
+
+
+def get_probe_store() -> Optional[ProbeStoreWriter]:
+    """Возвращает запись в хранилище проверок процесса (None, если хранилище не настроено)."""
+    return _probe_store
+
+
+def start_probe_store(settings: Dict[str, object], \
+                      logger: Optional[logging.Logger] = None) -> ProbeStoreWriter:
+    """
+    Открывает хранилище проверок, запускает поток записи и делает его общим
+    для процесса: HttpEndpoint передает в него результат каждой проверки.
+
+    :param settings: настройки probe_store (path, raw_days, minute_days, hour_days, batch_size,
+                     queue_size)
+    :param logger: логгер
+    :return: запущенный поток записи (у него есть stop и join)
+    """
+    global _probe_store  # pylint: disable=global-statement
+    store = ProbeStore(settings.get("path", DEFAULT_PROBE_STORE_PATH), \
+                       settings.get("raw_days", DEFAULT_RAW_DAYS), \
+                       settings.get("minute_days", DEFAULT_MINUTE_DAYS), \
+                       settings.get("hour_days", DEFAULT_HOUR_DAYS))
+    _probe_store = ProbeStoreWriter(store, settings.get("batch_size", DEFAULT_BATCH_SIZE), logger, \
+                                    settings.get("queue_size", DEFAULT_QUEUE_SIZE))
+    _probe_store.start()
+    return _probe_store
@@ -0,0 +1,161 @@
+"""monitor/probe_timing.py - Время этапов HTTP-проверки"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Этапы проверки в порядке выполнения
+PHASES = ("dns", "connect", "tls", "ttfb", "download", "extract")
+# Границы корзин гистограмм времени этапов (секунды): от 1 мс до 10 с
+PHASE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Число последних проверок, хранимых для точки по умолчанию
+DEFAULT_TIMING_HISTORY = 100
+
+_current = threading.local()
+# Получатель записей всех проверок процесса (процесс опроса передает их координатору)
+_listener: Optional[Callable[[str, "ProbeTiming"], None]] = None
+
+
+class ProbeTiming:
+    """
+    Время этапов одной проверки (секунды):
+    dns — разрешение имени, connect — TCP-подключение, tls — TLS-рукопожатие,
+    ttfb — от отправки запроса до получения заголовков ответа, download — чтение тела,
+    extract — извлечение текста из ответа. Этап, которого не было (соединение взято
+    из пула, текст не извлекался), равен 0; None — время этапа не удалось измерить.
+    """
+
+    __slots__ = ("started", "dns", "connect", "tls", "ttfb", "download", "extract", \
+                 "total", "code", "ok", "reused")
+
+    def __init__(self):
+        self.started = time.time()
+        self.dns: Optional[float] = 0.0
+        self.connect = 0.0
+        self.tls = 0.0
+        self.ttfb = 0.0
+        self.download = 0.0
+        self.extract = 0.0
+        self.total = 0.0
+        self.code = -1
+        self.ok = False
+        # Запрос выполнен по уже открытому соединению
+        self.reused = True
+
+    def network(self) -> float:
+        """Возвращает время установки соединения (DNS, TCP и TLS)."""
+        return (self.dns or 0.0) + self.connect + self.tls
+
+    def to_dict(self) -> Dict[str, object]:
+        """Преобразует запись в словарь (время этапов в миллисекундах)."""
+        data: Dict[str, object] = {"started": self.started, "code": self.code, \
+                                   "ok": self.ok, "reused": self.reused}
+        for phase in PHASES + ("total",):
+            value = getattr(self, phase)
+            data[f"{phase}_ms"] = None if value is None else round(value * 1000, 2)
+        return data
+
+    def __str__(self):
+        parts = []
+        for phase in PHASES:
+            value = getattr(self, phase)
+            parts.append(f"{phase} {'?' if value is None else f'{value * 1000:.0f}'}")
+        return f"{self.total * 1000:.0f} мс ({', '.join(parts)})"
+
+
+def current() -> Optional[ProbeTiming]:
+    """Возвращает запись, которую заполняет проверка в текущем потоке (или None)."""
+    return getattr(_current, "timing", None)
+
+
+@contextmanager
+def recording(timing: ProbeTiming) -> Iterator[ProbeTiming]:
+    """
+    Делает timing текущей записью потока: соединения urllib3 записывают
+    в нее время DNS, подключения и TLS-рукопожатия.
+    """
+    previous = current()
+    _current.timing = timing
+    try:
+        yield timing
+    finally:
+        _current.timing = previous
+
+
+class TimingRing:
+    """
+    Кольцевой буфер последних записей времени проверок одной точки.
+    Потокобезопасен.
+    """
+
+    def __init__(self, size: int = DEFAULT_TIMING_HISTORY):
+        """
+        :param size: число хранимых записей
+        """
+        self._items: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Число хранимых записей."""
+        return self._items.maxlen
+
+    def append(self, timing: ProbeTiming):
+        """Добавляет запись, вытесняя самую старую."""
+        with self._lock:
+            self._items.append(timing)
+
+    def last(self) -> Optional[ProbeTiming]:
+        """Возвращает последнюю запись (или None)."""
+        with self._lock:
+            return self._items[-1] if self._items else None
+
+    def items(self) -> List[ProbeTiming]:
+        """Возвращает записи от старых к новым."""
+        with self._lock:
+            return list(self._items)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def quantiles(self, q: float = 0.5) -> Dict[str, Optional[float]]:
+        """
+        Возвращает квантиль q времени каждого этапа и общего времени по буферу.
+
+        :return: словарь {этап: секунды или None, если данных нет}
+        """
+        items = self.items()
+        result: Dict[str, Optional[float]] = {}
+        for phase in PHASES + ("total",):
+            values = sorted(value for value in (getattr(t, phase) for t in items) \
+                            if value is not None)
+            result[phase] = values[min(int(q * len(values)), len(values) - 1)] \
+                if values else None
+        return result
+
+
+def set_timing_listener(listener: Optional[Callable[[str, ProbeTiming], None]]):
+    """
+    Устанавливает получателя записей времени всех проверок процесса
+    listener(имя точки, запись) (None — отключить).
+    """
+    global _listener  # pylint: disable=global-statement
+    _listener = listener
+
+
+def get_timing_listener() -> Optional[Callable[[str, ProbeTiming], None]]:
+    """Возвращает получателя записей времени проверок (None, если не установлен)."""
+    return _listener
+
+
+def last_timing(endpoint) -> Optional[dict]:
+    """
+    Возвращает время этапов последней проверки точки для записи инцидента
+    (None, если точка не хранит время проверок).
+    """
+    timings = getattr(endpoint, "timings", None)
+    timing = timings.last() if timings is not None else None
+    return timing.to_dict() if timing is not None else None
@@ -0,0 +1,69 @@
+"""monitor/reload.py - Перечитывание конфигурации без перезапуска опроса"""
+
+import logging
+import signal
+import threading
+import time
+from typing import Dict, Optional
+from monitor.config import ConfigLoader, ConfigError
+from monitor.probe_runner import ProbeSet
+
+
+class ConfigReloader:
+    """
+    Перечитывает config.json и применяет изменения списка ресурсов к набору опроса:
+    запускаются только новые точки, останавливаются удаленные, перенастраиваются
+    измененные. Вызывается по SIGHUP или командой /reload.
+    """
+
+    def __init__(self, probes: ProbeSet, incidents=None, \
+                 logger: Optional[logging.Logger] = None, \
+                 overrides: Optional[dict] = None):
+        """
+        :param probes: набор опрашиваемых точек
+        :param incidents: менеджер инцидентов (получает новый список точек)
+        :param logger: логгер
+        :param overrides: параметры, подставляемые в каждый ресурс (режим --test)
+        """
+        self.probes = probes
+        self.incidents = incidents
+        self.logger = logger or logging.getLogger(__name__)
+        self.overrides = overrides or {}
+        self._lock = threading.Lock()
+
+    def reload(self) -> Dict[str, int]:
+        """
+        Перечитывает конфигурацию и применяет изменения ресурсов.
+
+        :return: число добавленных, удаленных, перенастроенных и неизмененных точек
+        :raises ConfigError: если новая конфигурация некорректна (опрос не меняется)
+        """
+        with self._lock:
+            started = time.monotonic()
+            config_loader = ConfigLoader()
+            config_loader.load()
+            resources = [{**resource_config, **self.overrides} \
+                         for resource_config in config_loader.get_resources()]
+            summary = self.probes.apply(resources)
+            if self.incidents:
+                self.incidents.set_endpoints(self.probes.endpoints())
+            self.logger.info("Конфигурация перечитана за %.2f с: %s", \
+                             time.monotonic() - started, summary)
+            return summary
+
+    def install_signal_handler(self):
+        """
+        Перечитывает конфигурацию по SIGHUP (в отдельном потоке, чтобы не задерживать
+        основной поток). Вызывается из основного потока; на платформах без SIGHUP ничего не делает.
+        """
+        if not hasattr(signal, "SIGHUP"):
+            return
+        signal.signal(signal.SIGHUP, lambda _signum, _frame: threading.Thread(
+            target=self._reload_logged, daemon=True, name="ConfigReload").start())
+
+    def _reload_logged(self):
+        """Перечитывает конфигурацию, записывая ошибку в лог."""
+        try:
+            self.reload()
+        except ConfigError as e:
+            self.logger.error("Конфигурация не перечитана: %s", e)
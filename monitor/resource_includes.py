@@ -0,0 +1,214 @@
+"""monitor/resource_includes.py - Загрузка ресурсов из подключаемых файлов"""
+
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from jsonschema import SchemaError, ValidationError
+from monitor.schema import get_validator, parse_json
+
+# Путь к описанию списка ресурсов внутри схемы конфигурации
+RESOURCES_POINTER = ("properties", "resources")
+# Расширения подключаемых файлов при указании каталога
+INCLUDE_SUFFIXES = (".json", ".jsonl")
+# Разбирать файлы в отдельных процессах, если изменилось не меньше стольких файлов...
+PARALLEL_MIN_FILES = 2
+# ...и их общий размер не меньше этого (байты): иначе запуск процессов и передача
+# результатов обходятся дороже самого разбора
+PARALLEL_MIN_BYTES = 8 << 20
+
+# Разобранные файлы: путь -> (хэш содержимого и схемы, ресурсы)
+_CACHE: Dict[str, Tuple[str, List[dict]]] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+class IncludeError(Exception):
+    """Исключение, выбрасываемое при ошибке чтения или валидации подключаемого файла."""
+
+
+def expand_includes(patterns: Iterable[str], base_dir: Path) -> List[Path]:
+    """
+    Раскрывает список подключаемых файлов: путь к файлу, каталог
+    (все *.json и *.jsonl в нем) или шаблон glob (поддерживается **).
+    Относительные пути отсчитываются от каталога config.json.
+
+    :param patterns: пути и шаблоны из resource_includes
+    :param base_dir: каталог config.json
+    :return: файлы в порядке шаблонов, внутри шаблона — по имени, без повторов
+    :raises IncludeError: если по пути или шаблону не найдено ни одного файла
+    """
+    files: List[Path] = []
+    seen = set()
+    for pattern in patterns:
+        full = Path(os.path.expanduser(pattern))
+        if not full.is_absolute():
+            full = base_dir / full
+        if full.is_dir():
+            matches = [path for path in full.iterdir() \
+                       if path.is_file() and path.suffix in INCLUDE_SUFFIXES]
+        else:
+            matches = [Path(path) for path in glob.glob(str(full), recursive=True) \
+                       if os.path.isfile(path)]
+        if not matches:
+            raise IncludeError(f"Не найдено файлов ресурсов: {pattern}")
+        for path in sorted(matches):
+            key = str(path.resolve())
+            if key not in seen:
+                seen.add(key)
+                files.append(path)
+    return files
+
+
+def _digest(raw: bytes, schema_stamp: str) -> str:
+    """Возвращает хэш содержимого файла вместе с версией схемы."""
+    digest = hashlib.blake2b(raw, digest_size=16)
+    digest.update(schema_stamp.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _cpu_count() -> int:
+    """Возвращает число доступных процессу ядер."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _schema_stamp(schema_path: Optional[Path]) -> str:
+    """Возвращает версию схемы (время модификации и размер) для ключа кэша."""
+    if not schema_path:
+        return ""
+    stat = Path(schema_path).stat()
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def parse_include(path: Path, raw: bytes) -> Tuple[List[dict], List[int]]:
+    """
+    Разбирает подключаемый файл.
+    В .jsonl каждая непустая строка — один ресурс; в .json — список ресурсов
+    или объект с ключом resources.
+
+    :param path: путь к файлу (для расширения и сообщений)
+    :param raw: содержимое файла
+    :return: ресурсы и номера их строк (для .json — нули)
+    :raises IncludeError: если файл некорректен
+    """
+    if path.suffix == ".jsonl":
+        resources, lines = [], []
+        for number, line in enumerate(raw.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                resources.append(parse_json(line))
+            except json.JSONDecodeError as e:
+                raise IncludeError(f"Ошибка парсинга JSON в {path}, строка {number}: {e}") from e
+            lines.append(number)
+        return resources, lines
+
+    try:
+        data = parse_json(raw)
+    except json.JSONDecodeError as e:
+        raise IncludeError(f"Ошибка парсинга JSON в {path}: {e}") from e
+    if isinstance(data, dict) and "resources" in data:
+        data = data["resources"]
+    if not isinstance(data, list):
+        raise IncludeError(f"{path}: ожидается список ресурсов или объект с ключом resources")
+    return data, [0] * len(data)
+
+
+def load_include(path: str, schema_path: Optional[str]) -> Tuple[str, List[dict]]:
+    """
+    Читает, разбирает и проверяет по схеме один подключаемый файл.
+    Выполняется в том числе в процессах-исполнителях, поэтому ошибки
+    передаются строкой внутри IncludeError.
+
+    :param path: путь к файлу
+    :param schema_path: путь к схеме config_schema.json (None — без проверки)
+    :return: хэш содержимого и ресурсы файла
+    :raises IncludeError: если файл не прочитан, некорректен или не прошел валидацию
+    """
+    path = Path(path)
+    try:
+        raw = path.read_bytes()
+        stamp = _schema_stamp(schema_path)
+    except OSError as e:
+        raise IncludeError(f"Ошибка чтения {path}: {e}") from None
+    resources, lines = parse_include(path, raw)
+
+    if schema_path:
+        try:
+            get_validator(Path(schema_path), RESOURCES_POINTER).validate(resources)
+        except ValidationError as e:
+            where = ""
+            if e.path:
+                index = e.path[0]
+                where = f", строка {lines[index]}" if lines[index] else f", ресурс {index}"
+            raise IncludeError(f"Ошибка валидации {path}{where}: {e.message}") from None
+        except (OSError, json.JSONDecodeError, SchemaError) as e:
+            raise IncludeError(f"Ошибка схемы {schema_path}: {e}") from None
+    return _digest(raw, stamp), resources
+
+
+def load_resources(patterns: Iterable[str], base_dir: Path, \
+                   schema_path: Optional[Path] = None, \
+                   workers: Optional[int] = None) -> List[dict]:
+    """
+    Загружает ресурсы из подключаемых файлов.
+    Для каждого файла считается хэш содержимого (вместе с версией схемы);
+    неизмененные с прошлой загрузки файлы берутся из кэша без разбора и проверки.
+    Измененные файлы разбираются и проверяются параллельно в отдельных
+    процессах, если их несколько и они достаточно велики, иначе — по очереди.
+
+    :param patterns: пути и шаблоны из resource_includes
+    :param base_dir: каталог config.json
+    :param schema_path: путь к схеме config_schema.json (None — без проверки)
+    :param workers: число процессов разбора (по умолчанию — по числу доступных ядер)
+    :return: ресурсы всех файлов в порядке файлов
+    :raises IncludeError: если файл не найден, некорректен или не прошел валидацию
+    """
+    files = expand_includes(patterns, base_dir)
+    try:
+        stamp = _schema_stamp(schema_path)
+    except OSError as e:
+        raise IncludeError(f"Ошибка чтения схемы {schema_path}: {e}") from None
+
+    loaded: Dict[str, List[dict]] = {}
+    stale: List[str] = []
+    stale_bytes = 0
+    for path in files:
+        key = str(path.resolve())
+        try:
+            raw = path.read_bytes()
+        except OSError as e:
+            raise IncludeError(f"Ошибка чтения {path}: {e}") from None
+        with _CACHE_LOCK:
+            cached = _CACHE.get(key)
+        if cached is not None and cached[0] == _digest(raw, stamp):
+            loaded[key] = cached[1]
+        else:
+            stale.append(key)
+            stale_bytes += len(raw)
+
+    schema = str(schema_path) if schema_path else None
+    workers = min(workers or _cpu_count(), len(stale))
+    if workers > 1 and len(stale) >= PARALLEL_MIN_FILES and stale_bytes >= PARALLEL_MIN_BYTES:
+        # spawn: процессы разбора не наследуют потоки и блокировки основного процесса
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) \
+                as executor:
+            results = list(executor.map(load_include, stale, [schema] * len(stale)))
+    else:
+        results = [load_include(key, schema) for key in stale]
+
+    with _CACHE_LOCK:
+        for key, (digest, resources) in zip(stale, results):
+            _CACHE[key] = (digest, resources)
+            loaded[key] = resources
+
+    merged: List[dict] = []
+    for path in files:
+        merged.extend(loaded[str(path.resolve())])
+    return merged
@@ -0,0 +1,187 @@
+"""monitor/scheduler.py - Центральный планировщик проверок"""
+
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from monitor.incident_manager import IncidentManager
+from monitor.metrics import get_metrics
+from monitor.probe_timing import last_timing
+from monitor.probe_state import ProbeState, INCIDENT, RECOVERY
+
+
+class ProbeJob:
+    """
+    Задание планировщика: точка мониторинга и состояние ее опроса.
+    """
+
+    def __init__(self, endpoint, state: ProbeState):
+        self.endpoint = endpoint
+        self.state = state
+        self.name = endpoint.get_name()
+        # Задание исключено из мониторинга и больше не планируется
+        self.removed = False
+
+
+class ProbeScheduler(threading.Thread):
+    """
+    Единый планировщик проверок для всех точек.
+    Время следующей проверки каждой точки хранится в куче, один поток-диспетчер
+    ждет ближайшего срока и передает готовые проверки в пул потоков-исполнителей.
+    Первые проверки разнесены по фазе (по хэшу имени), к каждой паузе добавляется
+    случайный разброс, чтобы проверки не шли синхронными волнами.
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None, \
+                 incidents: Optional[IncidentManager] = None, \
+                 workers: int = 32, jitter: float = 0.1):
+        """
+        :param logger: логгер
+        :param incidents: менеджер инцидентов
+        :param workers: число потоков, одновременно выполняющих проверки
+        :param jitter: доля случайного разброса паузы (0.1 — ±10%)
+        """
+        super().__init__(daemon=True, name="ProbeScheduler")
+        self.logger = logger or logging.getLogger(__name__)
+        self.incidents = incidents
+        self.workers = workers
+        self.jitter = jitter
+
+        self._heap: List[Tuple[float, int, ProbeJob]] = []
+        self._jobs: Dict[str, ProbeJob] = {}
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="probe")
+        self._lag = get_metrics().histogram("ct_probe_lag_seconds", \
+                                            "Опоздание начала проверки относительно плана", \
+                                            engine="scheduler")
+
+    def add(self, endpoint, resource_config: dict, in_incident: bool = False):
+        """
+        Добавляет точку мониторинга (в том числе после запуска). Первая проверка
+        смещается по фазе внутри интервала опроса, чтобы точки не стартовали одновременно.
+
+        :param endpoint: точка мониторинга
+        :param resource_config: конфигурация ресурса
+        :param in_incident: инцидент точки уже открыт (опрос ждет восстановления)
+        """
+        name = endpoint.get_name()
+        job = ProbeJob(endpoint, ProbeState(name, resource_config, self.logger))
+        job.state.in_incident = in_incident
+        with self._cond:
+            self._jobs[name] = job
+        self._push(job, time.monotonic() + self._phase(name) * job.state.check_interval)
+
+    def remove(self, name: str):
+        """Исключает точку из мониторинга; выполняемая проверка завершится без повтора."""
+        with self._cond:
+            job = self._jobs.pop(name, None)
+            if job is not None:
+                job.removed = True
+
+    def update(self, endpoint, resource_config: dict):
+        """
+        Применяет новую конфигурацию точки, сохраняя состояние ее опроса.
+        Новые интервалы действуют со следующего планирования.
+        """
+        with self._cond:
+            job = self._jobs.get(endpoint.get_name())
+        if job is None:
+            self.add(endpoint, resource_config)
+            return
+        job.endpoint = endpoint
+        job.state.reconfigure(resource_config)
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._jobs)
+
+    def stop(self):
+        """Останавливает планировщик."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def run(self):
+        """Цикл диспетчера: ждет ближайшего срока и отправляет проверки исполнителям."""
+        self.logger.info("Планировщик запущен: %d точек, %d исполнителей", \
+                         len(self), self.workers)
+        try:
+            while True:
+                due = self._wait_due()
+                if due is None:
+                    break
+                for planned, job in due:
+                    self._executor.submit(self._run_job, job, planned)
+        except Exception as e:
+            self.logger.error("Ошибка в планировщике: %s", e)
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self.logger.info("Планировщик завершён")
+
+    def _wait_due(self) -> Optional[List[Tuple[float, ProbeJob]]]:
+        """
+        Ждет, пока наступит срок хотя бы одной проверки.
+
+        :return: пары (плановое время, задание), срок которых наступил, или None при остановке
+        """
+        with self._cond:
+            while not self._stopped:
+                now = time.monotonic()
+                if self._heap and self._heap[0][0] <= now:
+                    due = []
+                    while self._heap and self._heap[0][0] <= now:
+                        planned, _, job = heapq.heappop(self._heap)
+                        if not job.removed:
+                            due.append((planned, job))
+                    if due:
+                        return due
+                    continue
+                timeout = self._heap[0][0] - now if self._heap else None
+                self._cond.wait(timeout)
+            return None
+
+    def _run_job(self, job: ProbeJob, planned: float):
+        """Выполняет проверку в потоке-исполнителе и планирует следующую."""
+        # Опоздание: ожидание диспетчера и свободного исполнителя
+        self._lag.observe(max(time.monotonic() - planned, 0.0))
+        try:
+            status, code, resp = job.endpoint.check_status()
+            event = job.state.observe(status, code, resp)
+            if self.incidents:
+                if event == INCIDENT:
+                    self.incidents.register_incident(job.name, job.state.trigger_code, \
+                                                     job.state.trigger_response, \
+                                                     last_timing(job.endpoint))
+                elif event == RECOVERY:
+                    self.incidents.resolve_incident(job.name)
+        except Exception as e:
+            self.logger.error("%s — ошибка при проверке: %s", job.name, e)
+        finally:
+            self._push(job, time.monotonic() + self._with_jitter(job.state.next_delay()))
+
+    def _push(self, job: ProbeJob, due: float):
+        """Помещает задание в кучу и будит диспетчер."""
+        with self._cond:
+            if self._stopped or job.removed:
+                return
+            heapq.heappush(self._heap, (due, next(self._counter), job))
+            if self._heap[0][2] is job:
+                self._cond.notify()
+
+    def _with_jitter(self, delay: float) -> float:
+        """Добавляет к паузе случайный разброс ±jitter."""
+        if self.jitter <= 0:
+            return delay
+        return max(delay * (1 + random.uniform(-self.jitter, self.jitter)), 0)
+
+    @staticmethod
+    def _phase(name: str) -> float:
+        """Возвращает устойчивую фазу точки в диапазоне [0, 1) по хэшу имени."""
+        return zlib.crc32(name.encode("utf-8")) / 2 ** 32
@@ -0,0 +1,114 @@
+"""monitor/schema.py - Разбор JSON и проверка по JSON-схеме"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Tuple
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
+
+try:
+    import orjson
+except ImportError:  # быстрый парсер JSON необязателен
+    orjson = None
+
+try:
+    import fastjsonschema
+except ImportError:  # компилятор схем необязателен
+    fastjsonschema = None
+
+# Скомпилированные валидаторы: (путь к схеме, путь внутри схемы) -> (mtime_ns, размер, валидатор)
+_VALIDATORS: Dict[Tuple[str, Tuple[str, ...]], Tuple[int, int, "SchemaValidator"]] = {}
+_VALIDATORS_LOCK = threading.Lock()
+
+
+def parse_json(raw: bytes) -> Any:
+    """
+    Разбирает JSON; при наличии пакета orjson использует его (в несколько раз быстрее).
+
+    :raises json.JSONDecodeError: если документ некорректен
+    """
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+class SchemaValidator:
+    """
+    Скомпилированная JSON-схема.
+    Если установлен fastjsonschema, схема компилируется в код на Python и проверяет
+    конфигурацию в десятки раз быстрее jsonschema. Ошибку для сообщения всегда
+    формирует jsonschema (и ее решение окончательно).
+    """
+
+    def __init__(self, schema: dict):
+        """
+        :param schema: JSON-схема
+        :raises SchemaError: если схема некорректна
+        """
+        cls = validator_for(schema)
+        cls.check_schema(schema)
+        self.validator = cls(schema)
+        self.fast = None
+        if fastjsonschema is not None:
+            try:
+                # Форматы не проверяются, как и в jsonschema.validate по умолчанию
+                self.fast = fastjsonschema.compile(schema, use_formats=False, \
+                                                   use_default=False)
+            except fastjsonschema.JsonSchemaDefinitionException:
+                self.fast = None
+
+    def validate(self, data: Any):
+        """
+        Проверяет данные по схеме.
+
+        :raises ValidationError: если данные не соответствуют схеме
+        """
+        if self.fast is not None:
+            try:
+                self.fast(data)
+                return
+            except fastjsonschema.JsonSchemaException:
+                pass  # подробную ошибку построит jsonschema
+        error = best_match(self.validator.iter_errors(data))
+        if error is not None:
+            raise error
+
+
+def get_validator(schema_path: Path, pointer: Tuple[str, ...] = ()) -> SchemaValidator:
+    """
+    Возвращает скомпилированный валидатор схемы или ее части.
+    Валидатор строится один раз и пересоздается, только если у файла схемы
+    изменились время модификации или размер.
+
+    :param schema_path: путь к JSON-схеме
+    :param pointer: путь к части схемы, например ("properties", "resources", "items")
+    :raises OSError: если схему не удалось прочитать
+    :raises json.JSONDecodeError, SchemaError: если схема некорректна
+    """
+    key = (str(Path(schema_path).resolve()), tuple(pointer))
+    stat = Path(schema_path).stat()
+    with _VALIDATORS_LOCK:
+        cached = _VALIDATORS.get(key)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+
+        schema = parse_json(Path(schema_path).read_bytes())
+        part = schema
+        for name in pointer:
+            part = part[name]
+        if pointer and "$schema" in schema:
+            part = {"$schema": schema["$schema"], **part}
+        validator = SchemaValidator(part)
+        _VALIDATORS[key] = (stat.st_mtime_ns, stat.st_size, validator)
+        return validator
+
+
+def validate_data(data: Any, schema_path: Path):
+    """
+    Проверяет данные по схеме кэшированным валидатором
+    (ошибка выбирается так же, как в jsonschema.validate).
+
+    :raises ValidationError: если данные не соответствуют схеме
+    """
+    get_validator(schema_path).validate(data)
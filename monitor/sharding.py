@@ -0,0 +1,337 @@
+"""monitor/sharding.py - Распределение опроса по процессам"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from monitor.http_pool import get_session_pool
+from monitor.httpendpoint import HttpEndpoint
+from monitor.incident_manager import IncidentManager
+from monitor.logger import setup_logger
+from monitor.metrics import Histogram, get_metrics
+from monitor.probe_runner import start_probes
+from monitor.probe_store import start_probe_store
+from monitor.probe_timing import ProbeTiming, set_timing_listener
+
+# События, передаваемые от процессов опроса координатору
+EVENT_INCIDENT = "incident"
+EVENT_RECOVERY = "recovery"
+# Пачка записей времени проверок процесса опроса: [(имя точки, ProbeTiming), ...]
+EVENT_PROBES = "probes"
+# Наблюдения гистограммы опоздания проверок с прошлой отправки: (корзины, сумма)
+EVENT_LAG = "lag"
+# Движки, которые ведут гистограмму опоздания проверок
+LAG_ENGINES = ("asyncio", "scheduler")
+# Период проверки процессов опроса координатором (секунды)
+POLL_INTERVAL = 0.5
+# Время ожидания завершения процесса опроса при остановке (секунды)
+JOIN_TIMEOUT = 10.0
+
+
+def stable_hash(name: str) -> int:
+    """
+    Возвращает устойчивый между процессами и запусками 64-битный хэш строки.
+    Младшие биты crc32 у похожих имен («svc-1», «svc-2») сильно коррелируют,
+    поэтому используется blake2b.
+    """
+    digest = hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def shard_of(name: str, shards: int) -> int:
+    """Возвращает номер процесса опроса для точки по устойчивому хэшу имени."""
+    return stable_hash(name) % shards
+
+
+def partition(resources: List[dict], shards: int) -> List[List[dict]]:
+    """
+    Распределяет ресурсы по процессам опроса по хэшу имени.
+
+    :param resources: конфигурации ресурсов
+    :param shards: число процессов
+    :return: списки ресурсов для каждого процесса
+    """
+    parts: List[List[dict]] = [[] for _ in range(shards)]
+    for resource_config in resources:
+        parts[shard_of(resource_config["name"], shards)].append(resource_config)
+    return parts
+
+
+class ShardEvents:
+    """
+    Заместитель IncidentManager в процессе опроса: вместо регистрации инцидента
+    отправляет событие координатору через очередь между процессами.
+    """
+
+    def __init__(self, events: multiprocessing.Queue):
+        self.events = events
+
+    def register_incident(self, resource_name: str, code: int, response: str, \
+                          timing: dict = None):
+        """Передает координатору подтвержденный сбой."""
+        self.events.put((EVENT_INCIDENT, resource_name, code, response, timing))
+
+    def resolve_incident(self, resource_name: str):
+        """Передает координатору подтвержденное восстановление."""
+        self.events.put((EVENT_RECOVERY, resource_name))
+
+
+class TimingOutbox:
+    """
+    Накопитель записей времени проверок процесса опроса: потоки опроса
+    добавляют записи, основной поток процесса раз в POLL_INTERVAL
+    отправляет их координатору одной пачкой вместе с новыми наблюдениями
+    гистограммы опоздания проверок (метрики процесса опроса координатор
+    иначе не видит).
+    """
+
+    def __init__(self, lag: Optional[Histogram] = None):
+        """
+        :param lag: гистограмма опоздания проверок движка процесса (None — нет)
+        """
+        self._items: List[Tuple[str, ProbeTiming]] = []
+        self._lock = threading.Lock()
+        self._lag = lag
+        self._lag_sent: Tuple[List[int], float] = \
+            ([0] * (len(lag.buckets) + 1), 0.0) if lag is not None else ([], 0.0)
+
+    def add(self, name: str, timing: ProbeTiming):
+        """Добавляет запись проверки точки."""
+        with self._lock:
+            self._items.append((name, timing))
+
+    def take(self) -> List[Tuple[str, ProbeTiming]]:
+        """Забирает накопленные записи."""
+        with self._lock:
+            items, self._items = self._items, []
+        return items
+
+    def send(self, events: multiprocessing.Queue):
+        """Отправляет накопленные записи координатору, если они есть."""
+        items = self.take()
+        if items:
+            events.put((EVENT_PROBES, items))
+        if self._lag is not None:
+            counts, value_sum = self._lag.counts()
+            sent, sent_sum = self._lag_sent
+            delta = [count - previous for count, previous in zip(counts, sent)]
+            if any(delta):
+                events.put((EVENT_LAG, delta, value_sum - sent_sum))
+                self._lag_sent = counts, value_sum
+
+
+def lag_histogram(engine: str) -> Histogram:
+    """Возвращает гистограмму опоздания проверок движка из реестра метрик процесса."""
+    return get_metrics().histogram("ct_probe_lag_seconds", \
+                                   "Опоздание начала проверки относительно плана", engine=engine)
+
+
+def shard_main(index: int, resources: List[dict], options: dict, \
+               events: multiprocessing.Queue, stop, active: Iterable[str] = ()):
+    """
+    Точка входа процесса опроса: запускает движок для своей части ресурсов
+    и работает до сигнала остановки или завершения родительского процесса.
+
+    :param index: номер процесса опроса
+    :param resources: ресурсы этого процесса
+    :param options: engine, max_concurrency, probe_jitter, http_pool, probe_store,
+                    log_file, log_level
+    :param events: очередь событий для координатора
+    :param stop: событие остановки (multiprocessing.Event)
+    :param active: имена точек процесса с инцидентом, открытым у координатора
+    """
+    # Остановкой управляет координатор; Ctrl+C в терминале не должен обрывать опрос
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    root, ext = os.path.splitext(options["log_file"])
+    logger = setup_logger(f"monitor.shard{index}", f"{root}.shard{index}{ext}", \
+                          options["log_level"])
+    logger.info("Процесс опроса %d запущен: %d точек", index, len(resources))
+
+    get_session_pool().configure(**options["http_pool"])
+    store = start_probe_store(options["probe_store"], logger) \
+        if options["probe_store"] is not None else None
+    # Время этапов и результаты проверок передаются координатору для /timing, /uptime
+    # и метрик проверок
+    lag = lag_histogram(options["engine"]) if options["engine"] in LAG_ENGINES else None
+    outbox = TimingOutbox(lag)
+    set_timing_listener(outbox.add)
+    _, threads = start_probes(resources, logger, ShardEvents(events), options["engine"], \
+                              options["max_concurrency"], options["probe_jitter"], active)
+
+    parent = os.getppid()
+    while not stop.wait(POLL_INTERVAL):
+        outbox.send(events)
+        if os.getppid() != parent:
+            logger.warning("Координатор завершился — останавливаем процесс опроса %d", index)
+            break
+
+    for thread in threads:
+        thread.stop()
+    for thread in threads:
+        thread.join()
+    outbox.send(events)
+    if store is not None:
+        store.stop()
+    logger.info("Процесс опроса %d завершён", index)
+
+
+class ShardCoordinator(threading.Thread):
+    """
+    Координатор процессов опроса.
+    Ресурсы распределяются по shards процессам по хэшу имени; каждый процесс
+    опрашивает свою часть выбранным движком (разбор ответов, извлечение текста
+    и подтверждение сбоев идут параллельно на разных ядрах). Инциденты
+    и уведомления остаются в процессе координатора: процессы опроса передают
+    только подтвержденные события через очередь multiprocessing, а поток
+    координатора применяет их к IncidentManager. Записи времени проверок
+    передаются пачками и сохраняются в точках координатора (endpoints()),
+    по которым бот и сервер метрик показывают /timing и /uptime,
+    и учитываются в метриках проверок координатора вместе с опозданием проверок.
+    Упавший процесс опроса
+    перезапускается; процесс получает имена своих точек с открытыми инцидентами,
+    чтобы отправить восстановление, даже если точка восстановилась, пока он не работал.
+    """
+
+    def __init__(self, resources: List[dict], shards: int, \
+                 incidents: Optional[IncidentManager] = None, \
+                 logger: Optional[logging.Logger] = None, engine: str = "threads", \
+                 max_concurrency: int = 100, probe_jitter: float = 0.1, \
+                 http_pool: Optional[dict] = None, log_file: str = "logs/monitor.log", \
+                 log_level: str = "INFO", probe_store: Optional[dict] = None):
+        """
+        :param resources: конфигурации всех ресурсов
+        :param shards: число процессов опроса
+        :param incidents: менеджер инцидентов
+        :param logger: логгер
+        :param engine: движок опроса в каждом процессе
+        :param max_concurrency: предел одновременных проверок в процессе
+        :param probe_jitter: разброс пауз планировщика
+        :param http_pool: настройки пула соединений процесса опроса
+        :param log_file: журнал; процесс i пишет в <журнал>.shard<i>
+        :param log_level: уровень логирования процессов опроса
+        :param probe_store: настройки хранилища проверок (None — проверки не сохраняются)
+        """
+        super().__init__(daemon=True, name="ShardCoordinator")
+        self.logger = logger or logging.getLogger(__name__)
+        self.incidents = incidents
+        self.parts = partition(resources, shards)
+        # Точки координатора: хранят время и результаты проверок процессов опроса
+        self._endpoints = {resource_config["name"]: HttpEndpoint(resource_config) \
+                           for resource_config in resources}
+        self.options = {
+            "engine": engine,
+            "max_concurrency": max_concurrency,
+            "probe_jitter": probe_jitter,
+            "http_pool": http_pool or {},
+            "probe_store": probe_store,
+            "log_file": log_file,
+            "log_level": log_level,
+        }
+        # spawn: процессы опроса не наследуют потоки и блокировки координатора
+        self._context = multiprocessing.get_context("spawn")
+        self._events = self._context.Queue()
+        self._stop_event = self._context.Event()
+        self._processes: Dict[int, multiprocessing.Process] = {}
+
+    def endpoints(self) -> List[HttpEndpoint]:
+        """Возвращает точки координатора с временем и результатами проверок."""
+        return list(self._endpoints.values())
+
+    def stop(self):
+        """Останавливает процессы опроса и координатор."""
+        self._stop_event.set()
+
+    def run(self):
+        """Запускает процессы опроса и применяет их события к менеджеру инцидентов."""
+        for index, part in enumerate(self.parts):
+            if part:
+                self._spawn(index)
+        self.logger.info("Координатор запущен: %d процессов опроса, точек по процессам %s", \
+                         len(self._processes), [len(part) for part in self.parts])
+        try:
+            while not self._stop_event.is_set():
+                self._respawn_dead()
+                self._apply_next(POLL_INTERVAL)
+        finally:
+            self._shutdown()
+            self.logger.info("Координатор завершён")
+
+    def _spawn(self, index: int):
+        """Запускает процесс опроса с номером index."""
+        active = []
+        if self.incidents is not None:
+            names = {resource_config["name"] for resource_config in self.parts[index]}
+            active = [name for name in self.incidents.get_active_map() if name in names]
+        process = self._context.Process(target=shard_main, name=f"monitor-shard{index}", \
+                                        args=(index, self.parts[index], self.options, \
+                                              self._events, self._stop_event, active), \
+                                        daemon=True)
+        process.start()
+        self._processes[index] = process
+
+    def _respawn_dead(self):
+        """Перезапускает неожиданно завершившиеся процессы опроса."""
+        for index, process in list(self._processes.items()):
+            if not process.is_alive() and not self._stop_event.is_set():
+                self.logger.error("Процесс опроса %d завершился с кодом %s — перезапуск", \
+                                  index, process.exitcode)
+                self._spawn(index)
+
+    def _apply_next(self, timeout: float) -> bool:
+        """
+        Ждет не дольше timeout следующее событие процессов опроса и применяет его.
+
+        :return: False, если событий не было
+        """
+        try:
+            event = self._events.get(timeout=timeout)
+        except queue.Empty:
+            return False
+        try:
+            self._apply(event)
+        except Exception as e:
+            self.logger.error("Ошибка обработки события %s: %s", event[0], e)
+        return True
+
+    def _apply(self, event: tuple):
+        """Применяет событие процесса опроса к точкам и менеджеру инцидентов."""
+        if event[0] == EVENT_PROBES:
+            for name, timing in event[1]:
+                endpoint = self._endpoints.get(name)
+                if endpoint is not None:
+                    endpoint.record_timing(timing)
+            return
+        if event[0] == EVENT_LAG:
+            lag_histogram(self.options["engine"]).merge(event[1], event[2])
+            return
+        if self.incidents is None:
+            return
+        if event[0] == EVENT_INCIDENT:
+            _, name, code, response, timing = event
+            self.incidents.register_incident(name, code, response, timing)
+        elif event[0] == EVENT_RECOVERY:
+            self.incidents.resolve_incident(event[1])
+
+    def _shutdown(self):
+        """
+        Дожидается процессов опроса, применяя их события во время ожидания:
+        процесс не завершится, пока его последние события не прочитаны из канала.
+        """
+        self._stop_event.set()
+        deadline = time.monotonic() + JOIN_TIMEOUT
+        while any(process.is_alive() for process in self._processes.values()) \
+                and time.monotonic() < deadline:
+            self._apply_next(POLL_INTERVAL)
+        for process in self._processes.values():
+            if process.is_alive():
+                self.logger.warning("Процесс опроса %s не завершился — принудительная остановка", \
+                                    process.name)
+                process.terminate()
+            process.join()
+        while self._apply_next(0.1):
+            pass
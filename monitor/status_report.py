@@ -0,0 +1,303 @@
+"""monitor/status_report.py - Формирование отчета о статусах точек для Telegram"""
+
+import re
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+from monitor.incident import Incident
+
+# Максимальная длина сообщения Telegram
+TELEGRAM_MESSAGE_LIMIT = 4096
+# Максимальное число сообщений в одном ответе на /status
+MAX_STATUS_PAGES = 10
+# Группа для точек без тегов
+UNTAGGED = "без тега"
+# Период отчета: число и единица (m — минуты, h — часы, d — сутки)
+PERIOD_PATTERN = re.compile(r"^(\d+)([mhd])$")
+PERIOD_UNITS = {"m": 60, "h": 3600, "d": 86400}
+PERIOD_NAMES = {"d": "сут", "h": "ч", "m": "мин"}
+# Период отчета /availability по умолчанию (секунды)
+DEFAULT_AVAILABILITY_PERIOD = 30 * 86400
+# Период отчета /history по умолчанию (секунды)
+DEFAULT_HISTORY_PERIOD = 7 * 86400
+
+
+class StatusFilter:
+    """
+    Фильтр отчета /status, разобранный из аргументов команды:
+    failing — только точки со сбоем, tag:<тег> — точки с тегом,
+    prefix:<начало> или просто <начало> — точки, имя которых начинается с текста.
+    """
+
+    def __init__(self, args: Optional[List[str]] = None):
+        self.failing_only = False
+        self.tag: Optional[str] = None
+        self.prefix: Optional[str] = None
+        for arg in args or []:
+            lowered = arg.lower()
+            if lowered in {"failing", "сбой", "сбои"}:
+                self.failing_only = True
+            elif lowered.startswith("tag:"):
+                self.tag = arg[4:]
+            elif lowered.startswith("prefix:"):
+                self.prefix = arg[7:]
+            else:
+                self.prefix = arg
+
+    def matches(self, name: str, tags: List[str], failing: bool) -> bool:
+        """Проверяет, попадает ли точка в отчет."""
+        if self.failing_only and not failing:
+            return False
+        if self.tag is not None and self.tag not in tags:
+            return False
+        if self.prefix is not None and not name.startswith(self.prefix):
+            return False
+        return True
+
+
+def build_status_lines(endpoints: Iterable, active: Mapping[str, Incident], \
+                       status_filter: StatusFilter) -> Dict[str, object]:
+    """
+    Формирует строки отчета о статусах за один проход по точкам.
+    Инцидент точки находится по имени в словаре active (O(1) на точку).
+    Точки группируются по первому тегу, внутри группы сначала идут сбои.
+
+    :param endpoints: точки мониторинга
+    :param active: снимок активных инцидентов {имя ресурса: инцидент}
+    :param status_filter: фильтр отчета
+    :return: словарь с ключами total, failing, lines
+    """
+    groups: Dict[str, Dict[str, List[str]]] = {}
+    total = failing = 0
+    for endpoint in endpoints:
+        name = endpoint.get_name()
+        tags = endpoint.get_tags()
+        incident = active.get(name)
+        if not status_filter.matches(name, tags, incident is not None):
+            continue
+        total += 1
+        group = groups.setdefault(tags[0] if tags else UNTAGGED, {"failing": [], "ok": []})
+        if incident is not None:
+            failing += 1
+            group["failing"].append(f"❗ {name} — сбой с {incident.start_time}")
+        else:
+            group["ok"].append(f"✅ {name} — в норме")
+
+    lines: List[str] = []
+    with_headers = len(groups) > 1 or UNTAGGED not in groups
+    for tag in sorted(groups, key=lambda t: (t == UNTAGGED, t)):
+        if with_headers:
+            lines.append(f"🏷 {tag}:")
+        lines.extend(groups[tag]["failing"])
+        lines.extend(groups[tag]["ok"])
+    return {"total": total, "failing": failing, "lines": lines}
+
+
+def build_timing_lines(endpoints: Iterable, status_filter: StatusFilter, \
+                       active: Optional[Mapping[str, Incident]] = None) -> List[str]:
+    """
+    Формирует строки отчета /timing: время этапов последней проверки точки
+    и медиана и 95-й перцентиль общего времени по кольцевому буферу.
+    Точки упорядочены по убыванию 95-го перцентиля (самые медленные сверху).
+
+    :param endpoints: точки мониторинга (учитываются только хранящие время проверок)
+    :param status_filter: фильтр отчета
+    :param active: снимок активных инцидентов (для фильтра failing)
+    :return: строки отчета
+    """
+    rows = []
+    for endpoint in endpoints:
+        timings = getattr(endpoint, "timings", None)
+        last = timings.last() if timings is not None else None
+        name = endpoint.get_name()
+        if last is None or not status_filter.matches(name, endpoint.get_tags(), \
+                                                     name in (active or {})):
+            continue
+        p50, p95 = timings.quantiles(0.5)["total"], timings.quantiles(0.95)["total"]
+        rows.append((p95, f"⏱ {name}: {last}; p50/p95 {p50 * 1000:.0f} / {p95 * 1000:.0f} мс"))
+    rows.sort(key=lambda row: row[0], reverse=True)
+    return [line for _, line in rows]
+
+
+def split_period(args: List[str]) -> Tuple[Optional[int], List[str]]:
+    """
+    Выделяет из аргументов команды период вида 30m, 6h или 7d.
+
+    :param args: аргументы команды
+    :return: период в секундах (None, если не задан) и остальные аргументы
+    """
+    period, rest = None, []
+    for arg in args:
+        match = PERIOD_PATTERN.match(arg.lower())
+        if match:
+            period = int(match.group(1)) * PERIOD_UNITS[match.group(2)]
+        else:
+            rest.append(arg)
+    return period, rest
+
+
+def format_period(period: int) -> str:
+    """Форматирует период в крупнейших целых единицах: 30 сут, 6 ч, 90 мин."""
+    for unit in ("d", "h", "m"):
+        if period % PERIOD_UNITS[unit] == 0:
+            return f"{period // PERIOD_UNITS[unit]} {PERIOD_NAMES[unit]}"
+    return f"{period} с"
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    """Форматирует длительность: 45 с, 5 мин, 2 ч 5 мин, 3 сут 4 ч."""
+    if seconds is None:
+        return "—"
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds} с"
+    days, rest = divmod(seconds, 86400)
+    hours, rest = divmod(rest, 3600)
+    minutes = rest // 60
+    if days:
+        return f"{days} сут {hours} ч" if hours else f"{days} сут"
+    if hours:
+        return f"{hours} ч {minutes} мин" if minutes else f"{hours} ч"
+    return f"{minutes} мин"
+
+
+def parse_history_args(args: List[str]) -> Tuple[int, Optional[str], Optional[int]]:
+    """
+    Разбирает аргументы /history: период вида 6h или 7d, code:<код> и имя ресурса.
+
+    :return: период (секунды), имя ресурса (None — все) и код (None — любой)
+    """
+    period, rest = split_period(args)
+    resource, code = None, None
+    for arg in rest:
+        if arg.lower().startswith("code:") and arg[5:].lstrip("-").isdigit():
+            code = int(arg[5:])
+        else:
+            resource = arg
+    return period or DEFAULT_HISTORY_PERIOD, resource, code
+
+
+def build_incident_history_lines(incidents: Iterable[dict], stats: Dict[str, object], \
+                                 now: float) -> List[str]:
+    """
+    Формирует строки отчета /history: сводку (число инцидентов, простой, MTTR, MTBF)
+    и инциденты от новых к старым. Время — в UTC.
+
+    :param incidents: инциденты (IncidentHistory.query)
+    :param stats: сводка (IncidentHistory.stats)
+    :param now: текущее время (для длительности открытых инцидентов)
+    :return: строки отчета
+    """
+    lines = [f"Инцидентов: {stats['count']} (открыто: {stats['open']}), "
+             f"простой: {format_duration(stats['downtime'])}",
+             f"MTTR: {format_duration(stats['mttr'])}, MTBF: {format_duration(stats['mtbf'])}",
+             ""]
+    for incident in incidents:
+        start = datetime.fromtimestamp(incident["start_time"], timezone.utc)
+        if incident["end_time"] is None:
+            until = f"… (продолжается {format_duration(now - incident['start_time'])})"
+        else:
+            end = datetime.fromtimestamp(incident["end_time"], timezone.utc)
+            duration = format_duration(incident["end_time"] - incident["start_time"])
+            until = f"→ {end:%H:%M} ({duration})" if end.date() == start.date() \
+                else f"→ {end:%d.%m %H:%M} ({duration})"
+        lines.append(f"❗ {incident['resource_name']} [{incident['code']}] "
+                     f"{start:%d.%m %H:%M} {until}")
+    return lines
+
+
+def build_uptime_lines(endpoints: Iterable, status_filter: StatusFilter, \
+                        active: Optional[Mapping[str, Incident]] = None, \
+                        since: Optional[float] = None) -> List[str]:
+    """
+    Формирует строки отчета /uptime: доля успешных проверок, медиана задержки
+    и спарклайн по истории проверок точки.
+    Точки упорядочены по возрастанию доли успешных проверок (проблемные сверху).
+
+    :param endpoints: точки мониторинга (учитываются только хранящие историю проверок)
+    :param status_filter: фильтр отчета
+    :param active: снимок активных инцидентов (для фильтра failing)
+    :param since: только проверки не раньше этого времени (секунды эпохи)
+    :return: строки отчета
+    """
+    rows = []
+    for endpoint in endpoints:
+        history = getattr(endpoint, "history", None)
+        name = endpoint.get_name()
+        if history is None or not status_filter.matches(name, endpoint.get_tags(), \
+                                                        name in (active or {})):
+            continue
+        summary = history.summary(since)
+        if not summary["count"]:
+            continue
+        p50 = "—" if summary["p50"] is None else f"{summary['p50'] * 1000:.0f} мс"
+        icon = "✅" if summary["uptime"] == 100 else "❗"
+        rows.append((summary["uptime"], name, \
+                     f"{icon} {name}: {summary['uptime']:.2f}% из {summary['count']}, "
+                     f"p50 {p50} {summary['sparkline']}"))
+    rows.sort(key=lambda row: (row[0], row[1]))
+    return [line for _, _, line in rows]
+
+
+def build_availability_lines(endpoints: Iterable, status_filter: StatusFilter, store, \
+                             since: float, active: Optional[Mapping[str, Incident]] = None) \
+        -> List[str]:
+    """
+    Формирует строки отчета /availability: доступность и задержка точки
+    за период по хранилищу проверок.
+    Точки упорядочены по возрастанию доступности (проблемные сверху).
+
+    :param endpoints: точки мониторинга
+    :param status_filter: фильтр отчета
+    :param store: хранилище проверок (ProbeStore)
+    :param since: начало периода (секунды эпохи)
+    :param active: снимок активных инцидентов (для фильтра failing)
+    :return: строки отчета (точки без записей за период пропускаются)
+    """
+    rows = []
+    for endpoint in endpoints:
+        name = endpoint.get_name()
+        if not status_filter.matches(name, endpoint.get_tags(), name in (active or {})):
+            continue
+        stats = store.availability(name, since)
+        if stats is None or not stats["count"]:
+            continue
+        latency = "—" if stats["latency_avg"] is None else \
+            f"ср. {stats['latency_avg'] * 1000:.0f} мс, макс. {stats['latency_max'] * 1000:.0f} мс"
+        icon = "✅" if stats["availability"] == 100 else "❗"
+        rows.append((stats["availability"], name, \
+                     f"{icon} {name}: {stats['availability']:.3f}% из {stats['count']}, "
+                     f"задержка {latency}"))
+    rows.sort(key=lambda row: (row[0], row[1]))
+    return [line for _, _, line in rows]
+
+
+def paginate(header: str, lines: List[str], limit: int = TELEGRAM_MESSAGE_LIMIT, \
+             max_pages: int = MAX_STATUS_PAGES) -> List[str]:
+    """
+    Разбивает отчет на сообщения не длиннее limit символов.
+    Если страниц больше max_pages, последняя страница сообщает о пропущенных строках.
+
+    :param header: заголовок первой страницы
+    :param lines: строки отчета
+    :param limit: максимальная длина сообщения
+    :param max_pages: максимальное число сообщений
+    :return: список текстов сообщений
+    """
+    reserve = 40  # место под отметку страницы и сообщение о пропуске
+    pages: List[List[str]] = [[header, ""]]
+    size = len(header) + 1
+    for index, line in enumerate(lines):
+        line = line[:limit - reserve]
+        if size + len(line) + 1 > limit - reserve:
+            if len(pages) == max_pages:
+                pages[-1].append(f"… ещё {len(lines) - index} строк, уточните фильтр")
+                break
+            pages.append([])
+            size = 0
+        pages[-1].append(line)
+        size += len(line) + 1
+
+    if len(pages) == 1:
+        return ["\n".join(pages[0])]
+    return [f"({number}/{len(pages)})\n" + "\n".join(page) \
+            for number, page in enumerate(pages, start=1)]
@@ -1,23 +1,36 @@
 """monitor/notifier.py - Уведомитель для Telegram"""
 
-from typing import List
+from typing import Callable, List, Optional
 from typing import Any, Coroutine
+import asyncio
 import signal
 import logging
+import sqlite3
+import time
 from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes, MessageHandler, filters
-from telegram.error import TelegramError
+from monitor.config import ConfigError
+from monitor.dispatcher import Notification, NotificationDispatcher
 from monitor.incident import Incident
 from monitor.incident_manager import IncidentManager
+from monitor.http_pool import get_session_pool
+from monitor.probe_rate import get_probe_rates
+from monitor.probe_store import get_probe_store
+from monitor.status_report import StatusFilter, build_availability_lines, \
+    build_incident_history_lines, build_status_lines, build_timing_lines, build_uptime_lines, \
+    format_period, paginate, parse_history_args, split_period, DEFAULT_AVAILABILITY_PERIOD
 from monitor.notifier import Notifier
 
 class TelegramNotifier(Notifier):
     """
     Уведомляет пользователей о событиях мониторинга через Telegram.
     Поддерживает команды с фильтрацией по ролям.
+    События из потоков опроса рассылаются через NotificationDispatcher:
+    с ограничением частоты и объединением всплеска событий в сводку.
     """
 
-    def __init__(self, token: str, users: List[dict], incidents: IncidentManager, logger=None):
+    def __init__(self, token: str, users: List[dict], incidents: IncidentManager, logger=None, \
+                 notifications: Optional[dict] = None):
         """
         Инициализирует TelegramNotifier.
 
@@ -25,6 +38,7 @@ class TelegramNotifier(Notifier):
         :param users: список пользователей с их ID, именем и ролью
         :param incidents: экземпляр IncidentManager
         :param logger: необязательный логгер
+        :param notifications: настройки диспетчера уведомлений (окно сводки, частоты, очередь)
         """
         self.token = token
         self.incidents = incidents
@@ -38,7 +52,13 @@ class TelegramNotifier(Notifier):
             for user in users
         }
 
-        self.app = Application.builder().token(self.token).build()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.reloader: Optional[Callable[[], dict]] = None
+        self.dispatcher = NotificationDispatcher(self._send_message, lambda: list(self.users), \
+                                                 self.logger, **(notifications or {}))
+
+        self.app = Application.builder().token(self.token) \
+            .post_init(self._post_init).post_shutdown(self._post_shutdown).build()
 
         # Команды
         self.app.add_handler(CommandHandler("start", self.start_handler))
@@ -48,6 +68,12 @@ class TelegramNotifier(Notifier):
         self.app.add_handler(CommandHandler("incidents", self.incidents_handler))
         self.app.add_handler(CommandHandler("refresh", self.refresh_handler))
         self.app.add_handler(CommandHandler("whoami", self.whoami_handler))
+        self.app.add_handler(CommandHandler("stats", self.stats_handler))
+        self.app.add_handler(CommandHandler("timing", self.timing_handler))
+        self.app.add_handler(CommandHandler("uptime", self.uptime_handler))
+        self.app.add_handler(CommandHandler("history", self.history_handler))
+        self.app.add_handler(CommandHandler("availability", self.availability_handler))
+        self.app.add_handler(CommandHandler("reload", self.reload_handler))
         # Добавим обработчик для всех неизвестных команд
         self.app.add_handler(MessageHandler(filters.COMMAND, self.unknown_command_handler))
 
@@ -56,6 +82,19 @@ class TelegramNotifier(Notifier):
         self.logger.info("Запуск Telegram-бота...")
         self.app.run_polling(stop_signals={signal.SIGINT, signal.SIGTERM})
 
+    async def _post_init(self, _app: Application):
+        """Запоминает цикл событий бота и запускает диспетчер уведомлений."""
+        self._loop = asyncio.get_running_loop()
+        await self.dispatcher.start()
+
+    async def _post_shutdown(self, _app: Application):
+        """Рассылает оставшиеся уведомления и останавливает диспетчер."""
+        await self.dispatcher.stop()
+
+    async def _send_message(self, chat_id: int, text: str):
+        """Отправляет сообщение в чат (ошибки обрабатывает диспетчер)."""
+        await self.app.bot.send_message(chat_id=chat_id, text=text)
+
     def get_user_role(self, user_id: int) -> str:
         """
         Возвращает роль пользователя по его Telegram ID.
@@ -95,9 +134,18 @@ class TelegramNotifier(Notifier):
             "/start — приветствие\n"
             "/help — показать справку\n"
             "/whoami — ваш Telegram ID и роль\n"
-            "/status — текущий статус по всем точкам (Admin/Auditor)\n"
+            "/status [failing] [tag:<тег>] [prefix:<имя>] — статус точек (Admin/Auditor)\n"
             "/incidents — текущие инциденты (Admin/Auditor)\n"
+            "/stats — статистика опроса (Admin/Auditor)\n"
+            "/timing [failing] [tag:<тег>] [prefix:<имя>] — время этапов проверок (Admin/Auditor)\n"
+            "/uptime [6h|7d] [failing] [tag:<тег>] [prefix:<имя>] — доступность "
+            "по истории проверок (Admin/Auditor)\n"
+            "/history [7d] [<ресурс>] [code:<код>] — история инцидентов, MTTR и MTBF "
+            "(Admin/Auditor)\n"
+            "/availability [30d] [failing] [tag:<тег>] [prefix:<имя>] — доступность "
+            "за период по хранилищу проверок (Admin/Auditor)\n"
             "/refresh — перечитать журнал (Admin)\n"
+            "/reload — перечитать список ресурсов из config.json (Admin)\n"
             "/shutdown — завершить работу монитора (Admin)"
         )
 
@@ -108,9 +156,11 @@ class TelegramNotifier(Notifier):
         msg = f"👤 Вы: {user.full_name}\n🆔 Telegram ID: {user.id}\n🔐 Роль: {role}"
         await update.message.reply_text(msg)
 
-    async def status_handler(self, update: Update, _context: ContextTypes.DEFAULT_TYPE):
+    async def status_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """
-        Показывает статусы всех точек мониторинга: активные инциденты и нормальные ресурсы.
+        Показывает статусы точек мониторинга: активные инциденты и нормальные ресурсы.
+        Аргументы: failing — только сбои, tag:<тег>, prefix:<начало имени>.
+        Длинный отчет разбивается на несколько сообщений.
         Доступно для Admin и Auditor.
         """
         user_id = update.effective_user.id
@@ -119,26 +169,22 @@ class TelegramNotifier(Notifier):
             return
 
         # Получаем список всех зарегистрированных точек мониторинга
-        all_endpoints = list(self.incidents.get_all_ep_names())
-        # Получаем список активных инцидентов
-        active = self.incidents.get_active()
-
+        all_endpoints = self.incidents.get_all_endpoints()
         if not all_endpoints:
             await update.message.reply_text("📋 Нет зарегистрированных точек мониторинга.")
             return
 
-        lines = []
-        for ep in all_endpoints:
-            for incident in active:
-                if ep == incident.resource_name:
-                    lines.append(f"❗ {ep} — сбой с {incident.start_time}")
-                    break
-            else:
-                # Если не нашли инцидент для этой точки, значит она в норме
-                lines.append(f"✅ {ep} — в норме")
+        args = context.args if isinstance(context.args, list) else []
+        report = build_status_lines(all_endpoints, self.incidents.get_active_map(), \
+                                    StatusFilter(args))
+        if not report["lines"]:
+            await update.message.reply_text("📋 Нет точек, подходящих под фильтр.")
+            return
 
-        full_message = "📈 Статусы ресурсов:\n\n" + "\n".join(lines)
-        await update.message.reply_text(full_message)
+        header = (f"📈 Статусы ресурсов: {report['total']}, "
+                  f"в норме {report['total'] - report['failing']}, сбой {report['failing']}")
+        for page in paginate(header, report["lines"]):
+            await update.message.reply_text(page)
 
     async def incidents_handler(self, update: Update, _context: ContextTypes.DEFAULT_TYPE):
         """
@@ -157,6 +203,151 @@ class TelegramNotifier(Notifier):
             report = "\n".join(f"⚠️ {i.resource_name} (с {i.start_time})" for i in active)
             await update.message.reply_text(f"Активные инциденты:\n{report}")
 
+    async def stats_handler(self, update: Update, _context: ContextTypes.DEFAULT_TYPE):
+        """
+        Команда /stats — статистика HTTP-соединений и частоты проверок.
+        Доступно только Admin и Auditor.
+        """
+        user_id = update.effective_user.id
+        if not self.is_admin_or_auditor(user_id):
+            await update.message.reply_text("⛔ Только для ролей Admin и Auditor.")
+            return
+
+        totals = get_session_pool().stats.totals()
+        rates = get_probe_rates().totals()
+        await update.message.reply_text(
+            "📊 Пул HTTP-соединений:\n"
+            f"Запросов: {totals['requests']}\n"
+            f"Новых соединений: {totals['connections']}\n"
+            f"Повторно использовано: {totals['reused']}\n\n"
+            "⏱ Частота проверок (в минуту):\n"
+            f"Фактическая: {rates['rate']:.1f}\n"
+            f"При опросе с retry_interval: {rates['baseline_rate']:.1f}\n"
+            f"Сокращение: {rates['reduction']:.0%}\n\n"
+            "📨 Уведомления:\n"
+            f"В очереди: {self.dispatcher.depth()}, отправлено: {self.dispatcher.sent}, "
+            f"пропущено: {self.dispatcher.dropped}\n"
+            f"Задержка доставки p50/p95: {self._format_latency()}"
+        )
+
+    async def timing_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Команда /timing — время этапов последней проверки (DNS, подключение, TLS,
+        первый байт, загрузка, извлечение текста) и p50/p95 общего времени по точкам.
+        Аргументы те же, что у /status. Доступно только Admin и Auditor.
+        """
+        user_id = update.effective_user.id
+        if not self.is_admin_or_auditor(user_id):
+            await update.message.reply_text("⛔ Только для ролей Admin и Auditor.")
+            return
+
+        args = context.args if isinstance(context.args, list) else []
+        lines = build_timing_lines(self.incidents.get_all_endpoints() or [], \
+                                   StatusFilter(args), self.incidents.get_active_map())
+        if not lines:
+            await update.message.reply_text("⏱ Нет данных о времени проверок.")
+            return
+        for page in paginate(f"⏱ Время проверок, мс: {len(lines)} точек", lines):
+            await update.message.reply_text(page)
+
+    async def uptime_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Команда /uptime — доля успешных проверок, медиана задержки и спарклайн
+        по истории последних проверок точек. Аргумент вида 30m, 6h или 7d
+        ограничивает период, остальные те же, что у /status.
+        Доступно только Admin и Auditor.
+        """
+        user_id = update.effective_user.id
+        if not self.is_admin_or_auditor(user_id):
+            await update.message.reply_text("⛔ Только для ролей Admin и Auditor.")
+            return
+
+        args = context.args if isinstance(context.args, list) else []
+        period, args = split_period(args)
+        since = time.time() - period if period else None
+        lines = build_uptime_lines(self.incidents.get_all_endpoints() or [], \
+                                   StatusFilter(args), self.incidents.get_active_map(), since)
+        if not lines:
+            await update.message.reply_text("📈 Нет данных об истории проверок.")
+            return
+        for page in paginate(f"📈 Доступность по истории проверок: {len(lines)} точек", lines):
+            await update.message.reply_text(page)
+
+    async def history_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Команда /history — инциденты, начавшиеся за период (по умолчанию 7 суток),
+        по индексу журнала, со сводкой: простой, MTTR и MTBF.
+        Аргументы: период вида 6h или 7d, имя ресурса, code:<код>.
+        Доступно только Admin и Auditor.
+        """
+        user_id = update.effective_user.id
+        if not self.is_admin_or_auditor(user_id):
+            await update.message.reply_text("⛔ Только для ролей Admin и Auditor.")
+            return
+
+        args = context.args if isinstance(context.args, list) else []
+        period, resource, code = parse_history_args(args)
+        now = time.time()
+
+        def query():
+            """Дочитывает индекс и выполняет запросы (вне цикла событий бота)."""
+            history = self.incidents.get_history()
+            return history.query(resource, now - period, code=code), \
+                history.stats(resource, now - period, code=code, now=now)
+
+        try:
+            incidents, stats = await asyncio.to_thread(query)
+        except (OSError, sqlite3.Error) as e:
+            self.logger.error("Ошибка запроса истории инцидентов: %s", e)
+            await update.message.reply_text("❌ Ошибка чтения истории инцидентов.")
+            return
+        title = f"📜 История инцидентов за {format_period(period)}"
+        if resource:
+            title += f": {resource}"
+        if code is not None:
+            title += f", код {code}"
+        for page in paginate(title + " (время UTC)", \
+                             build_incident_history_lines(incidents, stats, now)):
+            await update.message.reply_text(page)
+
+    async def availability_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Команда /availability — доступность и задержка точек за период
+        (по умолчанию 30 суток) по хранилищу проверок. Аргумент вида 6h или 7d
+        задает период, остальные те же, что у /status. Доступно только Admin и Auditor.
+        """
+        user_id = update.effective_user.id
+        if not self.is_admin_or_auditor(user_id):
+            await update.message.reply_text("⛔ Только для ролей Admin и Auditor.")
+            return
+
+        writer = get_probe_store()
+        if writer is None:
+            await update.message.reply_text("📊 Хранилище проверок не настроено (probe_store).")
+            return
+        args = context.args if isinstance(context.args, list) else []
+        period, args = split_period(args)
+        period = period or DEFAULT_AVAILABILITY_PERIOD
+        # Запросы к SQLite выполняются вне цикла событий бота
+        lines = await asyncio.to_thread(build_availability_lines, \
+                                        self.incidents.get_all_endpoints() or [], \
+                                        StatusFilter(args), writer.store, time.time() - period, \
+                                        self.incidents.get_active_map())
+        if not lines:
+            await update.message.reply_text("📊 Нет данных о проверках за период.")
+            return
+        header = f"📊 Доступность за {format_period(period)}: {len(lines)} точек"
+        for page in paginate(header, lines):
+            await update.message.reply_text(page)
+
+    def _format_latency(self) -> str:
+        """Форматирует медиану и 95-й перцентиль задержки доставки уведомлений."""
+        p50 = self.dispatcher.latency.quantile(0.5)
+        p95 = self.dispatcher.latency.quantile(0.95)
+        if p50 is None:
+            return "нет данных"
+        return f"{p50:.2f} / {p95:.2f} с"
+
     async def refresh_handler(self, update: Update, _context: ContextTypes.DEFAULT_TYPE):
         """
         Команда /refresh — перечитывает журнал инцидентов из файла.
@@ -170,6 +361,34 @@ class TelegramNotifier(Notifier):
         self.incidents.reload_active_incidents()
         await update.message.reply_text("🔄 Инциденты перечитаны из журнала.")
 
+    def set_reloader(self, reloader: Callable[[], dict]):
+        """Устанавливает функцию перечитывания конфигурации для команды /reload."""
+        self.reloader = reloader
+
+    async def reload_handler(self, update: Update, _context: ContextTypes.DEFAULT_TYPE):
+        """
+        Команда /reload — перечитывает ресурсы из config.json без перезапуска опроса.
+        Доступно только Admin.
+        """
+        user_id = update.effective_user.id
+        if not self.is_admin(user_id):
+            await update.message.reply_text("⛔ Только для администратора.")
+            return
+        if self.reloader is None:
+            await update.message.reply_text("ℹ️ Перечитывание недоступно в этом режиме работы.")
+            return
+
+        try:
+            summary = await asyncio.to_thread(self.reloader)
+        except ConfigError as e:
+            await update.message.reply_text(f"⚠️ Конфигурация не перечитана: {e}")
+            return
+        await update.message.reply_text(
+            "🔁 Конфигурация перечитана:\n"
+            f"Добавлено: {summary['added']}, удалено: {summary['removed']}, "
+            f"изменено: {summary['updated']}, без изменений: {summary['unchanged']}"
+        )
+
     async def unknown_command_handler(self, update: Update, _context: ContextTypes.DEFAULT_TYPE):
         """Обрабатывает неизвестные команды."""
         await update.message.reply_text("⛔ Неизвестная команда. \
@@ -179,26 +398,17 @@ class TelegramNotifier(Notifier):
         """
         Уведомляет всех пользователей о начале инцидента.
 
-        :param resource_name: имя ресурса, у которого зафиксирована проблема
+        :param incident: открытый инцидент
         """
-        for user_id in self.users:
-            try:
-                await self.app.bot.send_message(chat_id=user_id, text=f"❗ Инцидент: {incident}")
-            except TelegramError as e:
-                self.logger.warning("Ошибка при отправке уведомления: %s", e)
+        await self.dispatcher.broadcast(f"❗ Инцидент: {incident}")
 
     async def notify_recovery(self, incident: Incident):
         """
         Уведомляет всех пользователей о завершении инцидента.
 
-        :param resource_name: имя ресурса, восстановившего работу
+        :param incident: закрытый инцидент
         """
-        for user_id in self.users:
-            try:
-                await self.app.bot.\
-                    send_message(chat_id=user_id, text=f"✅ Восстановление: {incident}")
-            except TelegramError as e:
-                self.logger.warning("Ошибка при отправке уведомления: %s", e)
+        await self.dispatcher.broadcast(f"✅ Восстановление: {incident}")
 
     async def notify_info(self, message: str):
         """
@@ -206,19 +416,41 @@ class TelegramNotifier(Notifier):
 
         :param message: текст сообщения
         """
-        for user_id, info in self.users.items():
-            if info["role"] in {"Admin", "Auditor"}:
-                try:
-                    await self.app.bot.send_message(chat_id=user_id, text=f"ℹ️ {message}")
-                except TelegramError as e:
-                    self.logger.warning("Ошибка при отправке системного уведомления: %s", e)
+        await self.dispatcher.broadcast(f"ℹ️ {message}", self._staff())
+
+    def submit_incident(self, incident: Incident):
+        """Ставит событие открытия инцидента в очередь диспетчера (из потока опроса)."""
+        self.dispatcher.submit_threadsafe(Notification("incident", f"❗ Инцидент: {incident}"))
+
+    def submit_recovery(self, incident: Incident):
+        """Ставит событие завершения инцидента в очередь диспетчера (из потока опроса)."""
+        self.dispatcher.submit_threadsafe(Notification("recovery", \
+                                                       f"✅ Восстановление: {incident}"))
+
+    def _staff(self) -> set:
+        """Возвращает ID пользователей с ролями Admin и Auditor."""
+        return {user_id for user_id, info in self.users.items() \
+                if info["role"] in {"Admin", "Auditor"}}
 
     def send_task(self, coro: Coroutine[Any, Any, Any]):
         """
         Запускает coroutine в loop'e Telegram-приложения из другого потока
-        с помощью job_queue (рекомендовано PTB).
+        без задержки (run_coroutine_threadsafe).
         """
-        if self.app and self.app.job_queue:
-            self.app.job_queue.run_once(lambda _: self.app.create_task(coro), when=1)
-        else:
-            self.logger.warning("JobQueue не готов — не удалось отправить coroutine.")
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            coro.close()
+            self.logger.warning("Цикл событий бота не запущен — не удалось отправить coroutine.")
+            return
+        try:
+            future = asyncio.run_coroutine_threadsafe(coro, loop)
+        except RuntimeError:
+            coro.close()
+            self.logger.warning("Цикл событий бота закрыт — не удалось отправить coroutine.")
+            return
+        future.add_done_callback(self._log_task_error)
+
+    def _log_task_error(self, future):
+        """Записывает в лог ошибку coroutine, запущенной через send_task."""
+        if not future.cancelled() and future.exception() is not None:
+            self.logger.error("Ошибка в задаче уведомления: %s", future.exception())
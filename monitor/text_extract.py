@@ -0,0 +1,143 @@
+"""monitor/text_extract.py - Извлечение текста из тела ответа"""
+
+import json
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:  # полный HTML-парсер необязателен
+    BeautifulSoup = None
+
+# Максимальная длина извлекаемого текста по умолчанию
+DEFAULT_MAX_TEXT_CHARS = 2000
+# Размер порции разметки, передаваемой парсеру за один раз
+FEED_SIZE = 8192
+# Разделитель фрагментов текста (как get_text(separator=",") в BeautifulSoup)
+SEPARATOR = ","
+
+# Теги, содержимое которых не является текстом страницы
+SKIP_TAGS = {"script", "style", "noscript", "template"}
+
+# Экстракторы по умолчанию для типов содержимого; "*" — для всех прочих
+DEFAULT_EXTRACTORS = {
+    "text/html": "fast",
+    "application/json": "json",
+    "*": "text",
+}
+
+
+class _TextCollector(HTMLParser):
+    """
+    Потоковый сборщик текста из HTML: отбрасывает теги, скрипты и стили
+    и прекращает работу, набрав max_chars символов.
+    """
+
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.parts: List[str] = []
+        self.length = 0
+        self.done = False
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if self.done or self._skip_depth:
+            return
+        text = data.strip()
+        if not text:
+            return
+        self.parts.append(text)
+        self.length += len(text) + len(SEPARATOR)
+        if self.max_chars and self.length >= self.max_chars:
+            self.done = True
+
+
+def extract_html_fast(text: str, max_chars: int = DEFAULT_MAX_TEXT_CHARS) -> str:
+    """
+    Извлекает текст из HTML без построения дерева документа.
+    Разметка подается парсеру порциями, разбор останавливается после max_chars символов.
+    """
+    collector = _TextCollector(max_chars)
+    for start in range(0, len(text), FEED_SIZE):
+        collector.feed(text[start:start + FEED_SIZE])
+        if collector.done:
+            break
+    else:
+        collector.close()
+    return _cap(SEPARATOR.join(collector.parts), max_chars)
+
+
+def extract_html_bs4(text: str, max_chars: int = DEFAULT_MAX_TEXT_CHARS) -> str:
+    """Извлекает текст из HTML полным разбором BeautifulSoup (lxml)."""
+    if BeautifulSoup is None:
+        raise RuntimeError("для экстрактора bs4 требуется пакет beautifulsoup4")
+    soup = BeautifulSoup(text, "lxml")
+    return _cap(soup.get_text(separator=SEPARATOR, strip=True), max_chars)
+
+
+def extract_json(text: str, max_chars: int = DEFAULT_MAX_TEXT_CHARS) -> str:
+    """Преобразует JSON в строку; обрезанный или невалидный JSON выводится как есть."""
+    try:
+        return _cap(str(json.loads(text)), max_chars)
+    except ValueError:
+        return extract_plain(text, max_chars)
+
+
+def extract_plain(text: str, max_chars: int = DEFAULT_MAX_TEXT_CHARS) -> str:
+    """Возвращает текст без крайних пробелов."""
+    return _cap(text.strip(), max_chars)
+
+
+EXTRACTORS: Dict[str, Callable[[str, int], str]] = {
+    "fast": extract_html_fast,
+    "bs4": extract_html_bs4,
+    "json": extract_json,
+    "text": extract_plain,
+}
+
+
+def select_extractor(content_type: str, \
+                     extractors: Optional[Dict[str, str]] = None) -> Callable[[str, int], str]:
+    """
+    Выбирает функцию извлечения текста по типу содержимого.
+
+    :param content_type: значение заголовка Content-Type
+    :param extractors: сопоставление {тип содержимого: имя экстрактора},
+                       дополняющее DEFAULT_EXTRACTORS
+    """
+    mapping = dict(DEFAULT_EXTRACTORS)
+    if extractors:
+        mapping.update(extractors)
+    mime = content_type.split(";", 1)[0].strip().lower()
+    name = mapping.get(mime, mapping["*"])
+    return EXTRACTORS[name]
+
+
+def extract_text(content_type: str, text: str, \
+                 extractors: Optional[Dict[str, str]] = None, \
+                 max_chars: int = DEFAULT_MAX_TEXT_CHARS) -> str:
+    """
+    Возвращает чистый текст из тела ответа в зависимости от типа содержимого.
+
+    :param content_type: значение заголовка Content-Type
+    :param text: декодированное тело ответа
+    :param extractors: сопоставление {тип содержимого: имя экстрактора}
+    :param max_chars: максимальная длина результата (0 — без ограничения)
+    """
+    return select_extractor(content_type, extractors)(text, max_chars)
+
+
+def _cap(text: str, max_chars: int) -> str:
+    """Обрезает текст до max_chars символов."""
+    if max_chars and len(text) > max_chars:
+        return text[:max_chars]
+    return text
@@ -0,0 +1,112 @@
+"""tests/test_async_monitor.py - Тесты асинхронного движка мониторинга"""
+
+import asyncio
+import time
+from unittest.mock import MagicMock
+from monitor.async_monitor import AsyncMonitor
+
+
+class DummyEndpoint:
+    """
+    Заглушка с синхронной проверкой, возвращающая последовательность кодов ответов.
+    """
+
+    def __init__(self, name, statuses):
+        self._name = name
+        self._statuses = statuses
+        self._index = 0
+
+    def check_status(self):
+        """Возвращает следующий статус из списка (True/False, код, текст)."""
+        if self._index < len(self._statuses):
+            code = self._statuses[self._index]
+            self._index += 1
+        else:
+            code = 200
+        return code == 200, code, "text of response"
+
+    def get_name(self):
+        """Возвращает имя точки мониторинга."""
+        return self._name
+
+
+class SlowAsyncEndpoint:
+    """
+    Заглушка с асинхронной проверкой, фиксирующая число одновременных запросов.
+    """
+
+    active = 0
+    peak = 0
+
+    def __init__(self, name):
+        self._name = name
+
+    async def check_status_async(self, _client=None):
+        """Имитирует медленный успешный запрос."""
+        SlowAsyncEndpoint.active += 1
+        SlowAsyncEndpoint.peak = max(SlowAsyncEndpoint.peak, SlowAsyncEndpoint.active)
+        await asyncio.sleep(0.05)
+        SlowAsyncEndpoint.active -= 1
+        return True, 200, ""
+
+    def get_name(self):
+        """Возвращает имя точки мониторинга."""
+        return self._name
+
+
+def run_monitor(monitor, seconds):
+    """Запускает движок на заданное время и останавливает его."""
+    monitor.start()
+    time.sleep(seconds)
+    monitor.stop()
+    monitor.join(timeout=5)
+    assert not monitor.is_alive()
+
+
+def test_async_monitor_registers_and_resolves_incident():
+    """
+    Проверяет, что асинхронный движок открывает и закрывает инцидент
+    по тем же правилам подтверждения, что и MonitorThread.
+    """
+    endpoint = DummyEndpoint("dummy", [200, 500, 500, 500, 500, 200, 200, 200])
+    incident_manager = MagicMock()
+    config = {"check_interval": 0.3, "retry_interval": 0.05, "max_attempts": 3}
+
+    monitor = AsyncMonitor(logger=None, incidents=incident_manager, max_concurrency=10)
+    monitor.add(endpoint, config)
+    run_monitor(monitor, 1.5)
+
+    incident_manager.register_incident.assert_called_once_with("dummy", 500, "text of response", \
+                                                               None)
+    incident_manager.resolve_incident.assert_called_once_with("dummy")
+
+
+def test_async_monitor_ignores_unstable_failure():
+    """
+    Проверяет, что одиночный сбой без подтверждения не открывает инцидент.
+    """
+    endpoint = DummyEndpoint("flaky", [500, 200, 200, 200])
+    incident_manager = MagicMock()
+    config = {"check_interval": 0.1, "retry_interval": 0.05, "max_attempts": 3}
+
+    monitor = AsyncMonitor(logger=None, incidents=incident_manager)
+    monitor.add(endpoint, config)
+    run_monitor(monitor, 0.6)
+
+    incident_manager.register_incident.assert_not_called()
+
+
+def test_async_monitor_limits_concurrency():
+    """
+    Проверяет, что число одновременных проверок не превышает max_concurrency.
+    """
+    SlowAsyncEndpoint.active = 0
+    SlowAsyncEndpoint.peak = 0
+    config = {"check_interval": 0.1, "retry_interval": 0.01, "max_attempts": 3}
+
+    monitor = AsyncMonitor(logger=None, incidents=MagicMock(), max_concurrency=5)
+    for i in range(50):
+        monitor.add(SlowAsyncEndpoint(f"ep{i}"), config)
+    run_monitor(monitor, 0.5)
+
+    assert 0 < SlowAsyncEndpoint.peak <= 5
@@ -0,0 +1,36 @@
+"""tests/test_body_store.py - Тесты хранилища тел ответов"""
+
+import os
+from monitor.body_store import BodyStore, body_key
+
+
+def test_same_body_is_stored_once_compressed(tmp_path):
+    """Проверяет, что одинаковые тела хранятся одним сжатым файлом."""
+    store = BodyStore(str(tmp_path / "bodies"))
+    page = "<html>502 Bad Gateway</html>\n" * 200
+    key = store.put(page)
+    assert store.put(page) == key == body_key(page)
+    files = [os.path.join(root, name) for root, _, names in os.walk(tmp_path / "bodies") \
+             for name in names]
+    assert len(files) == 1 and os.path.getsize(files[0]) < len(page) // 10
+    assert store.get(key) == page
+
+
+def test_missing_or_invalid_key(tmp_path):
+    """Проверяет, что отсутствующее тело и некорректный ключ дают None."""
+    store = BodyStore(str(tmp_path / "bodies"))
+    assert store.get(body_key("нет такого")) is None
+    assert store.get("../../etc/passwd") is None
+    assert store.get(None) is None
+
+
+def test_purge_removes_stale_bodies_except_kept(tmp_path):
+    """Проверяет, что purge удаляет старые тела, кроме сохраненных повторно и оставленных."""
+    store = BodyStore(str(tmp_path / "bodies"))
+    stale, reused, kept = store.put("старое"), store.put("повторное"), store.put("активное")
+    for key in (stale, reused, kept):
+        os.utime(store._path(key), (1000, 1000))  # pylint: disable=protected-access
+    store.put("повторное")
+    assert store.purge(older_than=2000, keep=[kept]) == 1
+    assert store.get(stale) is None
+    assert store.get(reused) == "повторное" and store.get(kept) == "активное"
@@ -0,0 +1,161 @@
+"""tests/test_cluster.py - Тесты распределения точек между узлами кластера"""
+
+import json
+import multiprocessing
+import os
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+from monitor.cluster import ClusterNode, HashRing, LeaseStore
+from monitor.incident_manager import IncidentManager
+from monitor.probe_runner import ProbeSet
+
+RESOURCES = [{"name": f"service-{i}"} for i in range(60)]
+
+
+def run_node(store_path, node_id, out_dir):
+    """
+    Процесс узла: вместо опроса записывает в файл набор своих точек.
+    """
+    def start(owned):
+        # Запись через временный файл: читатель не видит пустой или недописанный файл
+        path = Path(out_dir) / f"{node_id}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps([r["name"] for r in owned]), encoding="utf-8")
+        os.replace(tmp, path)
+        return []
+
+    node = ClusterNode(LeaseStore(store_path, node_id, ttl=1.0), RESOURCES, start)
+    node.start()
+    node.join()
+
+
+def read_owned(out_dir, nodes):
+    """Читает наборы точек, записанные узлами."""
+    owned = {}
+    for node_id in nodes:
+        path = Path(out_dir) / f"{node_id}.json"
+        owned[node_id] = set(json.loads(path.read_text(encoding="utf-8"))) \
+            if path.exists() else set()
+    return owned
+
+
+def wait_for_partition(out_dir, nodes, timeout=10.0):
+    """Ждет, пока все узлы получат точки и разделят их без пересечений."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        owned = read_owned(out_dir, nodes)
+        if all(owned.values()) \
+                and sum(len(names) for names in owned.values()) == len(RESOURCES) \
+                and set().union(*owned.values()) == {r["name"] for r in RESOURCES}:
+            return owned
+        time.sleep(0.1)
+    raise AssertionError(f"точки не распределены: {read_owned(out_dir, nodes)}")
+
+
+def test_ring_moves_only_departed_node_points():
+    """Проверяет, что при уходе узла переезжают только его точки."""
+    names = [r["name"] for r in RESOURCES]
+    before = HashRing(["a", "b", "c"])
+    after = HashRing(["a", "b"])
+    for name in names:
+        if before.owner(name) != "c":
+            assert after.owner(name) == before.owner(name)
+    assert len({before.owner(name) for name in names}) == 3
+    assert HashRing([]).owner("x") is None
+
+
+def test_incident_claims_deduplicate_notifications(tmp_path):
+    """
+    Проверяет, что два узла, открывшие один инцидент, уведомляют о нем один раз.
+    """
+    store_path = str(tmp_path / "cluster.sqlite")
+    managers = []
+    for node_id in ("a", "b"):
+        manager = IncidentManager(log_file=str(tmp_path / f"{node_id}.jsonl"))
+        manager.set_claims(LeaseStore(store_path, node_id))
+        manager.set_notifier(MagicMock())
+        managers.append(manager)
+
+    for manager in managers:
+        manager.register_incident("db", 500, "error")
+    for manager in managers:
+        manager.resolve_incident("db")
+
+    calls = [(m.notifier.submit_incident.call_count, m.notifier.submit_recovery.call_count) \
+             for m in managers]
+    assert calls == [(1, 1), (0, 0)]
+
+
+def test_handoff_closes_incident_without_notification(tmp_path):
+    """Проверяет передачу инцидента другому узлу без уведомления."""
+    manager = IncidentManager(log_file=str(tmp_path / "a.jsonl"))
+    manager.set_notifier(MagicMock())
+    manager.register_incident("db", 500, "error")
+    manager.handoff_incident("db")
+    assert not manager.get_active()
+    manager.notifier.submit_recovery.assert_not_called()
+
+
+def test_rebalance_keeps_probing_points_that_stay_with_node(tmp_path):
+    """
+    Проверяет, что при появлении второго узла точки, оставшиеся у узла, продолжают
+    опрос с прежним состоянием, а их открытый инцидент закрывается при восстановлении.
+    """
+    resources = [{"name": f"service-{i}", "url": "http://127.0.0.1:9/", "method": "GET", \
+                  "port": 9, "check_interval": 0.05, "retry_interval": 0.01, \
+                  "max_attempts": 2} for i in range(20)]
+    ring = HashRing(["a", "b"])
+    stays = next(r["name"] for r in resources if ring.owner(r["name"]) == "a")
+    manager = IncidentManager(log_file=str(tmp_path / "a.jsonl"))
+    manager.register_incident(stays, 500, "error")
+    probes = ProbeSet(MagicMock(), manager, active=manager.get_active_map())
+    node = ClusterNode(LeaseStore(str(tmp_path / "cluster.sqlite"), "a"), resources, \
+                       probes.apply, manager)
+    # pylint: disable=protected-access
+    with patch("monitor.httpendpoint.HttpEndpoint.check_status", return_value=(False, 500, "")):
+        node._rebalance(["a"])
+        before = {endpoint.get_name(): endpoint for endpoint in probes.endpoints()}
+        node._rebalance(["a", "b"])
+        after = {endpoint.get_name(): endpoint for endpoint in probes.endpoints()}
+    assert set(after) == {r["name"] for r in resources if ring.owner(r["name"]) == "a"}
+    assert all(after[name] is before[name] for name in after)
+    assert stays in manager.get_active_map()
+
+    with patch("monitor.httpendpoint.HttpEndpoint.check_status", return_value=(True, 200, "")):
+        deadline = time.monotonic() + 5
+        while stays in manager.get_active_map() and time.monotonic() < deadline:
+            time.sleep(0.02)
+    probes.stop()
+    probes.join()
+    manager.close()
+    assert stays not in manager.get_active_map()
+
+
+def test_nodes_share_points_and_take_over_after_failure(tmp_path):
+    """
+    Проверяет, что три процесса-узла делят точки без пересечений,
+    а после остановки одного его точки переходят к оставшимся.
+    """
+    store_path = str(tmp_path / "cluster.sqlite")
+    LeaseStore(store_path, "init").close()
+    context = multiprocessing.get_context("spawn")
+    nodes = ["node-a", "node-b", "node-c"]
+    processes = {node_id: context.Process(target=run_node, \
+                                          args=(store_path, node_id, str(tmp_path)), \
+                                          daemon=True) for node_id in nodes}
+    for process in processes.values():
+        process.start()
+    try:
+        owned = wait_for_partition(tmp_path, nodes, timeout=20)
+
+        processes["node-c"].kill()
+        processes["node-c"].join()
+        (tmp_path / "node-c.json").unlink()
+        survivors = wait_for_partition(tmp_path, ["node-a", "node-b"])
+        for node_id in ("node-a", "node-b"):
+            assert owned[node_id] <= survivors[node_id]
+    finally:
+        for process in processes.values():
+            process.kill()
+            process.join()
@@ -0,0 +1,200 @@
+"""tests/test_dispatcher.py"""
+
+import asyncio
+import threading
+import time
+import pytest
+from telegram.error import RetryAfter
+from monitor.dispatcher import Notification, NotificationDispatcher, TokenBucket, \
+    digest_pages
+
+
+class FakeSender:
+    """Заглушка отправки: запоминает сообщения, может вернуть RetryAfter."""
+
+    def __init__(self, retry_after_first: int = 0):
+        self.messages = []
+        self.retry_after_first = retry_after_first
+
+    async def __call__(self, chat_id, text):
+        if self.retry_after_first:
+            self.retry_after_first -= 1
+            raise RetryAfter(1)
+        self.messages.append((chat_id, text, time.monotonic()))
+
+
+def test_token_bucket_limits_rate():
+    """Проверяет, что ведро токенов пропускает пачку и затем ограничивает частоту."""
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+@pytest.mark.asyncio
+async def test_burst_is_coalesced_into_digest():
+    """
+    Проверяет, что 500 событий за окно объединяются в одну сводку на пользователя.
+    """
+    sender = FakeSender()
+    dispatcher = NotificationDispatcher(sender, lambda: [1, 2, 3], digest_window=0.2)
+    await dispatcher.start()
+    for i in range(500):
+        dispatcher.submit(Notification("incident", f"❗ Инцидент: service-{i}"))
+    await asyncio.sleep(0.5)
+    await dispatcher.stop()
+
+    for chat_id in (1, 2, 3):
+        pages = [text for chat, text, _ in sender.messages if chat == chat_id]
+        assert 1 <= len(pages) <= 3
+        assert all(len(page) <= 4096 for page in pages)
+        assert "Сводка событий: 500" in pages[0]
+        assert sum(page.count("service-") for page in pages) == 500
+
+
+@pytest.mark.asyncio
+async def test_large_digest_is_sent_in_full():
+    """
+    Проверяет, что сводка, не помещающаяся в 10 сообщений, рассылается целиком
+    без отметки о пропущенных строках.
+    """
+    sender = FakeSender()
+    dispatcher = NotificationDispatcher(sender, lambda: [1], digest_window=0.2, \
+                                        global_rate=1000, chat_rate=1000, chat_burst=1000)
+    await dispatcher.start()
+    for i in range(500):
+        dispatcher.submit(Notification("incident", f"❗ Инцидент: service-{i} " + "x" * 200))
+    await asyncio.sleep(0.5)
+    await dispatcher.stop()
+
+    pages = [text for _, text, _ in sender.messages]
+    assert len(pages) > 10 and all(len(page) <= 4096 for page in pages)
+    assert sum(page.count("service-") for page in pages) == 500
+    assert not any("уточните фильтр" in page for page in pages)
+    assert pages[0].startswith(f"(1/{len(pages)})\n📣 Сводка событий: 500")
+    assert dispatcher.dropped == 0
+
+
+def test_digest_pages_truncate_long_event():
+    """Проверяет, что слишком длинное событие обрезается до размера сообщения."""
+    pages = digest_pages(["a" * 10000, "b"], limit=100)
+    assert all(len(page) <= 100 for page in pages)
+    assert pages[-1].endswith("\nb")
+
+
+@pytest.mark.asyncio
+async def test_single_event_sent_as_is_and_respects_recipients():
+    """Проверяет, что одиночное событие отправляется без сводки только получателям."""
+    sender = FakeSender()
+    dispatcher = NotificationDispatcher(sender, lambda: [1, 2, 3], digest_window=0.05)
+    await dispatcher.start()
+    dispatcher.submit(Notification("info", "ℹ️ запуск", {1, 2}))
+    await asyncio.sleep(0.2)
+    await dispatcher.stop()
+
+    assert sorted((chat, text) for chat, text, _ in sender.messages) == \
+        [(1, "ℹ️ запуск"), (2, "ℹ️ запуск")]
+
+
+@pytest.mark.asyncio
+async def test_first_event_is_not_delayed_by_digest_window():
+    """
+    Проверяет, что одиночное событие рассылается без ожидания окна сводки,
+    а события сразу после рассылки объединяются в сводку.
+    """
+    sender = FakeSender()
+    dispatcher = NotificationDispatcher(sender, lambda: [1], digest_window=2.0)
+    await dispatcher.start()
+    dispatcher.submit(Notification("incident", "❗ Инцидент: db"))
+    for _ in range(50):
+        if sender.messages:
+            break
+        await asyncio.sleep(0.01)
+    assert [text for _, text, _ in sender.messages] == ["❗ Инцидент: db"]
+    assert dispatcher.latency.quantile(0.5) < 0.5
+
+    dispatcher.submit(Notification("incident", "❗ Инцидент: api"))
+    dispatcher.submit(Notification("incident", "❗ Инцидент: web"))
+    await asyncio.sleep(0.1)
+    assert len(sender.messages) == 1
+    await dispatcher.stop()
+    assert "Сводка событий: 2" in sender.messages[1][1]
+
+
+@pytest.mark.asyncio
+async def test_chat_rate_limit_spaces_messages():
+    """Проверяет ограничение частоты сообщений в один чат."""
+    sender = FakeSender()
+    dispatcher = NotificationDispatcher(sender, lambda: [1], chat_rate=20, chat_burst=1)
+    await asyncio.gather(*(dispatcher.send_to(1, f"m{i}") for i in range(5)))
+
+    times = [sent for _, _, sent in sender.messages]
+    assert times[-1] - times[0] >= 0.18
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_and_retries():
+    """Проверяет повтор отправки после RetryAfter."""
+    sender = FakeSender(retry_after_first=1)
+    dispatcher = NotificationDispatcher(sender, lambda: [1])
+    started = time.monotonic()
+    assert await dispatcher.send_to(1, "hello")
+    assert time.monotonic() - started >= 0.9
+    assert [text for _, text, _ in sender.messages] == ["hello"]
+
+
+@pytest.mark.asyncio
+async def test_queue_overflow_drops_events():
+    """Проверяет, что при переполнении очереди события отбрасываются без блокировки."""
+    dispatcher = NotificationDispatcher(FakeSender(), lambda: [1], queue_size=2)
+    await dispatcher.start()
+    results = [dispatcher.submit(Notification("incident", str(i))) for i in range(5)]
+    assert results.count(True) == 2
+    assert dispatcher.dropped == 3
+    await dispatcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_submit_from_probe_thread_is_delivered_without_delay():
+    """
+    Проверяет передачу события из другого потока и учет задержки доставки.
+    """
+    sender = FakeSender()
+    dispatcher = NotificationDispatcher(sender, lambda: [1], digest_window=0)
+    await dispatcher.start()
+
+    thread = threading.Thread(target=dispatcher.submit_threadsafe, \
+                              args=(Notification("incident", "❗ Инцидент: db"),))
+    thread.start()
+    thread.join()
+    for _ in range(50):
+        if sender.messages:
+            break
+        await asyncio.sleep(0.01)
+    await dispatcher.stop()
+
+    assert [text for _, text, _ in sender.messages] == ["❗ Инцидент: db"]
+    assert dispatcher.latency.snapshot()["count"] == 1
+    assert dispatcher.latency.quantile(0.5) < 0.5
+
+
+@pytest.mark.asyncio
+async def test_events_before_start_are_delivered_after_start():
+    """
+    Проверяет, что события, переданные из потоков опроса до запуска цикла
+    событий бота, не теряются, а рассылаются после start().
+    """
+    sender = FakeSender()
+    dispatcher = NotificationDispatcher(sender, lambda: [1], queue_size=2, digest_window=0)
+    thread = threading.Thread(target=lambda: [dispatcher.submit_threadsafe( \
+        Notification("incident", f"❗ Инцидент: s{i}")) for i in range(3)])
+    thread.start()
+    thread.join()
+    assert dispatcher.depth() == 2 and dispatcher.dropped == 1
+
+    await dispatcher.start()
+    await asyncio.sleep(0.1)
+    await dispatcher.stop()
+    texts = " ".join(text for _, text, _ in sender.messages)
+    assert "s0" in texts and "s1" in texts and "s2" not in texts
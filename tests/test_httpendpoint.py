@@ -1,10 +1,17 @@
 """tests/test_httpendpoint.py"""
 
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch, Mock
+import pytest
 import requests
 from monitor.httpendpoint import HttpEndpoint
+from monitor.http_pool import SessionPool
 
-def make_endpoint(url="http://localhost", port=80, method="GET", success=200, error=500):
+def make_endpoint(url="http://localhost", port=80, method="GET", success=200, error=500, \
+                  **extra):
     """
     Создает тестовый экземпляр HttpEndpoint с заданной конфигурацией.
     """
@@ -20,6 +27,7 @@ def make_endpoint(url="http://localhost", port=80, method="GET", success=200, er
         "interval_retry": 10,
         "max_attempts": 3,
     }
+    config.update(extra)
     return HttpEndpoint(config)
 
 def test_url_with_port_zero():
@@ -36,7 +44,7 @@ def test_url_with_custom_port():
     endpoint = make_endpoint(url="http://localhost", port=8080)
     assert endpoint.build_full_url() == "http://localhost:8080"
 
-@patch("monitor.httpendpoint.requests.request")
+@patch("monitor.httpendpoint.requests.Session.request")
 def test_check_status_success(mock_request):
     """
     Проверяет, что check_status возвращает True при коде 200.
@@ -48,7 +56,7 @@ def test_check_status_success(mock_request):
     assert ok is True
     assert code == 200
 
-@patch("monitor.httpendpoint.requests.request")
+@patch("monitor.httpendpoint.requests.Session.request")
 def test_check_status_failure(mock_request):
     """
     Проверяет, что check_status возвращает False при коде 500.
@@ -60,7 +68,7 @@ def test_check_status_failure(mock_request):
     assert ok is False
     assert code == 500
 
-@patch("monitor.httpendpoint.requests.request", \
+@patch("monitor.httpendpoint.requests.Session.request", \
        side_effect=requests.RequestException("Connection failed"))
 def test_check_status_exception(_mock_request):
     """
@@ -71,7 +79,7 @@ def test_check_status_exception(_mock_request):
     assert ok is False
     assert code == -1
 
-@patch("monitor.httpendpoint.requests.request")
+@patch("monitor.httpendpoint.requests.Session.request")
 def test_check_status_not_found(mock_request):
     """
     Проверяет, что check_status корректно обрабатывает код 404.
@@ -84,7 +92,7 @@ def test_check_status_not_found(mock_request):
     assert ok is False
     assert code == 404
 
-@patch("monitor.httpendpoint.requests.request")
+@patch("monitor.httpendpoint.requests.Session.request")
 def test_check_status_with_post(mock_request):
     """
     Проверяет, что check_status выполняет POST-запрос.
@@ -101,7 +109,7 @@ def test_check_status_with_post(mock_request):
     assert ok is True
     assert code == 200
     mock_request.assert_called_with(
-        "POST", "http://localhost/healthcheck", timeout=5
+        "POST", "http://localhost/healthcheck", timeout=(5, 5), stream=True
     )
 
 def test_url_with_embedded_port():
@@ -114,3 +122,217 @@ def test_url_with_embedded_port():
     )
     assert endpoint.build_full_url() == \
         "http://svc2.copytrust.ru:15778/RegistrationService/web/2/healthcheck"
+
+@patch("monitor.httpendpoint.SessionPool.request")
+@patch("monitor.http_pool.requests.Session.request")
+def test_fresh_connection_bypasses_pool(mock_request, pooled_request):
+    """
+    Проверяет, что при fresh_connection запрос выполняется без общего пула.
+    """
+    endpoint = make_endpoint(fresh_connection=True)
+    mock_request.return_value = Mock(status_code=200)
+
+    ok, _, _ = endpoint.check_status()
+    assert ok is True
+    pooled_request.assert_not_called()
+    mock_request.assert_called_with("GET", "http://localhost:80", timeout=(5, 5), stream=True)
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """
+    Обработчик тестового сервера с поддержкой keep-alive.
+    /big — большая HTML-страница, /error — страница ошибки с кодом 500,
+    /slow — ответ с задержкой 50 мс.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Отвечает телом с Content-Length в зависимости от пути."""
+        code, content_type, body = 200, "text/plain", b"ok"
+        if self.path == "/big":
+            content_type = "text/html; charset=utf-8"
+            body = b"<html><body>" + b"<p>status: fine</p>" * 50000 + b"</body></html>"
+        elif self.path == "/error":
+            code, content_type = 500, "text/html; charset=utf-8"
+            body = b"<html><body><h1>Internal error</h1>" + b"x" * 100000 + b"</body></html>"
+        elif self.path == "/slow":
+            time.sleep(0.05)
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args):
+        """Отключает вывод в stderr."""
+
+
+@pytest.fixture(name="server_url")
+def fixture_server_url():
+    """Запускает локальный HTTP-сервер и возвращает его адрес."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_pool_reuses_connections(server_url):
+    """
+    Проверяет, что повторные проверки используют одно keep-alive соединение.
+    """
+    pool = SessionPool(pool_connections=2, pool_maxsize=2)
+    endpoint = HttpEndpoint({"name": "local", "url": f"{server_url}/health", "port": 0}, \
+                            pool=pool)
+    for _ in range(3):
+        ok, code, _ = endpoint.check_status()
+        assert ok is True and code == 200
+
+    stats = pool.stats.snapshot()["127.0.0.1"]
+    assert stats == {"requests": 3, "connections": 1, "reused": 2}
+    pool.close()
+
+
+def test_pool_configure_closes_old_adapters(server_url):
+    """Проверяет, что при перенастройке пула соединения прежнего адаптера закрываются."""
+    pool = SessionPool(pool_connections=2, pool_maxsize=2)
+    endpoint = HttpEndpoint({"name": "local", "url": f"{server_url}/health", "port": 0}, \
+                            pool=pool)
+    endpoint.check_status()
+    old = pool.session.get_adapter(server_url)
+    assert len(old.poolmanager.pools) == 1
+
+    pool.configure(pool_connections=4, pool_maxsize=4)
+    assert pool.session.get_adapter(server_url) is not old
+    assert len(old.poolmanager.pools) == 0
+    assert endpoint.check_status()[0] is True
+    assert pool.stats.snapshot()["127.0.0.1"]["connections"] == 2
+    pool.close()
+
+
+def test_success_skips_text_extraction(server_url):
+    """
+    Проверяет, что при успешной проверке текст из тела не извлекается.
+    """
+    endpoint = HttpEndpoint({"name": "big", "url": f"{server_url}/big", "port": 0, \
+                             "max_body_bytes": 4096})
+    with patch.object(HttpEndpoint, "extract_text") as mock_extract:
+        ok, code, text = endpoint.check_status()
+    assert (ok, code, text) == (True, 200, "")
+    mock_extract.assert_not_called()
+
+
+def test_failure_text_is_capped(server_url):
+    """
+    Проверяет, что при сбое текст извлекается только из первых max_body_bytes байт.
+    """
+    endpoint = HttpEndpoint({"name": "err", "url": f"{server_url}/error", "port": 0, \
+                             "max_body_bytes": 1000})
+    ok, code, text = endpoint.check_status()
+    assert ok is False and code == 500
+    assert text.startswith("Internal error")
+    assert len(text) < 1000
+
+
+def test_expect_text_assertion(server_url):
+    """
+    Проверяет проверку наличия ожидаемого текста в ответе.
+    """
+    config = {"name": "big", "url": f"{server_url}/big", "port": 0}
+    assert HttpEndpoint({**config, "expect_text": "status: fine"}).check_status()[0] is True
+
+    ok, code, text = HttpEndpoint({**config, "expect_text": "status: broken"}).check_status()
+    assert ok is False and code == 200
+    assert text.startswith("status: fine")
+
+
+def test_check_status_async_capped(server_url):
+    """
+    Проверяет асинхронную проверку с ограничением объема читаемого тела.
+    """
+    endpoint = HttpEndpoint({"name": "err", "url": f"{server_url}/error", "port": 0, \
+                             "max_body_bytes": 1000})
+    ok, code, text = asyncio.run(endpoint.check_status_async())
+    assert ok is False and code == 500
+    assert text.startswith("Internal error") and len(text) < 1000
+
+
+def test_probe_phases_recorded(server_url):
+    """
+    Проверяет запись времени этапов: новое соединение, затем соединение из пула,
+    извлечение текста только при сбое.
+    """
+    pool = SessionPool()
+    endpoint = HttpEndpoint({"name": "timed", "url": f"{server_url}/error", "port": 0}, pool)
+    endpoint.check_status()
+    endpoint.check_status()
+
+    first, second = endpoint.timings.items()
+    assert first.reused is False and second.reused is True
+    assert first.dns > 0 and first.connect > 0 and first.tls == 0
+    assert second.dns == second.connect == 0
+    assert first.code == 500 and first.ok is False and first.extract > 0
+    assert first.total >= first.network() + first.ttfb + first.download
+    record = first.to_dict()
+    assert record["code"] == 500 and record["total_ms"] > 0
+
+    fresh = HttpEndpoint({"name": "fresh", "url": f"{server_url}/big", "port": 0, \
+                          "fresh_connection": True, "timing_history": 1}, pool)
+    fresh.check_status()
+    fresh.check_status()
+    assert len(fresh.timings) == 1
+    assert fresh.timings.last().reused is False and fresh.timings.last().extract < 0.01
+    pool.close()
+
+
+def test_probe_phases_recorded_async(server_url):
+    """Проверяет время этапов асинхронной проверки (DNS входит в connect)."""
+    endpoint = HttpEndpoint({"name": "timed", "url": f"{server_url}/error", "port": 0})
+    asyncio.run(endpoint.check_status_async())
+
+    timing = endpoint.timings.last()
+    assert timing.dns is None and timing.connect > 0 and timing.reused is False
+    assert timing.code == 500 and timing.extract > 0
+    assert timing.to_dict()["dns_ms"] is None
+
+
+def test_latency_slo_violation(server_url):
+    """
+    Проверяет, что ответ с кодом успеха считается сбоем при превышении порога p50.
+    """
+    endpoint = HttpEndpoint({"name": "slow", "url": f"{server_url}/slow", "port": 0, \
+                             "latency_slo": {"p50": 0.01, "window": 5}})
+    # Первый ответ: для оценки p50 данных еще недостаточно
+    assert endpoint.check_status() == (True, 200, "")
+    ok, code, text = endpoint.check_status()
+    assert ok is False and code == 200
+    assert text.startswith("Медленный ответ: p50")
+    assert endpoint.timings.last().ok is False
+
+    ok, code, text = asyncio.run(endpoint.check_status_async())
+    assert ok is False and code == 200 and text.startswith("Медленный ответ")
+
+
+def test_latency_slo_met(server_url):
+    """Проверяет, что быстрые ответы не нарушают пороги задержки."""
+    endpoint = HttpEndpoint({"name": "fast", "url": f"{server_url}/health", "port": 0, \
+                             "latency_slo": {"p50": 1.0, "p95": 2.0}})
+    for _ in range(25):
+        assert endpoint.check_status() == (True, 200, "")
+
+
+def test_read_timeout(server_url):
+    """Проверяет, что превышение read_timeout считается недоступностью."""
+    endpoint = HttpEndpoint({"name": "slow", "url": f"{server_url}/slow", "port": 0, \
+                             "connect_timeout": 1, "read_timeout": 0.01})
+    assert endpoint.check_status() == (False, -1, "")
+    assert asyncio.run(endpoint.check_status_async()) == (False, -1, "")
+
+
+@pytest.mark.parametrize("url", ["http://" + "a" * 300 + ".com/", "http://bad\u0000host/"])
+def test_invalid_url_is_unavailable(url):
+    """Проверяет, что некорректный URL дает сбой (-1) в обоих движках, а не исключение."""
+    endpoint = HttpEndpoint({"name": "bad", "url": url, "port": 0})
+    assert endpoint.check_status() == (False, -1, "")
+    assert asyncio.run(endpoint.check_status_async()) == (False, -1, "")
@@ -0,0 +1,46 @@
+"""tests/test_incident.py - Тесты представления инцидента"""
+
+import copy
+from unittest.mock import patch
+from monitor.incident import MAX_RESPONSE_CHARS, Incident
+
+
+def test_slots_and_lazy_iso_times():
+    """Проверяет хранение времени в секундах эпохи и вывод в ISO 8601."""
+    incident = Incident("api", 500, "error", started=1735689600.5)
+    assert not hasattr(incident, "__dict__")
+    assert incident.start_time == "2025-01-01T00:00:00.500000+00:00"
+    assert incident.end_time is None
+    assert "2025-01-01T00:00:00.500000+00:00 → ..." in str(incident)
+
+    restored = Incident.from_dict({**incident.to_dict(), "end_time": "2025-01-01T00:05:00+00:00"})
+    assert restored.started == 1735689600.5 and restored.duration() == 299.5
+    assert restored.end_time == "2025-01-01T00:05:00+00:00"
+
+
+def test_long_response_is_truncated_and_hashed():
+    """Проверяет, что длинный ответ обрезается, а хэш полного текста сохраняется."""
+    page = "Ошибка " * 1000
+    incident = Incident("api", 502, page)
+    assert len(incident.response) == MAX_RESPONSE_CHARS + 1
+    assert incident.response.endswith("…") and len(incident.response_hash) == 32
+    assert Incident("api", 502, "short").response_hash is None
+
+    data = incident.to_dict()
+    assert data["response_hash"] == incident.response_hash
+    restored = Incident.from_dict(data)
+    assert (restored.response, restored.response_hash) == (incident.response, \
+                                                          incident.response_hash)
+
+
+def test_duration_ignores_wall_clock_jump():
+    """Проверяет, что перевод системных часов назад не делает длительность отрицательной."""
+    with patch("monitor.incident.time.time", return_value=1000.0), \
+            patch("monitor.incident.time.monotonic", return_value=50.0):
+        incident = Incident("api", 500)
+    closed = copy.copy(incident)
+    with patch("monitor.incident.time.time", return_value=400.0), \
+            patch("monitor.incident.time.monotonic", return_value=80.0):
+        closed.close()
+    assert closed.duration() == 30.0 and closed.ended == 1030.0
+    assert incident.ended is None
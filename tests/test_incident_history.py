@@ -0,0 +1,125 @@
+"""tests/test_incident_history.py - Тесты индекса истории инцидентов"""
+
+import json
+from monitor.incident_history import IncidentHistory
+from monitor.incident_journal import IncidentJournal
+from monitor.incident_manager import IncidentManager
+
+# 2025-01-01T00:00:00+00:00
+BASE = 1735689600
+
+
+def iso(offset):
+    """Возвращает время BASE + offset секунд в формате журнала."""
+    hours, rest = divmod(offset, 3600)
+    return f"2025-01-01T{hours:02d}:{rest // 60:02d}:{rest % 60:02d}+00:00"
+
+
+def record(name, start, end=None, code=500):
+    """Создает запись инцидента в формате журнала."""
+    return {"resource_name": name, "code": code, "response": "error", \
+            "start_time": iso(start), "end_time": None if end is None else iso(end)}
+
+
+def test_sync_is_incremental_and_survives_compaction(tmp_path):
+    """
+    Проверяет, что индекс дочитывает только новые записи, а уплотнение журнала
+    при ротации не создает дубликатов и закрывающая запись дополняет инцидент.
+    """
+    journal = IncidentJournal(str(tmp_path / "incidents.jsonl"), max_segment_bytes=600)
+    history = IncidentHistory(journal)
+    journal.append(record("a", 0))
+    journal.append(record("b", 60))
+    assert history.sync() == 2
+    assert history.sync() == 0
+
+    journal.append(record("a", 0, 300))
+    for offset in range(600, 3000, 600):
+        journal.append(record("c", offset))
+        journal.append(record("c", offset, offset + 120))
+    assert len(journal.segments()) > 1
+    history.sync()
+
+    incidents = history.query()
+    assert len(incidents) == 6
+    opened = {i["resource_name"]: i for i in incidents if i["end_time"] is None}
+    assert list(opened) == ["b"]
+    first = [i for i in incidents if i["resource_name"] == "a"][0]
+    assert (first["start_time"], first["end_time"]) == (BASE, BASE + 300)
+    history.close()
+
+
+def test_rotated_segment_with_same_head_is_read_from_start(tmp_path):
+    """
+    Проверяет, что новый сегмент, начинающийся с той же записи, что и ротированный,
+    и выросший больше прочитанного размера, читается с начала.
+    """
+    journal = IncidentJournal(str(tmp_path / "incidents.jsonl"))
+    history = IncidentHistory(journal)
+    journal.append(record("b", 0))
+    journal.append(record("a", 60))
+    journal.append(record("a", 60, 120))
+    assert history.sync() == 3
+
+    journal._rotate()  # pylint: disable=protected-access
+    for offset in range(600, 3000, 600):
+        journal.append(record("c", offset))
+    assert history.sync() >= 4
+    assert sorted(i["start_time"] - BASE for i in history.query(resource="c")) == \
+        list(range(600, 3000, 600))
+    history.close()
+
+
+def test_partial_line_is_read_later(tmp_path):
+    """Проверяет, что недописанная строка журнала читается при следующей синхронизации."""
+    log_file = tmp_path / "incidents.jsonl"
+    second = json.dumps(record("b", 60)) + "\n"
+    log_file.write_text(json.dumps(record("a", 0)) + "\n" + second[:20], encoding="utf-8")
+    history = IncidentHistory(IncidentJournal(str(log_file)))
+    assert history.sync() == 1
+    with open(log_file, "a", encoding="utf-8") as f:
+        f.write(second[20:])
+    assert history.sync() == 1
+    assert [i["resource_name"] for i in history.query()] == ["b", "a"]
+    history.close()
+
+
+def test_query_filters_and_stats(tmp_path):
+    """Проверяет отбор по ресурсу, периоду и коду и расчет MTTR и MTBF."""
+    journal = IncidentJournal(str(tmp_path / "incidents.jsonl"))
+    for name, start, end, code in (("a", 0, 600, 500), ("a", 3600, 4200, 503), \
+                                   ("a", 7800, 9600, 500), ("b", 1800, 1860, 500), \
+                                   ("b", 36000, None, 502)):
+        journal.append(record(name, start))
+        if end is not None:
+            journal.append(record(name, start, end, code))
+    history = IncidentHistory(journal)
+    history.sync()
+
+    assert [i["start_time"] - BASE for i in history.query("a")] == [7800, 3600, 0]
+    assert len(history.query(since=BASE + 3600, until=BASE + 9000)) == 2
+    assert len(history.query(code=500, limit=2)) == 2
+    assert history.query("missing") == []
+
+    stats = history.stats("a")
+    # Восстановление: 600, 600, 1800 с; работа между инцидентами: 3000, 3600 с
+    assert stats == {"count": 3, "open": 0, "downtime": 3000.0, "mttr": 1000.0, "mtbf": 3300.0}
+    overall = history.stats(now=BASE + 36600)
+    assert overall["count"] == 5 and overall["open"] == 1
+    assert overall["downtime"] == 3000.0 + 60 + 600
+    assert overall["mttr"] == (600 + 600 + 1800 + 60) / 4
+    assert overall["mtbf"] == (3000 + 3600 + 34140) / 3
+    history.close()
+
+
+def test_manager_history_flushes_background_writer(tmp_path):
+    """Проверяет, что индекс видит записи, еще стоящие в очереди фоновой записи."""
+    manager = IncidentManager(log_file=str(tmp_path / "incidents.jsonl"), writer="background")
+    manager.register_incident("r1", code=500, response="error")
+    manager.resolve_incident("r1")
+    manager.register_incident("r2", code=503, response="busy")
+
+    incidents = manager.get_history().query()
+    assert [i["resource_name"] for i in incidents] == ["r2", "r1"]
+    assert incidents[1]["end_time"] is not None and incidents[0]["end_time"] is None
+    manager.close()
@@ -0,0 +1,138 @@
+"""tests/test_incident_journal.py - Тесты индексированного журнала инцидентов"""
+
+import json
+import time
+from unittest.mock import patch
+from monitor.incident_journal import IncidentJournal
+from monitor.incident_manager import IncidentManager
+
+
+def record(name, closed=False):
+    """Создает запись инцидента в формате журнала."""
+    return {
+        "resource_name": name,
+        "code": 500,
+        "response": "error",
+        "start_time": "2025-01-01T00:00:00+00:00",
+        "end_time": "2025-01-01T00:05:00+00:00" if closed else None
+    }
+
+
+def test_resolved_incident_not_restored(tmp_path):
+    """
+    Проверяет, что закрытый инцидент не восстанавливается как активный.
+    """
+    log_file = str(tmp_path / "incidents.jsonl")
+    manager = IncidentManager(log_file=log_file)
+    manager.register_incident("r1", code=500, response="error")
+    manager.register_incident("r2", code=503, response="busy")
+    manager.resolve_incident("r1")
+
+    active = IncidentManager(log_file=log_file).get_active()
+    assert [i.resource_name for i in active] == ["r2"]
+
+
+def test_load_reads_only_tail_after_index(tmp_path):
+    """
+    Проверяет, что при наличии индекса журнал читается только после сохраненной позиции,
+    а записи, дописанные позже, тоже учитываются.
+    """
+    log_file = str(tmp_path / "incidents.jsonl")
+    journal = IncidentJournal(log_file, snapshot_every=10)
+    for i in range(500):
+        journal.append(record(f"r{i}"))
+        journal.append(record(f"r{i}", closed=True))
+    journal.append(record("active"))
+    journal.close()
+    indexed_size = json.loads((tmp_path / "incidents.jsonl.index.json").read_text())["size"]
+
+    with open(log_file, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record("late")) + "\n")
+    # Подмена строки до сохраненной позиции той же длины: при полном чтении журнала
+    # инцидент "x0" оказался бы активным
+    data = (tmp_path / "incidents.jsonl").read_bytes()
+    first = json.dumps(record("r0")).encode("utf-8")
+    assert data.startswith(first) and len(first) < indexed_size
+    (tmp_path / "incidents.jsonl").write_bytes(json.dumps(record("x0")).encode("utf-8") \
+                                               + data[len(first):])
+
+    active = IncidentJournal(log_file).load_active()
+    assert sorted(r["resource_name"] for r in active) == ["active", "late"]
+
+
+def test_rotation_compacts_active_incidents(tmp_path):
+    """
+    Проверяет ротацию сегментов: в новый сегмент переносятся только активные инциденты.
+    """
+    log_file = str(tmp_path / "incidents.jsonl")
+    journal = IncidentJournal(log_file, max_segment_bytes=2000)
+    journal.append(record("keep"))
+    for i in range(50):
+        journal.append(record(f"r{i}"))
+        journal.append(record(f"r{i}", closed=True))
+    journal.close()
+
+    segments = journal.segments()
+    assert len(segments) > 1
+    with open(log_file, "r", encoding="utf-8") as f:
+        names = [json.loads(line)["resource_name"] for line in f]
+    assert names[0] == "keep" and len(names) < 20
+
+    assert [r["resource_name"] for r in IncidentJournal(log_file).load_active()] == ["keep"]
+
+
+def test_stale_index_falls_back_to_full_scan(tmp_path):
+    """
+    Проверяет, что индекс, не соответствующий журналу, игнорируется.
+    """
+    log_file = tmp_path / "incidents.jsonl"
+    journal = IncidentJournal(str(log_file))
+    journal.append(record("old"))
+    journal.close()
+
+    lines = [json.dumps(record("other-resource-name")), json.dumps(record("new"))]
+    log_file.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    active = IncidentJournal(str(log_file)).load_active()
+    assert sorted(r["resource_name"] for r in active) == ["new", "other-resource-name"]
+
+
+def test_background_writer_groups_records(tmp_path):
+    """
+    Проверяет, что фоновая запись не блокирует вызывающий поток
+    и объединяет накопившиеся записи в групповые записи.
+    """
+    log_file = str(tmp_path / "incidents.jsonl")
+    manager = IncidentManager(log_file=log_file, writer="background", fsync="every-batch")
+    original = IncidentJournal.append_batch
+    batches = []
+
+    def slow_append(journal, records):
+        batches.append(len(records))
+        time.sleep(0.1)
+        original(journal, records)
+
+    with patch.object(IncidentJournal, "append_batch", autospec=True, side_effect=slow_append), \
+            patch("monitor.incident_journal.os.fsync") as mock_fsync:
+        started = time.monotonic()
+        for i in range(200):
+            manager.register_incident(f"r{i}", code=500, response="error")
+        assert time.monotonic() - started < 0.1
+        manager.close()
+
+    assert sum(batches) == 200 and len(batches) < 10
+    assert mock_fsync.call_count == len(batches)
+    assert len(IncidentManager(log_file=log_file).get_active()) == 200
+
+
+def test_background_writer_flushes_before_reload(tmp_path):
+    """
+    Проверяет, что /refresh видит все записи, поставленные в очередь.
+    """
+    manager = IncidentManager(log_file=str(tmp_path / "incidents.jsonl"), writer="background")
+    manager.register_incident("r1", code=500, response="error")
+    manager.resolve_incident("r1")
+    manager.register_incident("r2", code=500, response="error")
+    manager.reload_active_incidents()
+    assert [i.resource_name for i in manager.get_active()] == ["r2"]
+    manager.close()
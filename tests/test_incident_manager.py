@@ -1,6 +1,12 @@
 """tests/test_incident_manager.py"""
 
 import json
+import os
+import threading
+import time
+from unittest.mock import patch
+from monitor.body_store import BodyStore
+from monitor.incident import MAX_RESPONSE_CHARS
 from monitor.incident_manager import IncidentManager, Incident
 
 
@@ -28,6 +34,22 @@ def test_register_and_resolve_incident(tmp_path):
     assert lines[1]["end_time"] is not None
 
 
+def test_incident_keeps_probe_timing(tmp_path):
+    """Проверяет запись времени этапов проверки в журнал и его восстановление."""
+    log_file = tmp_path / "incidents.jsonl"
+    timing = {"code": 500, "ttfb_ms": 120.5, "total_ms": 130.0}
+    manager = IncidentManager(log_file=str(log_file))
+    manager.register_incident("r1", code=500, response="error", timing=timing)
+    manager.register_incident("r2", code=500, response="error")
+    manager.close()
+
+    with open(log_file, "r", encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert lines[0]["timing"] == timing and "timing" not in lines[1]
+    reloaded = IncidentManager(log_file=str(log_file)).get_active_map()
+    assert reloaded["r1"].timing == timing and reloaded["r2"].timing is None
+
+
 def test_reload_active_incidents(tmp_path):
     """Проверяет восстановление активных инцидентов из журнала."""
     log_file = tmp_path / "incidents.jsonl"
@@ -56,3 +78,140 @@ def test_double_registration(tmp_path):
     manager.register_incident("r1", code=500, response ="internal error")
     manager.register_incident("r1", code=500, response ="internal error")
     assert len(manager.get_active()) == 1
+
+
+def test_concurrent_access_stress(tmp_path):
+    """
+    Нагрузочный тест: множество потоков открывают и закрывают инциденты,
+    один поток перечитывает журнал, читатели проверяют целостность снимков.
+    """
+    log_file = tmp_path / "incidents.jsonl"
+    manager = IncidentManager(log_file=str(log_file), writer="background")
+    stable = {f"stable{i}" for i in range(50)}
+    for name in stable:
+        manager.register_incident(name, code=500, response="down")
+
+    stop = threading.Event()
+    errors = []
+
+    def writer(worker):
+        names = [f"w{worker}-{i}" for i in range(20)]
+        for round_ in range(40):
+            for name in names:
+                if round_ % 2 == 0:
+                    manager.register_incident(name, code=500, response="error")
+                else:
+                    manager.resolve_incident(name)
+
+    def reader():
+        while not stop.is_set():
+            active = manager.get_active()
+            names = [i.resource_name for i in active]
+            if len(names) != len(set(names)):
+                errors.append("дубликаты в снимке")
+            if not stable <= set(names):
+                errors.append("неполный снимок")
+            if any(i.end_time is not None for i in active):
+                errors.append("закрытый инцидент в снимке")
+
+    def reloader():
+        while not stop.is_set():
+            manager.reload_active_incidents()
+
+    writers = [threading.Thread(target=writer, args=(w,)) for w in range(8)]
+    others = [threading.Thread(target=reader) for _ in range(4)]
+    others.append(threading.Thread(target=reloader))
+    for thread in writers + others:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    stop.set()
+    for thread in others:
+        thread.join()
+    manager.close()
+
+    assert not errors, errors[:5]
+    assert {i.resource_name for i in manager.get_active()} == stable
+    restored = IncidentManager(log_file=str(log_file))
+    assert {i.resource_name for i in restored.get_active()} == stable
+
+
+def test_response_body_stored_by_hash(tmp_path):
+    """
+    Проверяет, что журнал ссылается на тело ответа по ключу, одинаковые тела
+    хранятся один раз, а после перезапуска текст читается из хранилища при обращении.
+    """
+    log_file = tmp_path / "incidents.jsonl"
+    bodies = tmp_path / "bodies"
+    page = "<h1>502 Bad Gateway</h1>" * 100
+    manager = IncidentManager(log_file=str(log_file), bodies=str(bodies))
+    manager.register_incident("r1", code=502, response=page)
+    manager.register_incident("r2", code=502, response=page)
+    manager.close()
+
+    with open(log_file, "r", encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert "response" not in lines[0] and lines[0]["body_ref"] == lines[1]["body_ref"]
+    assert sum(len(names) for _, _, names in os.walk(bodies)) == 1
+
+    reloaded = IncidentManager(log_file=str(log_file), bodies=str(bodies))
+    incident = reloaded.get_active_map()["r1"]
+    assert incident._response is None  # pylint: disable=protected-access
+    assert incident.response == page[:MAX_RESPONSE_CHARS] + "…"
+    assert incident.full_response() == page
+    history = reloaded.get_history().query(resource="r2")
+    assert history[0]["response"] == incident.response
+    reloaded.close()
+
+
+def test_response_kept_inline_when_body_store_fails(tmp_path):
+    """Проверяет, что при ошибке записи тела в журнал попадает обрезанный текст."""
+    log_file = tmp_path / "incidents.jsonl"
+    page = "<h1>502 Bad Gateway</h1>" * 100
+    manager = IncidentManager(log_file=str(log_file), bodies=str(tmp_path / "bodies"))
+    with patch.object(manager.bodies, "put", side_effect=OSError("No space left on device")):
+        manager.register_incident("r1", code=502, response=page)
+    manager.close()
+
+    with open(log_file, "r", encoding="utf-8") as f:
+        record = json.loads(f.readline())
+    assert "body_ref" not in record
+    assert record["response"] == page[:MAX_RESPONSE_CHARS] + "…"
+    assert manager.get_active_map()["r1"].full_response() == record["response"]
+
+
+def test_purge_bodies_keeps_active_incidents(tmp_path):
+    """Проверяет, что устаревшие тела удаляются, а тела активных инцидентов остаются."""
+    page = "<h1>502 Bad Gateway</h1>" * 100
+    manager = IncidentManager(log_file=str(tmp_path / "incidents.jsonl"), \
+                              bodies=str(tmp_path / "bodies"), body_days=1)
+    manager.register_incident("active", code=502, response=page)
+    manager.register_incident("resolved", code=503, response=page + "!")
+    manager.resolve_incident("resolved")
+    assert manager.purge_bodies() == 0
+    assert manager.purge_bodies(now=time.time() + 2 * 86400) == 1
+    assert manager.get_active_map()["active"].full_response() == page
+    assert manager.get_history().query(resource="resolved")[0]["response"] is None
+    manager.close()
+
+
+def test_bodies_are_purged_by_background_thread(tmp_path):
+    """
+    Проверяет, что устаревшие тела удаляются отдельным потоком при запуске,
+    а регистрация инцидента не обходит хранилище тел.
+    """
+    stale = BodyStore(str(tmp_path / "bodies"))
+    key = stale.put("старая страница")
+    os.utime(stale._path(key), (1000, 1000))  # pylint: disable=protected-access
+    manager = IncidentManager(log_file=str(tmp_path / "incidents.jsonl"), \
+                              bodies=str(tmp_path / "bodies"), body_days=1)
+    deadline = time.monotonic() + 5
+    while stale.get(key) is not None and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert stale.get(key) is None
+
+    with patch.object(manager.bodies, "purge") as purge:
+        manager.register_incident("r1", code=502, response="<h1>502</h1>" * 100)
+    purge.assert_not_called()
+    manager.close()
+    assert not manager._purger.is_alive()  # pylint: disable=protected-access
@@ -0,0 +1,72 @@
+"""tests/test_latency_slo.py"""
+
+import json
+import pytest
+from monitor.config import DEFAULT_SCHEMA_PATH, ConfigError, ConfigLoader
+from monitor.latency_slo import LatencySLO, SlidingQuantiles
+
+
+def test_sliding_quantiles_evicts_oldest():
+    """Проверяет квантили по окну и вытеснение старых значений."""
+    window = SlidingQuantiles(4)
+    assert window.quantile(0.5) is None
+    for value in (4.0, 1.0, 3.0, 2.0):
+        window.add(value)
+    assert window.quantile(0.5) == 2.0
+    assert window.quantile(0.95) == 4.0
+
+    window.add(0.5)
+    assert len(window) == 4
+    assert window.quantile(0.95) == 3.0
+    assert window.quantile(0.0) == 0.5
+
+
+def test_from_config():
+    """Проверяет, что пороги создаются только при заданном latency_slo."""
+    assert LatencySLO.from_config({"name": "a"}) is None
+    slo = LatencySLO.from_config({"latency_slo": {"p95": 2.0, "window": 50}})
+    assert slo.thresholds == {"p95": 2.0}
+    assert slo.window.window == 50
+
+
+def test_p95_requires_full_sample():
+    """Проверяет, что p95 оценивается только от 20 ответов."""
+    slo = LatencySLO({"p95": 1.0}, window=30)
+    for _ in range(18):
+        assert slo.observe(0.1) is None
+    assert slo.observe(5.0) is None
+    message = slo.observe(5.0)
+    assert message == "Медленный ответ: p95 5.00 с > 1.00 с (последние 20 ответов)"
+
+
+def test_p50_recovers_when_window_moves():
+    """Проверяет, что нарушение p50 проходит, когда медленные ответы покидают окно."""
+    slo = LatencySLO({"p50": 1.0}, window=3)
+    assert slo.observe(2.0) is None
+    assert slo.observe(2.0) is not None
+    assert slo.observe(0.1) is not None
+    assert slo.observe(0.1) is None
+
+
+@pytest.mark.parametrize("latency_slo, valid", [
+    ({"p95": 1.0, "window": 10}, False),
+    ({"p95": 1.0, "window": 20}, True),
+    ({"p95": 1.0}, True),
+    ({"p50": 1.0, "window": 2}, True),
+])
+def test_schema_rejects_window_too_small_for_p95(tmp_path, latency_slo, valid):
+    """Проверяет, что окно меньше 20 ответов при пороге p95 отклоняется схемой."""
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({
+        "log_level": "INFO",
+        "telegram_users": [{"telegram_id": 1, "name": "Admin", "role": "Admin"}],
+        "resources": [{"name": "a", "url": "https://a.example.com", "method": "GET",
+                       "port": 443, "error_code": 500, "success_code": 200,
+                       "check_interval": 60, "retry_interval": 5, "max_attempts": 3,
+                       "latency_slo": latency_slo}],
+    }), encoding="utf-8")
+    if valid:
+        ConfigLoader().load_config(config_path, DEFAULT_SCHEMA_PATH)
+    else:
+        with pytest.raises(ConfigError, match="window"):
+            ConfigLoader().load_config(config_path, DEFAULT_SCHEMA_PATH)
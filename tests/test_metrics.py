@@ -0,0 +1,142 @@
+"""tests/test_metrics.py"""
+
+import json
+import re
+import threading
+import urllib.error
+import urllib.request
+from unittest.mock import Mock, patch
+import pytest
+from monitor.httpendpoint import HttpEndpoint
+from monitor.metrics import COUNTER, Histogram, MetricsRegistry, MetricsServer, get_metrics
+
+
+def test_histogram_quantiles_and_snapshot():
+    """Проверяет оценку квантилей и накопительные счетчики гистограммы."""
+    histogram = Histogram(buckets=(1, 2, 5))
+    assert histogram.quantile(0.5) is None
+    for value in (0.5, 0.5, 1.5, 4, 10):
+        histogram.observe(value)
+
+    assert 0 < histogram.quantile(0.2) <= 1
+    assert 1 < histogram.quantile(0.6) <= 2
+    assert histogram.quantile(1.0) == 5
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 5
+    assert snapshot["sum"] == pytest.approx(16.5)
+    assert snapshot["buckets"] == [(1, 2), (2, 3), (5, 4), (float("inf"), 5)]
+
+
+def test_histogram_merge_adds_counts_from_other_process():
+    """Проверяет, что merge добавляет наблюдения гистограммы с теми же границами."""
+    source, target = Histogram(buckets=(1, 2)), Histogram(buckets=(1, 2))
+    for value in (0.5, 1.5, 3):
+        source.observe(value)
+    target.observe(0.5)
+    target.merge(*source.counts())
+    assert target.snapshot() == {"buckets": [(1, 2), (2, 3), (float("inf"), 4)], \
+                                 "count": 4, "sum": pytest.approx(5.5)}
+
+
+def test_histogram_is_thread_safe():
+    """Проверяет, что наблюдения из нескольких потоков не теряются."""
+    histogram = Histogram()
+
+    def worker():
+        for _ in range(1000):
+            histogram.observe(0.2)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert histogram.snapshot()["count"] == 8000
+
+
+def test_registry_renders_prometheus_text():
+    """Проверяет текстовый формат: гистограммы, счетчики и вычисляемые значения."""
+    registry = MetricsRegistry()
+    registry.histogram("probe_seconds", "Длительность", buckets=(0.1, 1), \
+                       endpoint='a"b').observe(0.5)
+    registry.counter("probes_total", "Проверки", endpoint="a", result="success").inc(2)
+    registry.register_callback("queue_depth", "Очередь", lambda: 7)
+    registry.register_callback("sent_total", "Отправлено", lambda: 3, COUNTER)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE probe_seconds histogram" in lines
+    assert 'probe_seconds_bucket{endpoint="a\\"b",le="0.1"} 0' in lines
+    assert 'probe_seconds_bucket{endpoint="a\\"b",le="1"} 1' in lines
+    assert 'probe_seconds_bucket{endpoint="a\\"b",le="+Inf"} 1' in lines
+    assert 'probe_seconds_count{endpoint="a\\"b"} 1' in lines
+    assert 'probes_total{endpoint="a",result="success"} 2' in lines
+    assert "queue_depth 7" in lines
+    assert "# TYPE sent_total counter" in lines
+
+    registry.remove(endpoint="a")
+    assert "probes_total{" not in registry.render()
+    with pytest.raises(ValueError):
+        registry.counter("queue_depth", "Очередь")
+
+
+@patch("monitor.httpendpoint.requests.Session.request")
+def test_check_status_records_probe_metrics(mock_request):
+    """Проверяет учет длительности и результата проверки точки."""
+    mock_request.return_value = Mock(status_code=500, headers={})
+    endpoint = HttpEndpoint({"name": "metrics-probe", "url": "http://localhost", "port": 0})
+    endpoint.check_status()
+    mock_request.return_value = Mock(status_code=200)
+    endpoint.check_status()
+
+    text = get_metrics().render()
+    assert 'ct_probe_duration_seconds_count{endpoint="metrics-probe"} 2' in text
+    assert 'ct_probes_total{endpoint="metrics-probe",result="failure"} 1' in text
+    assert 'ct_probes_total{endpoint="metrics-probe",result="success"} 1' in text
+    assert re.search(r'ct_probe_phase_seconds_count\{phase="ttfb"\} [1-9]', text)
+    get_metrics().remove(endpoint="metrics-probe")
+
+
+def test_metrics_server_serves_registry():
+    """Проверяет отдачу /metrics по HTTP и 404 для других путей."""
+    registry = MetricsRegistry()
+    registry.register_callback("queue_depth", "Очередь", lambda: 1)
+    server = MetricsServer(registry, "127.0.0.1", 0)
+    server.start()
+    url = "http://%s:%d" % server.server_address[:2]
+    try:
+        with urllib.request.urlopen(f"{url}/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert "queue_depth 1" in response.read().decode("utf-8")
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{url}/other", timeout=5)
+    finally:
+        server.stop()
+        server.join(5)
+    assert not server.is_alive()
+
+
+def test_metrics_server_serves_uptime():
+    """Проверяет отдачу истории проверок в JSON по /uptime и /uptime/<имя>."""
+    endpoint = HttpEndpoint({"name": "api probe", "url": "http://localhost", "port": 0})
+    endpoint.history.append(1000, 200, True, 0.25)
+    server = MetricsServer(MetricsRegistry(), "127.0.0.1", 0, endpoints=lambda: [endpoint])
+    server.start()
+    url = "http://%s:%d" % server.server_address[:2]
+    try:
+        with urllib.request.urlopen(f"{url}/uptime", timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("application/json")
+            report = json.loads(response.read())
+        assert report["api probe"]["uptime"] == 100.0
+        with urllib.request.urlopen(f"{url}/uptime/api%20probe", timeout=5) as response:
+            assert json.loads(response.read())["samples"][0]["latency"] == 0.25
+        with urllib.request.urlopen(f"{url}/uptime?period=60", timeout=5) as response:
+            assert json.loads(response.read())["api probe"]["count"] == 0
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{url}/uptime/missing", timeout=5)
+        # /history в боте — история инцидентов, на сервере метрик такого пути нет
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{url}/history", timeout=5)
+    finally:
+        server.stop()
+        server.join(5)
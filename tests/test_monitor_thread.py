@@ -52,7 +52,7 @@ def test_monitor_thread_triggers_incident():
     thread.stop()
     thread.join()
 
-    incident_manager.register_incident.assert_called_with("dummy", 500, "text of response")
+    incident_manager.register_incident.assert_called_with("dummy", 500, "text of response", None)
 
 
 def test_monitor_thread_resolves_incident():
@@ -64,7 +64,7 @@ def test_monitor_thread_resolves_incident():
     endpoint = DummyEndpoint("dummy", [200, 500, 500, 500, 500, 200, 200, 200])
     incident_manager = MagicMock()
     incident_manager.register_incident = \
-        MagicMock(side_effect=lambda name, code, text: \
+        MagicMock(side_effect=lambda name, code, text, _timing: \
                   print(f"[MOCK] Зарегистрирован инцидент: {name}, {code}, {text}"))
     incident_manager.resolve_incident = \
         MagicMock(side_effect=lambda name: print(f"[MOCK] Завершён инцидент: {name}"))
@@ -83,5 +83,28 @@ def test_monitor_thread_resolves_incident():
     thread.stop()
     thread.join()
 
-    incident_manager.register_incident.assert_called_with("dummy", 500, "text of response")
+    incident_manager.register_incident.assert_called_with("dummy", 500, "text of response", None)
     incident_manager.resolve_incident.assert_called_with("dummy")
+
+
+def test_monitor_thread_uses_check_interval_when_healthy():
+    """
+    Проверяет, что в рабочем состоянии точка опрашивается раз в check_interval,
+    а не с частотой повторных попыток.
+    """
+    endpoint = DummyEndpoint("healthy", [])
+    config = {
+        "check_interval": 0.3,
+        "retry_interval": 0.05,
+        "max_attempts": 3
+    }
+
+    thread = MonitorThread(endpoint, config, logger=None, incidents=MagicMock())
+    thread.daemon = True
+    thread.start()
+
+    time.sleep(0.7)
+    thread.stop()
+    thread.join()
+
+    assert 2 <= thread.counter.probes <= 4
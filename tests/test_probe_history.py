@@ -0,0 +1,88 @@
+"""tests/test_probe_history.py"""
+
+from monitor.probe_history import SPARK_FAILURE, ProbeHistory, history_report, sparkline
+
+
+class StubEndpoint:
+    """Точка с историей проверок."""
+
+    def __init__(self, name):
+        self.name = name
+        self.history = ProbeHistory(10)
+
+    def get_name(self):
+        """Возвращает имя точки."""
+        return self.name
+
+
+def test_ring_keeps_last_samples():
+    """Проверяет вытеснение старых проверок и порядок от старых к новым."""
+    history = ProbeHistory(3)
+    for second in range(5):
+        history.append(1000 + second * 60, 200, True, second / 10)
+    samples = history.samples()
+    assert len(history) == 3
+    assert [sample[0] for sample in samples] == [1120, 1180, 1240]
+    assert [sample[3] for sample in samples] == [0.2, 0.3, 0.4]
+
+
+def test_codes_and_latency_round_trip():
+    """Проверяет хранение кода, признака успеха и задержки."""
+    history = ProbeHistory()
+    history.append(1000.7, 200, True, 0.1234)
+    history.append(1010.2, 200, False, 2.5)
+    history.append(1020, 500, False, 0.05)
+    history.append(1030, -1, False, None)
+    history.append(1040, 200, True, 100.0)
+    assert history.samples() == [
+        (1000, 200, True, 0.123),
+        (1010, 200, False, 2.5),
+        (1020, 500, False, 0.05),
+        (1030, -1, False, None),
+        (1040, 200, True, 65.534),
+    ]
+
+
+def test_compact_storage():
+    """Проверяет, что проверка занимает 6 байт."""
+    history = ProbeHistory(1000)
+    for second in range(1500):
+        history.append(second * 30, 200, True, 0.2)
+    assert history.nbytes() == 6000
+
+
+def test_summary_with_period():
+    """Проверяет долю успешных проверок, медиану и отбор по времени."""
+    history = ProbeHistory()
+    for second, ok in ((0, False), (60, True), (120, True), (180, False), (240, True)):
+        history.append(1000 + second, 200 if ok else 500, ok, 0.1 + second / 1000)
+    summary = history.summary()
+    assert summary["count"] == 5 and summary["uptime"] == 60.0
+    assert summary["p50"] == 0.22
+    assert (summary["first"], summary["last"]) == (1000, 1240)
+
+    recent = history.summary(since=1100)
+    assert recent["count"] == 3 and recent["uptime"] == 66.67
+    assert ProbeHistory().summary() == {"count": 0, "uptime": None, "p50": None, \
+                                        "first": None, "last": None, "sparkline": ""}
+
+
+def test_sparkline_marks_failures():
+    """Проверяет высоту символов спарклайна и отметку сбоев."""
+    samples = [(second, 200, True, latency) \
+               for second, latency in enumerate((0.1, 0.1, 0.8, 0.8))]
+    assert sparkline(samples, 2) == "▂█"
+    samples[0] = (0, 500, False, 0.1)
+    assert sparkline(samples, 4) == SPARK_FAILURE + "▂██"
+
+
+def test_history_report():
+    """Проверяет отчет API: сводки всех точек и проверки одной точки."""
+    first, second = StubEndpoint("a"), StubEndpoint("b")
+    first.history.append(1000, 200, True, 0.1)
+    report = history_report([first, second])
+    assert report["a"]["uptime"] == 100.0 and report["b"]["count"] == 0
+
+    detail = history_report([first, second], "a")
+    assert detail["samples"] == [{"time": 1000, "code": 200, "ok": True, "latency": 0.1}]
+    assert history_report([first], "missing") is None
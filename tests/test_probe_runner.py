@@ -0,0 +1,115 @@
+"""tests/test_probe_runner.py - Тесты применения изменений списка ресурсов"""
+
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+import pytest
+from monitor.probe_runner import ProbeSet
+from monitor.probe_timing import ProbeTiming
+
+
+def resource(name, check_interval=3600):
+    """Конфигурация ресурса, который не будет опрошен за время теста."""
+    return {"name": name, "url": "http://127.0.0.1:9/", "method": "GET", "port": 9,
+            "check_interval": check_interval, "retry_interval": 3600, "max_attempts": 2}
+
+
+def test_apply_diffs_resources_for_threads():
+    """
+    Проверяет, что перечитывание запускает, останавливает и перенастраивает
+    только изменившиеся точки, сохраняя потоки и состояние остальных.
+    """
+    incidents = MagicMock()
+    probes = ProbeSet(MagicMock(), incidents)
+    probes.apply([resource("a"), resource("b"), resource("c")])
+    threads = dict(probes._threads)  # pylint: disable=protected-access
+    threads["b"].in_incident = True
+    history = threads["b"].endpoint.history
+    history.append(time.time(), 200, True, 0.1)
+
+    summary = probes.apply([resource("b", 7200), resource("c"), resource("d")])
+    assert summary == {"added": 1, "removed": 1, "updated": 1, "unchanged": 1}
+
+    current = probes._threads  # pylint: disable=protected-access
+    assert current["b"] is threads["b"] and current["c"] is threads["c"]
+    assert current["b"].check_interval == 7200 and current["b"].in_incident
+    assert current["b"].endpoint.history is history
+    assert "a" not in current
+    incidents.handoff_incident.assert_called_once_with("a")
+    assert sorted(e.get_name() for e in probes.endpoints()) == ["b", "c", "d"]
+
+    probes.stop()
+    probes.join()
+    assert not threads["a"].is_alive()
+
+
+def test_apply_large_config_with_few_changes_is_fast():
+    """
+    Проверяет, что перечитывание 10 000 ресурсов с несколькими изменениями
+    в режиме scheduler выполняется быстро и затрагивает только изменения.
+    """
+    probes = ProbeSet(MagicMock(), None, engine="scheduler")
+    resources = [resource(f"service-{i}") for i in range(10000)]
+    probes.apply(resources)
+
+    changed = list(resources)
+    changed[5] = resource("service-5", 7200)
+    changed.append(resource("service-new"))
+    del changed[0]
+
+    started = time.monotonic()
+    summary = probes.apply(changed)
+    elapsed = time.monotonic() - started
+    assert summary == {"added": 1, "removed": 1, "updated": 1, "unchanged": 9998}
+    assert len(probes.engine) == 10000
+    assert elapsed < 1.0
+
+    probes.stop()
+    probes.join()
+
+
+@pytest.mark.parametrize("engine", ["threads", "asyncio", "scheduler"])
+def test_active_incident_is_resolved_after_restart(engine):
+    """
+    Проверяет, что точка с уже открытым инцидентом начинает опрос с ожидания
+    восстановления и закрывает инцидент, если отвечает успешно.
+    """
+    incidents = MagicMock()
+    probes = ProbeSet(MagicMock(), incidents, engine=engine, active=["a"])
+    with patch("monitor.httpendpoint.HttpEndpoint.check_status", \
+               return_value=(True, 200, "")), \
+            patch("monitor.httpendpoint.HttpEndpoint.check_status_async", \
+                  AsyncMock(return_value=(True, 200, ""))):
+        probes.apply([{**resource("a"), "check_interval": 0.05, "retry_interval": 0.01}, \
+                      {**resource("b"), "check_interval": 0.05, "retry_interval": 0.01}])
+        deadline = time.monotonic() + 5
+        while not incidents.resolve_incident.called and time.monotonic() < deadline:
+            time.sleep(0.02)
+        probes.stop()
+        probes.join()
+    incidents.resolve_incident.assert_called_once_with("a")
+
+
+def test_update_keeps_timings_and_unchanged_latency_slo():
+    """
+    Проверяет, что перенастройка точки сохраняет время этапов проверок,
+    а окно порогов задержки — только если пороги не изменились.
+    """
+    probes = ProbeSet(MagicMock(), None, engine="scheduler")
+    slo = {"p50": 1.0, "window": 10}
+    probes.apply([{**resource("a"), "latency_slo": slo}])
+    endpoint = probes.endpoints()[0]
+    timing = ProbeTiming()
+    endpoint.timings.append(timing)
+    endpoint.slo.observe(0.2)
+
+    probes.apply([{**resource("a", 7200), "latency_slo": slo}])
+    updated = probes.endpoints()[0]
+    assert updated is not endpoint
+    assert updated.timings.last() is timing and updated.slo is endpoint.slo
+
+    probes.apply([{**resource("a", 7200), "latency_slo": {"p50": 0.5, "window": 10}}])
+    changed = probes.endpoints()[0]
+    assert changed.timings.last() is timing
+    assert changed.slo is not endpoint.slo and len(changed.slo.window) == 0
+    probes.stop()
+    probes.join()
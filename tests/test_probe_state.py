@@ -0,0 +1,72 @@
+"""tests/test_probe_state.py - Тесты автомата подтверждения и адаптивного интервала"""
+
+from monitor.probe_state import AdaptiveInterval, ProbeState, INCIDENT, RECOVERY
+from monitor.probe_rate import ProbeCounter
+
+CONFIG = {"check_interval": 0.2, "retry_interval": 0.05, "max_attempts": 3}
+
+
+def test_probe_state_confirms_failure_and_recovery():
+    """
+    Проверяет, что автомат требует max_attempts подтверждений подряд
+    и сообщает код исходного сбоя.
+    """
+    state = ProbeState("dummy", CONFIG)
+    events = [state.observe(code == 200, code, str(code)) \
+              for code in [200, 503, 500, 500, 500, 200, 200, 200, 200]]
+    assert events == [None, None, None, None, INCIDENT, None, None, None, RECOVERY]
+    assert state.trigger_code == 200 and not state.in_incident
+
+
+def test_probe_state_aborts_on_unconfirmed_failure():
+    """
+    Проверяет, что успешная проверка прерывает подтверждение сбоя.
+    """
+    state = ProbeState("dummy", CONFIG)
+    events = [state.observe(code == 200, code, "") for code in [500, 500, 200, 500, 500]]
+    assert INCIDENT not in events
+    assert not state.in_incident and state.confirming
+
+
+def test_adaptive_interval_backs_off_and_tightens():
+    """
+    Проверяет рост интервала после стабильного периода и сброс при подозрении на сбой.
+    """
+    interval = AdaptiveInterval({
+        "check_interval": 60, "retry_interval": 5, "max_attempts": 3,
+        "max_check_interval": 240, "backoff_factor": 2, "backoff_after": 2
+    })
+    delays = [interval.stable() for _ in range(8)]
+    assert delays == [60, 120, 120, 240, 240, 240, 240, 240]
+    assert interval.suspect() == 5
+    assert interval.stable() == 60
+
+
+def test_adaptive_interval_without_backoff():
+    """
+    Проверяет, что без max_check_interval используется постоянный check_interval.
+    """
+    interval = AdaptiveInterval({"check_interval": 30, "retry_interval": 5, "max_attempts": 3})
+    assert {interval.stable() for _ in range(50)} == {30}
+
+
+def test_probe_state_uses_check_interval_when_healthy():
+    """
+    Проверяет, что в рабочем состоянии пауза равна check_interval,
+    а при подозрении на сбой — retry_interval.
+    """
+    state = ProbeState("healthy", CONFIG)
+    state.observe(True, 200, "")
+    assert state.next_delay() == 0.2
+    state.observe(False, 500, "")
+    assert state.next_delay() == 0.05
+
+
+def test_probe_counter_baseline_rate():
+    """
+    Проверяет базовую частоту опроса раз в retry_interval.
+    """
+    counter = ProbeCounter("ep", 5)
+    counter.record()
+    assert counter.probes == 1
+    assert counter.baseline_rate() == 12
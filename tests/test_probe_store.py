@@ -0,0 +1,110 @@
+"""tests/test_probe_store.py"""
+
+import random
+from unittest.mock import Mock, patch
+import pytest
+from monitor.httpendpoint import HttpEndpoint
+from monitor.probe_store import ProbeStore, ProbeStoreWriter, plan_ranges
+
+# Начало суток (секунды эпохи), от которого отсчитываются проверки тестов
+DAY = 1_700_006_400
+
+
+@pytest.fixture(name="store")
+def fixture_store(tmp_path):
+    """Создает хранилище проверок во временном каталоге."""
+    store = ProbeStore(str(tmp_path / "probes.sqlite"))
+    yield store
+    store.close()
+
+
+def brute_force(samples, name, since, until):
+    """Считает доступность непосредственно по проверкам."""
+    chosen = [s for s in samples if s[0] == name and since <= s[1] < until]
+    ok = sum(1 for s in chosen if s[3])
+    return len(chosen), ok
+
+
+def test_plan_ranges_uses_coarsest_tier():
+    """Проверяет разбиение периода: целые часы, края по минутам, остаток по проверкам."""
+    plan = plan_ranges(DAY + 30, DAY + 2 * 3600 + 90)
+    assert plan == [
+        ("probes_raw", DAY + 30, DAY + 60),
+        ("probes_1m", DAY + 60, DAY + 3600),
+        ("probes_1h", DAY + 3600, DAY + 7200),
+        ("probes_1m", DAY + 7200, DAY + 7260),
+        ("probes_raw", DAY + 7260, DAY + 7290),
+    ]
+    assert plan_ranges(DAY + 10, DAY + 20) == [("probes_raw", DAY + 10, DAY + 20)]
+    assert not plan_ranges(DAY, DAY)
+
+
+def test_availability_matches_raw_samples(store):
+    """Проверяет, что запрос по сверткам совпадает с подсчетом по проверкам."""
+    rng = random.Random(1)
+    samples = []
+    for second in range(0, 5 * 3600, 7):
+        ok = rng.random() > 0.1
+        samples.append(("a", DAY + second + 0.5, 200 if ok else 500, ok, 0.1 if ok else 0.9))
+    samples.append(("b", DAY + 100, -1, False, None))
+    # Несколько пачек: строки свертки складываются при повторной записи
+    for start in range(0, len(samples), 500):
+        store.write_batch(samples[start:start + 500])
+
+    for since, until in ((DAY, DAY + 5 * 3600), (DAY + 125, DAY + 4 * 3600 + 17), \
+                         (DAY + 3601, DAY + 3659)):
+        stats = store.availability("a", since, until)
+        count, ok = brute_force(samples, "a", since, until)
+        assert (stats["count"], stats["ok"]) == (count, ok)
+        assert stats["availability"] == round(ok * 100 / count, 3)
+    stats = store.availability("a", DAY, DAY + 5 * 3600)
+    assert stats["latency_max"] == 0.9 and 0.1 < stats["latency_avg"] < 0.9
+
+    errors = store.availability("b", DAY, DAY + 3600)
+    assert errors == {"count": 1, "ok": 0, "availability": 0.0, \
+                      "latency_avg": None, "latency_max": None}
+    assert store.availability("missing", DAY, DAY + 3600) is None
+    assert store.names() == ["a", "b"]
+
+
+def test_purge_keeps_rollups(tmp_path):
+    """Проверяет, что проверки удаляются раньше свертки и период считается по свертке."""
+    store = ProbeStore(str(tmp_path / "probes.sqlite"), raw_days=1, minute_days=2, hour_days=30)
+    store.write_batch([("a", DAY + second, 200, True, 0.2) for second in range(0, 7200, 60)])
+    deleted = store.purge(now=DAY + 1.5 * 86400)
+    assert deleted == {"probes_raw": 120, "probes_1m": 0, "probes_1h": 0}
+    assert store.availability("a", DAY, DAY + 7200)["count"] == 120
+
+    deleted = store.purge(now=DAY + 3 * 86400)
+    assert deleted == {"probes_raw": 0, "probes_1m": 120, "probes_1h": 0}
+    assert store.availability("a", DAY, DAY + 7200)["count"] == 120
+    store.close()
+
+
+def test_writer_batches_endpoint_results(tmp_path):
+    """Проверяет фоновую запись результатов проверок точки."""
+    writer = ProbeStoreWriter(ProbeStore(str(tmp_path / "probes.sqlite")))
+    writer.start()
+    endpoint = HttpEndpoint({"name": "stored", "url": "http://localhost", "port": 0})
+    with patch("monitor.httpendpoint.get_probe_store", return_value=writer), \
+            patch("monitor.httpendpoint.requests.Session.request") as mock_request:
+        mock_request.return_value = Mock(status_code=200)
+        endpoint.check_status()
+        mock_request.return_value = Mock(status_code=500, headers={})
+        endpoint.check_status()
+    writer.flush()
+    assert writer.depth() == 0
+
+    stats = writer.store.availability("stored", DAY, DAY * 2)
+    assert stats["count"] == 2 and stats["availability"] == 50.0
+    writer.stop()
+    assert not writer.is_alive()
+
+
+def test_writer_drops_samples_when_queue_is_full(tmp_path):
+    """Проверяет, что переполненная очередь отбрасывает и считает проверки."""
+    writer = ProbeStoreWriter(ProbeStore(str(tmp_path / "probes.sqlite")), queue_size=2)
+    results = [writer.submit("a", DAY + number, 200, True, 0.1) for number in range(5)]
+    assert results == [True, True, False, False, False]
+    assert writer.depth() == 2 and writer.dropped == 3
+    writer.stop()
@@ -0,0 +1,117 @@
+"""tests/test_resource_includes.py"""
+
+import json
+import pytest
+from monitor import resource_includes
+from monitor.config import DEFAULT_SCHEMA_PATH, ConfigLoader, ConfigError
+
+
+def make_resource(name: str) -> dict:
+    """Создает конфигурацию ресурса."""
+    return {
+        "name": name,
+        "url": f"https://{name}.example.com",
+        "method": "GET",
+        "port": 443,
+        "error_code": 500,
+        "success_code": 200,
+        "check_interval": 60,
+        "retry_interval": 5,
+        "max_attempts": 3,
+    }
+
+
+def write_config(tmp_path, includes, resources=()):
+    """Записывает config.json с подключаемыми файлами и возвращает путь к нему."""
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({
+        "log_level": "INFO",
+        "telegram_users": [{"telegram_id": 1, "name": "Admin", "role": "Admin"}],
+        "resources": list(resources),
+        "resource_includes": includes,
+    }), encoding="utf-8")
+    return config_path
+
+
+def write_jsonl(path, names):
+    """Записывает ресурсы в файл JSONL."""
+    path.write_text("\n".join(json.dumps(make_resource(name)) for name in names) + "\n", \
+                    encoding="utf-8")
+
+
+def test_resources_merged_from_directory_and_glob(tmp_path):
+    """
+    Проверяет загрузку ресурсов из каталога, шаблона и файла .json
+    после ресурсов config.json.
+    """
+    (tmp_path / "resources.d").mkdir()
+    write_jsonl(tmp_path / "resources.d" / "b.jsonl", ["b1", "b2"])
+    write_jsonl(tmp_path / "resources.d" / "a.jsonl", ["a1"])
+    (tmp_path / "resources.d" / "notes.txt").write_text("не ресурсы", encoding="utf-8")
+    (tmp_path / "extra").mkdir()
+    (tmp_path / "extra" / "x.json").write_text( \
+        json.dumps({"resources": [make_resource("x1")]}), encoding="utf-8")
+
+    config_path = write_config(tmp_path, ["resources.d", "extra/*.json"], [make_resource("inline")])
+    loader = ConfigLoader()
+    loader.load_config(config_path, DEFAULT_SCHEMA_PATH)
+
+    assert [r["name"] for r in loader.get_resources()] == ["inline", "a1", "b1", "b2", "x1"]
+
+
+def test_unchanged_files_are_not_parsed_again(tmp_path, monkeypatch):
+    """Проверяет, что при повторной загрузке разбираются только изменившиеся файлы."""
+    write_jsonl(tmp_path / "a.jsonl", ["a1"])
+    write_jsonl(tmp_path / "b.jsonl", ["b1"])
+    config_path = write_config(tmp_path, ["*.jsonl"])
+    ConfigLoader().load_config(config_path, DEFAULT_SCHEMA_PATH)
+
+    parsed = []
+    load_include = resource_includes.load_include
+    monkeypatch.setattr(resource_includes, "load_include", \
+                        lambda path, schema: parsed.append(path) or load_include(path, schema))
+    write_jsonl(tmp_path / "b.jsonl", ["b1", "b2"])
+    loader = ConfigLoader()
+    loader.load_config(config_path, DEFAULT_SCHEMA_PATH)
+
+    assert parsed == [str((tmp_path / "b.jsonl").resolve())]
+    assert [r["name"] for r in loader.get_resources()] == ["a1", "b1", "b2"]
+
+
+def test_parallel_load_matches_sequential(tmp_path, monkeypatch):
+    """Проверяет, что разбор в отдельных процессах дает тот же результат."""
+    for part in range(3):
+        write_jsonl(tmp_path / f"part{part}.jsonl", [f"svc-{part}-{i}" for i in range(50)])
+    monkeypatch.setattr(resource_includes, "PARALLEL_MIN_BYTES", 0)
+
+    resources = resource_includes.load_resources(["*.jsonl"], tmp_path, DEFAULT_SCHEMA_PATH, \
+                                                 workers=2)
+
+    assert [r["name"] for r in resources] == \
+        [f"svc-{part}-{i}" for part in range(3) for i in range(50)]
+
+
+def test_invalid_jsonl_line_is_reported(tmp_path):
+    """Проверяет, что ошибка валидации указывает файл и строку."""
+    bad = make_resource("b2")
+    del bad["url"]
+    (tmp_path / "bad.jsonl").write_text( \
+        json.dumps(make_resource("b1")) + "\n\n" + json.dumps(bad) + "\n", encoding="utf-8")
+    config_path = write_config(tmp_path, ["bad.jsonl"])
+
+    with pytest.raises(ConfigError, match="bad.jsonl, строка 3"):
+        ConfigLoader().load_config(config_path, DEFAULT_SCHEMA_PATH)
+
+
+@pytest.mark.parametrize("includes, message", [
+    (["missing/*.jsonl"], "Не найдено файлов ресурсов"),
+    (["a.jsonl", "copy.jsonl"], "Повторяющееся имя ресурса: a1"),
+])
+def test_include_errors(tmp_path, includes, message):
+    """Проверяет ошибки: пустой шаблон и повтор имени ресурса в разных файлах."""
+    write_jsonl(tmp_path / "a.jsonl", ["a1"])
+    write_jsonl(tmp_path / "copy.jsonl", ["a1"])
+    config_path = write_config(tmp_path, includes)
+
+    with pytest.raises(ConfigError, match=message):
+        ConfigLoader().load_config(config_path, DEFAULT_SCHEMA_PATH)
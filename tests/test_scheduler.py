@@ -0,0 +1,80 @@
+"""tests/test_scheduler.py - Тесты центрального планировщика проверок"""
+
+import threading
+import time
+from unittest.mock import MagicMock
+from monitor.scheduler import ProbeScheduler
+
+
+class DummyEndpoint:
+    """
+    Заглушка, возвращающая последовательность кодов ответов и время проверок.
+    """
+
+    def __init__(self, name, statuses=()):
+        self._name = name
+        self._statuses = list(statuses)
+        self._index = 0
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def check_status(self):
+        """Возвращает следующий статус из списка (True/False, код, текст)."""
+        with self._lock:
+            self.calls.append(time.monotonic())
+            if self._index < len(self._statuses):
+                code = self._statuses[self._index]
+                self._index += 1
+            else:
+                code = 200
+        return code == 200, code, f"response {code}"
+
+    def get_name(self):
+        """Возвращает имя точки мониторинга."""
+        return self._name
+
+
+CONFIG = {"check_interval": 0.2, "retry_interval": 0.05, "max_attempts": 3}
+
+
+def test_scheduler_registers_and_resolves_incident():
+    """
+    Проверяет, что планировщик открывает и закрывает инцидент.
+    """
+    endpoint = DummyEndpoint("dummy", [200, 500, 500, 500, 500, 200, 200, 200])
+    incident_manager = MagicMock()
+
+    scheduler = ProbeScheduler(incidents=incident_manager, workers=4, jitter=0)
+    lag_before = scheduler._lag.snapshot()["count"]  # pylint: disable=protected-access
+    scheduler.add(endpoint, CONFIG)
+    scheduler.start()
+    time.sleep(1.0)
+    scheduler.stop()
+    scheduler.join(timeout=5)
+
+    incident_manager.register_incident.assert_called_once_with("dummy", 500, "response 500", None)
+    incident_manager.resolve_incident.assert_called_once_with("dummy")
+    # Опоздание учитывается для каждой проверки
+    lag = scheduler._lag.snapshot()  # pylint: disable=protected-access
+    assert lag["count"] - lag_before == len(endpoint.calls)
+
+
+def test_scheduler_spreads_first_probes():
+    """
+    Проверяет, что первые проверки разных точек разнесены во времени.
+    """
+    config = {"check_interval": 1, "retry_interval": 1, "max_attempts": 3}
+    endpoints = [DummyEndpoint(f"ep{i}") for i in range(20)]
+
+    scheduler = ProbeScheduler(incidents=MagicMock(), workers=4)
+    started = time.monotonic()
+    for endpoint in endpoints:
+        scheduler.add(endpoint, config)
+    scheduler.start()
+    time.sleep(1.1)
+    scheduler.stop()
+    scheduler.join(timeout=5)
+
+    first = sorted(endpoint.calls[0] - started for endpoint in endpoints)
+    assert len(first) == 20
+    assert first[-1] - first[0] > 0.5
@@ -0,0 +1,69 @@
+"""tests/test_schema.py"""
+
+import json
+import pytest
+from jsonschema import ValidationError
+from monitor import schema
+
+
+def test_validator_cached_until_schema_changes(tmp_path):
+    """Проверяет, что валидатор схемы строится один раз и обновляется при изменении схемы."""
+    schema_path = tmp_path / "schema.json"
+    schema_path.write_text(json.dumps({"type": "object", "required": ["a"]}), encoding="utf-8")
+
+    validator = schema.get_validator(schema_path)
+    assert schema.get_validator(schema_path) is validator
+    schema.validate_data({"a": 1}, schema_path)
+
+    schema_path.write_text(json.dumps({"type": "object", "required": ["a", "bb"]}), \
+                           encoding="utf-8")
+    assert schema.get_validator(schema_path) is not validator
+    with pytest.raises(ValidationError):
+        schema.validate_data({"a": 1}, schema_path)
+
+
+def test_parse_json_without_orjson(monkeypatch):
+    """Проверяет разбор JSON стандартным модулем, если orjson не установлен."""
+    monkeypatch.setattr(schema, "orjson", None)
+    assert schema.parse_json(b'{"a": [1, 2]}') == {"a": [1, 2]}
+    with pytest.raises(json.JSONDecodeError):
+        schema.parse_json(b'{"a": ')
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_schema_validator_reports_jsonschema_error(monkeypatch, compiled):
+    """
+    Проверяет, что с компилятором схем и без него ошибка валидации одинакова.
+    """
+    if not compiled:
+        monkeypatch.setattr(schema, "fastjsonschema", None)
+    elif schema.fastjsonschema is None:
+        pytest.skip("fastjsonschema не установлен")
+    validator = schema.SchemaValidator({
+        "type": "object",
+        "properties": {"port": {"type": "integer", "maximum": 65535},
+                       "url": {"type": "string", "format": "uri"}},
+    })
+    assert (validator.fast is not None) == compiled
+
+    validator.validate({"port": 80, "url": "not a uri"})
+    with pytest.raises(ValidationError) as error:
+        validator.validate({"port": 70000})
+    assert error.value.validator == "maximum"
+
+
+def test_validator_for_subschema(tmp_path):
+    """Проверяет валидатор части схемы (например, только списка ресурсов)."""
+    schema_path = tmp_path / "schema.json"
+    schema_path.write_text(json.dumps({
+        "$schema": "http://json-schema.org/draft-07/schema#",
+        "type": "object",
+        "properties": {"items": {"type": "array", "items": {"type": "integer"}}},
+    }), encoding="utf-8")
+
+    validator = schema.get_validator(schema_path, ("properties", "items"))
+    assert validator is not schema.get_validator(schema_path)
+    validator.validate([1, 2])
+    with pytest.raises(ValidationError) as error:
+        validator.validate([1, "2"])
+    assert list(error.value.path) == [1]
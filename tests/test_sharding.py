@@ -0,0 +1,143 @@
+"""tests/test_sharding.py - Тесты распределения опроса по процессам"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+import pytest
+from monitor.incident_manager import IncidentManager
+from monitor.metrics import get_metrics
+from monitor.sharding import EVENT_INCIDENT, JOIN_TIMEOUT, ShardCoordinator, lag_histogram, \
+    partition, shard_of
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    """Отвечает 500 на пути /bad*, иначе 200."""
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Возвращает код ответа по пути запроса."""
+        code = 500 if self.path.startswith("/bad") else 200
+        self.send_response(code)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *_args):
+        """Отключает вывод в stderr."""
+
+
+@pytest.fixture(name="server_url")
+def fixture_server_url():
+    """Запускает локальный HTTP-сервер и возвращает его адрес."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StatusHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def flood_events(events, count):
+    """Процесс опроса: перед выходом передает больше событий, чем вмещает канал."""
+    for number in range(count):
+        events.put((EVENT_INCIDENT, f"service-{number}", 500, "x" * 1000, None))
+
+
+def test_partition_is_stable_and_complete():
+    """Проверяет, что каждая точка попадает ровно в один процесс по хэшу имени."""
+    resources = [{"name": f"service-{i}"} for i in range(1000)]
+    parts = partition(resources, 4)
+    assert sum(len(part) for part in parts) == 1000
+    assert all(len(part) > 150 for part in parts)
+    for index, part in enumerate(parts):
+        assert all(shard_of(r["name"], 4) == index for r in part)
+
+
+def test_coordinator_applies_events_from_workers(tmp_path, server_url):
+    """
+    Проверяет, что инциденты, подтвержденные в процессах опроса,
+    регистрируются в менеджере инцидентов координатора.
+    """
+    def resource(name, path):
+        return {"name": name, "url": f"{server_url}{path}", "method": "GET", "port": 0,
+                "check_interval": 0.2, "retry_interval": 0.05, "max_attempts": 2}
+
+    resources = [resource(f"ok-{i}", "/ok") for i in range(4)] + \
+                [resource(f"bad-{i}", f"/bad{i}") for i in range(4)]
+    incidents = IncidentManager(log_file=str(tmp_path / "incidents.jsonl"))
+    coordinator = ShardCoordinator(resources, 2, incidents, engine="scheduler", \
+                                   log_file=str(tmp_path / "monitor.log"))
+    lag_before = lag_histogram("scheduler").snapshot()["count"]
+    coordinator.start()
+    try:
+        deadline = time.monotonic() + 20
+        while len(incidents.get_active()) < 4 and time.monotonic() < deadline:
+            time.sleep(0.1)
+    finally:
+        coordinator.stop()
+        coordinator.join()
+        incidents.close()
+
+    assert sorted(incidents.get_active_map()) == [f"bad-{i}" for i in range(4)]
+    # Время и результаты проверок процессов опроса есть у точек координатора
+    endpoints = {endpoint.get_name(): endpoint for endpoint in coordinator.endpoints()}
+    assert len(endpoints) == 8
+    assert all(len(endpoint.timings) > 0 for endpoint in endpoints.values())
+    assert endpoints["bad-0"].timings.last().code == 500
+    assert endpoints["ok-0"].history.summary()["uptime"] == 100.0
+    # Метрики проверок процессов опроса есть в реестре координатора
+    probes = get_metrics().counter("ct_probes_total", "Число проверок точки", \
+                                   endpoint="ok-0", result="success")
+    assert probes.value >= len(endpoints["ok-0"].timings) > 0
+    assert 'ct_probe_duration_seconds_count{endpoint="bad-0"}' in get_metrics().render()
+    assert lag_histogram("scheduler").snapshot()["count"] > lag_before
+    assert (tmp_path / "monitor.shard0.log").exists()
+    assert (tmp_path / "monitor.shard1.log").exists()
+
+
+def test_respawned_worker_resolves_incident_recovered_while_down(tmp_path, server_url):
+    """
+    Проверяет, что перезапущенный процесс опроса получает открытые инциденты
+    своих точек и закрывает инцидент точки, восстановившейся, пока он не работал.
+    """
+    resources = [{"name": "api", "url": f"{server_url}/ok", "method": "GET", "port": 0,
+                  "check_interval": 0.2, "retry_interval": 0.05, "max_attempts": 2}]
+    incidents = IncidentManager(log_file=str(tmp_path / "incidents.jsonl"))
+    coordinator = ShardCoordinator(resources, 1, incidents, engine="threads", \
+                                   log_file=str(tmp_path / "monitor.log"))
+    coordinator.start()
+    # pylint: disable=protected-access
+    try:
+        deadline = time.monotonic() + 20
+        while not coordinator._processes and time.monotonic() < deadline:
+            time.sleep(0.05)
+        # Инцидент открыт, а процесс опроса завершился до восстановления точки
+        incidents.register_incident("api", 500, "error")
+        coordinator._processes[0].kill()
+        while incidents.get_active() and time.monotonic() < deadline:
+            time.sleep(0.1)
+    finally:
+        coordinator.stop()
+        coordinator.join()
+        incidents.close()
+
+    assert not incidents.get_active()
+
+
+def test_shutdown_reads_events_while_workers_exit():
+    """
+    Проверяет, что при остановке события процесса, заполнившие канал, применяются,
+    а процесс завершается сам, без ожидания JOIN_TIMEOUT и принудительной остановки.
+    """
+    incidents = MagicMock()
+    coordinator = ShardCoordinator([{"name": "a", "url": "http://127.0.0.1:9/", "port": 9}], 1, \
+                                   incidents)
+    # pylint: disable=protected-access
+    process = coordinator._context.Process(target=flood_events, \
+                                           args=(coordinator._events, 500), daemon=True)
+    process.start()
+    coordinator._processes[0] = process
+    started = time.monotonic()
+    coordinator._shutdown()
+    assert time.monotonic() - started < JOIN_TIMEOUT
+    assert process.exitcode == 0
+    assert incidents.register_incident.call_count == 500
@@ -1,7 +1,12 @@
 """tests/test_telegram.py"""
 
-from unittest.mock import AsyncMock, MagicMock
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
 import pytest
+from monitor.probe_history import ProbeHistory
+from monitor.incident_manager import IncidentManager
+from monitor.probe_store import ProbeStore
+from monitor.probe_timing import ProbeTiming, TimingRing
 from monitor.telegram_notifier import TelegramNotifier
 
 @pytest.mark.asyncio
@@ -164,3 +169,222 @@ async def test_notify_info_sends_only_to_admin_and_auditor():
             call.kwargs["chat_id"] != uid for call in bot.app.bot.send_message.await_args_list
         )
         assert not_called, f"Spectator {uid} should not receive info message"
+
+
+class StubEndpoint:
+    """Заглушка точки мониторинга с именем и тегами."""
+
+    def __init__(self, name, tags=None):
+        self._name = name
+        self._tags = tags or []
+
+    def get_name(self):
+        """Возвращает имя точки мониторинга."""
+        return self._name
+
+    def get_tags(self):
+        """Возвращает теги точки мониторинга."""
+        return self._tags
+
+
+def make_status_bot(endpoints, failing):
+    """Создает бота с заданными точками и активными инцидентами."""
+    users = [{"telegram_id": 1, "name": "Admin", "role": "Admin"}]
+    incidents = MagicMock()
+    incidents.get_all_endpoints.return_value = endpoints
+    incidents.get_active_map.return_value = {
+        name: MagicMock(resource_name=name, start_time="2025-01-01T00:00:00+00:00")
+        for name in failing
+    }
+    return TelegramNotifier(token="FAKE", users=users, incidents=incidents, logger=MagicMock())
+
+
+def make_command(user_id=1, args=None):
+    """Создает сообщение с командой пользователя user_id и контекст с аргументами."""
+    update = MagicMock()
+    update.effective_user.id = user_id
+    update.message.reply_text = AsyncMock()
+    context = MagicMock()
+    context.args = [] if args is None else args
+    return update, context
+
+
+async def call_status(bot, args):
+    """Вызывает /status и возвращает тексты отправленных сообщений."""
+    update, context = make_command(args=args)
+    await bot.status_handler(update, context)
+    return [call.args[0] for call in update.message.reply_text.await_args_list]
+
+
+@pytest.mark.asyncio
+async def test_status_paginates_large_outage():
+    """
+    Проверяет, что отчет по 5000 точкам разбит на сообщения не длиннее 4096 символов.
+    """
+    endpoints = [StubEndpoint(f"service-{i:04d}") for i in range(5000)]
+    failing = [f"service-{i:04d}" for i in range(0, 5000, 10)]
+    bot = make_status_bot(endpoints, failing)
+
+    pages = await call_status(bot, [])
+    assert 1 < len(pages) <= 10
+    assert all(len(page) <= 4096 for page in pages)
+    assert "сбой 500" in pages[0]
+
+    pages = await call_status(bot, ["failing"])
+    text = "\n".join(pages)
+    assert all(len(page) <= 4096 for page in pages)
+    assert text.count("❗") == 500 and "✅" not in text
+
+
+@pytest.mark.asyncio
+async def test_status_filters_by_tag_and_prefix():
+    """
+    Проверяет фильтры по тегу и префиксу имени и группировку по тегам.
+    """
+    endpoints = [
+        StubEndpoint("db-main", ["db"]),
+        StubEndpoint("db-replica", ["db"]),
+        StubEndpoint("web-front", ["web"]),
+    ]
+    bot = make_status_bot(endpoints, ["db-replica"])
+
+    pages = await call_status(bot, ["tag:db"])
+    assert len(pages) == 1
+    assert "db-main" in pages[0] and "db-replica" in pages[0] and "web-front" not in pages[0]
+    assert pages[0].index("❗ db-replica") < pages[0].index("✅ db-main")
+
+    pages = await call_status(bot, ["web"])
+    assert "web-front" in pages[0] and "db-" not in pages[0]
+
+    pages = await call_status(bot, [])
+    assert "🏷 db:" in pages[0] and "🏷 web:" in pages[0]
+
+
+@pytest.mark.asyncio
+async def test_reload_reports_summary_for_admin():
+    """
+    Проверяет, что /reload вызывает перечитывание и сообщает итог.
+    """
+    users = [{"telegram_id": 1, "name": "Admin", "role": "Admin"}]
+    bot = TelegramNotifier(token="FAKE", users=users, incidents=MagicMock(), logger=MagicMock())
+    bot.set_reloader(MagicMock(return_value={"added": 2, "removed": 1, \
+                                             "updated": 0, "unchanged": 10}))
+
+    update, context = make_command()
+    await bot.reload_handler(update, context)
+
+    bot.reloader.assert_called_once()
+    text = update.message.reply_text.await_args.args[0]
+    assert "Добавлено: 2" in text and "удалено: 1" in text
+
+
+@pytest.mark.asyncio
+async def test_timing_lists_slowest_endpoints_first():
+    """
+    Проверяет, что /timing показывает время этапов и сортирует точки по p95.
+    """
+    endpoints = []
+    for name, total in (("fast", 0.01), ("slow", 0.5)):
+        endpoint = StubEndpoint(name)
+        endpoint.timings = TimingRing()
+        timing = ProbeTiming()
+        timing.ttfb = timing.total = total
+        endpoint.timings.append(timing)
+        endpoints.append(endpoint)
+    endpoints.append(StubEndpoint("no-data"))
+    bot = make_status_bot(endpoints, [])
+
+    update, context = make_command()
+    await bot.timing_handler(update, context)
+
+    text = update.message.reply_text.await_args.args[0]
+    assert "2 точек" in text and "no-data" not in text
+    assert text.index("slow") < text.index("fast")
+    assert "ttfb 500" in text and "p50/p95 500 / 500 мс" in text
+
+
+@pytest.mark.asyncio
+async def test_uptime_lists_least_available_first():
+    """
+    Проверяет, что /uptime показывает долю успешных проверок и спарклайн,
+    точки с меньшей доступностью — первыми, а период ограничивает проверки.
+    """
+    now = time.time()
+    endpoints = []
+    for name, results in (("stable", (True, True)), ("flaky", (False, True))):
+        endpoint = StubEndpoint(name)
+        endpoint.history = ProbeHistory()
+        for offset, ok in zip((7200, 60), results):
+            endpoint.history.append(now - offset, 200 if ok else 500, ok, 0.12)
+        endpoints.append(endpoint)
+    endpoints.append(StubEndpoint("no-data"))
+    bot = make_status_bot(endpoints, [])
+
+    update, context = make_command()
+    await bot.uptime_handler(update, context)
+
+    text = update.message.reply_text.await_args.args[0]
+    assert "2 точек" in text and "no-data" not in text
+    assert text.index("flaky") < text.index("stable")
+    assert "❗ flaky: 50.00% из 2, p50 120 мс ×█" in text
+
+    context.args = ["1h", "flaky"]
+    await bot.uptime_handler(update, context)
+    text = update.message.reply_text.await_args.args[0]
+    assert "1 точек" in text and "✅ flaky: 100.00% из 1" in text
+
+
+@pytest.mark.asyncio
+async def test_availability_reads_probe_store(tmp_path):
+    """
+    Проверяет, что /availability считает доступность за период по хранилищу проверок.
+    """
+    store = ProbeStore(str(tmp_path / "probes.sqlite"))
+    now = time.time()
+    store.write_batch([("api", now - 3 * 86400, 500, False, 0.5), \
+                       ("api", now - 600, 200, True, 0.1), ("web", now - 600, 200, True, 0.2)])
+    bot = make_status_bot([StubEndpoint("api"), StubEndpoint("web"), StubEndpoint("new")], [])
+
+    update, context = make_command()
+    with patch("monitor.telegram_notifier.get_probe_store", return_value=None):
+        await bot.availability_handler(update, context)
+    assert "не настроено" in update.message.reply_text.await_args.args[0]
+
+    with patch("monitor.telegram_notifier.get_probe_store", return_value=MagicMock(store=store)):
+        await bot.availability_handler(update, context)
+        text = update.message.reply_text.await_args.args[0]
+        assert "за 30 сут: 2 точек" in text and "new" not in text
+        assert "❗ api: 50.000% из 2, задержка ср. 300 мс, макс. 500 мс" in text
+        assert text.index("api") < text.index("web")
+
+        context.args = ["1d"]
+        await bot.availability_handler(update, context)
+        assert "✅ api: 100.000% из 1" in update.message.reply_text.await_args.args[0]
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_history_queries_incident_index(tmp_path):
+    """
+    Проверяет, что /history показывает инциденты из индекса журнала
+    с отбором по ресурсу и коду и сводкой MTTR.
+    """
+    manager = IncidentManager(log_file=str(tmp_path / "incidents.jsonl"))
+    manager.register_incident("api", 500, "error")
+    manager.resolve_incident("api")
+    manager.register_incident("web", 503, "busy")
+    bot = TelegramNotifier(token="FAKE", users=[{"telegram_id": 1, "name": "A", "role": "Admin"}], \
+                           incidents=manager, logger=MagicMock())
+
+    update, context = make_command()
+    await bot.history_handler(update, context)
+    text = update.message.reply_text.await_args.args[0]
+    assert text.startswith("📜 История инцидентов за 7 сут (время UTC)")
+    assert "Инцидентов: 2 (открыто: 1)" in text and "MTTR: 0 с" in text
+    assert text.index("web [503]") < text.index("api [500]")
+
+    context.args = ["1d", "api", "code:500"]
+    await bot.history_handler(update, context)
+    text = update.message.reply_text.await_args.args[0]
+    assert "за 1 сут: api, код 500" in text and "web" not in text
+    manager.close()
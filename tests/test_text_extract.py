@@ -0,0 +1,49 @@
+"""tests/test_text_extract.py - Тесты извлечения текста из ответа"""
+
+from monitor.text_extract import (
+    extract_html_bs4, extract_html_fast, extract_text, select_extractor
+)
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>502 Bad Gateway</title>
+<style>body { color: red; }</style>
+<script>var x = "<b>не текст</b>";</script></head>
+<body><h1>502 Bad Gateway</h1>
+<p>Сервер &laquo;upstream&raquo; не ответил</p><hr><center>nginx</center></body></html>"""
+
+
+def test_fast_extractor_matches_bs4():
+    """
+    Проверяет, что быстрый экстрактор дает тот же текст, что и BeautifulSoup.
+    """
+    expected = "502 Bad Gateway,502 Bad Gateway,Сервер «upstream» не ответил,nginx"
+    assert extract_html_fast(PAGE) == expected
+    assert extract_html_bs4(PAGE) == expected
+
+
+def test_fast_extractor_stops_after_limit():
+    """
+    Проверяет, что разбор прекращается после набора max_chars символов.
+    """
+    page = "<html><body>" + "<p>строка</p>" * 100000 + "</body></html>"
+    text = extract_html_fast(page, max_chars=50)
+    assert len(text) == 50
+    assert text.startswith("строка,строка")
+
+
+def test_extractor_selected_by_content_type():
+    """
+    Проверяет выбор экстрактора по типу содержимого и переопределение на bs4.
+    """
+    assert select_extractor("text/html; charset=utf-8").__name__ == "extract_html_fast"
+    assert select_extractor("text/html", {"text/html": "bs4"}).__name__ == "extract_html_bs4"
+    assert select_extractor("application/xml").__name__ == "extract_plain"
+
+
+def test_json_and_plain_extraction():
+    """
+    Проверяет извлечение текста из JSON (в том числе обрезанного) и простого текста.
+    """
+    assert extract_text("application/json", '{"status": "down"}') == "{'status': 'down'}"
+    assert extract_text("application/json", '{"status": "do') == '{"status": "do'
+    assert extract_text("text/plain", "  error  \n") == "error"